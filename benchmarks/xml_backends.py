@@ -0,0 +1,148 @@
+"""Compare the XML backends on a generated Plone-like corpus
+
+Usage: python benchmarks/xml_backends.py [number of packages]
+
+Every package gets a big configure.zcml, a GenericSetup metadata.xml and
+a few Factory Type Information files, which are then scanned with every
+backend available.
+"""
+
+from pathlib import Path
+from z3c.dependencychecker.modules import FTIFile
+from z3c.dependencychecker.modules import GSMetadata
+from z3c.dependencychecker.modules import ZCMLFile
+from z3c.dependencychecker.xmlparsers import XML_PARSERS
+
+import sys
+import tempfile
+import time
+
+
+REPETITIONS = 5
+
+ZCML_DIRECTIVES = """
+  <include package="plone.app.{0}" />
+  <browser:page
+      name="view-{0}"
+      for="plone.dexterity.interfaces.IDexterityContent"
+      class=".views.View{0}"
+      template="templates/view.pt"
+      permission="zope2.View"
+      layer="my.package.interfaces.IBrowserLayer{0}"
+      />
+  <adapter
+      for="zope.interface.Interface my.package.interfaces.ILayer{0}"
+      provides="plone.app.contentlisting.interfaces.IContentListing"
+      factory=".adapters.Adapter{0}"
+      />
+  <utility
+      component=".vocabularies.Vocabulary{0}"
+      provides="zope.schema.interfaces.IVocabularyFactory"
+      name="my.package.vocabulary{0}"
+      />
+  <subscriber
+      for="my.package.interfaces.IItem{0} zope.lifecycleevent.IObjectModifiedEvent"
+      handler="my.package.events.modified{0}"
+      />
+  <!-- documentation about the directives above, as usually found -->
+"""
+ZCML_TEMPLATE = """<configure
+    xmlns="http://namespaces.zope.org/zope"
+    xmlns:browser="http://namespaces.zope.org/browser"
+    xmlns:genericsetup="http://namespaces.zope.org/genericsetup"
+    i18n_domain="my.package">
+{0}
+  <genericsetup:registerProfile
+      name="default"
+      directory="profiles/default"
+      provides="Products.GenericSetup.interfaces.EXTENSION"
+      />
+</configure>
+"""
+
+METADATA_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<metadata>
+  <version>1000</version>
+  <dependencies>
+{0}
+  </dependencies>
+</metadata>
+"""
+
+FTI_PROPERTY = '  <property name="{0}" i18n:translate="">Value {1}</property>\n'
+FTI_TEMPLATE = """<?xml version="1.0" encoding="UTF-8"?>
+<object name="Type{0}" meta_type="Dexterity FTI"
+    xmlns:i18n="http://xml.zope.org/namespaces/i18n">
+{1}
+  <property name="klass">plone.dexterity.content.Container</property>
+  <property name="behaviors">
+{2}
+  </property>
+  <property name="schema">my.package.content.ISchema{0}</property>
+  <alias from="(Default)" to="(dynamic view)" />
+  <action title="View" action_id="view" category="object" condition_expr=""
+      url_expr="string:${{object_url}}" visible="True">
+    <permission value="View" />
+  </action>
+</object>
+"""
+
+
+def generate_corpus(folder, packages):
+    files = []
+    for package in range(packages):
+        package_folder = folder / f"package{package}"
+        types_folder = package_folder / "profiles" / "default" / "types"
+        types_folder.mkdir(parents=True)
+
+        directives = "".join(ZCML_DIRECTIVES.format(x) for x in range(200))
+        files.append((ZCMLFile, package_folder / "configure.zcml"))
+        files[-1][1].write_text(ZCML_TEMPLATE.format(directives))
+
+        dependencies = "".join(
+            f"    <dependency>profile-plone.app.{x}:default</dependency>\n"
+            for x in range(20)
+        )
+        files.append((GSMetadata, types_folder.parent / "metadata.xml"))
+        files[-1][1].write_text(METADATA_TEMPLATE.format(dependencies))
+
+        for fti in range(10):
+            properties = "".join(FTI_PROPERTY.format(f"title{x}", x) for x in range(40))
+            behaviors = "".join(
+                f'    <element value="plone.behavior{x}" />\n' for x in range(30)
+            )
+            files.append((FTIFile, types_folder / f"Type{fti}.xml"))
+            files[-1][1].write_text(FTI_TEMPLATE.format(fti, properties, behaviors))
+    return files
+
+
+def scan(files, backend):
+    found = 0
+    for scanner, file_path in files:
+        source_file = scanner(file_path.parent, file_path)
+        source_file.xml_backend = backend
+        found += sum(1 for _ in source_file.scan())
+    return found
+
+
+def main():
+    packages = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    with tempfile.TemporaryDirectory() as folder:
+        files = generate_corpus(Path(folder), packages)
+        size = sum(x.stat().st_size for _, x in files)
+        print(f"{len(files)} files, {size / 1024 / 1024:.1f} MiB")
+
+        for backend in XML_PARSERS:
+            timings = []
+            for _ in range(REPETITIONS):
+                start = time.perf_counter()
+                found = scan(files, backend)
+                timings.append(time.perf_counter() - start)
+            print(
+                f"{backend:>6}: {min(timings) * 1000:8.1f} ms "
+                f"(best of {REPETITIONS}), {found} dotted names"
+            )
+
+
+if __name__ == "__main__":
+    main()
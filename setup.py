@@ -46,10 +46,12 @@ setup(
     install_requires=[
         "setuptools",
         "cached-property",
+        "packaging",
         "toml",
         "wheel-inspect",
     ],
     extras_require={
+        "lxml": ["lxml"],
         "test": ["pytest", "pytest-mock"],
     },
     entry_points={
@@ -0,0 +1,113 @@
+from z3c.dependencychecker.discovery import DEFAULT_FILTER
+from z3c.dependencychecker.discovery import in_excluded_folder
+from z3c.dependencychecker.metadata import FLAT_LAYOUT_EXCLUDED_FOLDERS
+from z3c.dependencychecker.metadata import INSTALLED_METADATA_SUFFIXES
+
+import fnmatch
+import functools
+import logging
+import os
+
+
+logger = logging.getLogger(__name__)
+
+# the .data folder schemes that are installed next to the top level packages
+WHEEL_CODE_SCHEMES = ("purelib", "platlib")
+
+# archives that can be scanned as sdists, see iter_sdist_files
+SDIST_SUFFIXES = (".tar.gz", ".tgz", ".tar.bz2", ".tbz", ".tar.xz", ".txz", ".tar")
+
+
+def iter_wheel_files(zip_file, file_filter=DEFAULT_FILTER):
+    """Yield the (relative path, size, read function) of the files of a wheel
+
+    zip_file is the already open ZipFile of the wheel.
+    Only the files that get installed as code are yielded, the ones on
+    `*.dist-info` are left out, and the ones on the `purelib` and `platlib`
+    schemes of `*.data` get their path relative to where they are installed.
+
+    Files are yielded in the order they are on the archive, so it is read
+    sequentially, and they are only read (and decompressed) if the read
+    function is called.
+    The exclude/include patterns of file_filter apply to the relative paths.
+    """
+    excluded_folders = {}
+    for info in zip_file.infolist():
+        if info.is_dir():
+            continue
+
+        relative_path = info.filename
+        top_folder, _, rest = relative_path.partition("/")
+        if top_folder.endswith(".dist-info"):
+            continue
+        if top_folder.endswith(".data"):
+            scheme, _, relative_path = rest.partition("/")
+            if scheme not in WHEEL_CODE_SCHEMES or not relative_path:
+                continue
+
+        if in_excluded_folder(relative_path, 0, file_filter, excluded_folders):
+            continue
+        if not file_filter.includes_file(relative_path):
+            continue
+        yield relative_path, info.file_size, functools.partial(zip_file.read, info)
+
+
+def is_sdist(path):
+    return os.path.basename(path).lower().endswith(SDIST_SUFFIXES)
+
+
+def iter_sdist_files(tar_file):
+    """Yield the (relative path, size, read function) of the files of an sdist
+
+    tar_file is opened in streaming mode (`r|*`), so the archive is read
+    once from start to end, and a read function can only be called before
+    the next file is asked for.
+    Paths are relative to the root folder of the sdist, `name-version/`.
+    """
+    for member in tar_file:
+        if not member.isfile():
+            continue
+        relative_path = member.name.partition("/")[2]
+        if relative_path:
+            yield relative_path, member.size, functools.partial(
+                _read_member, tar_file, member
+            )
+
+
+def _read_member(tar_file, member):
+    with tar_file.extractfile(member) as member_file:
+        return member_file.read()
+
+
+def sdist_top_level(relative_path):
+    """Return the top level package or module that a file of an sdist is on
+
+    Those are the folders at the root of the sdist, or within `src`,
+    but the metadata ones and the ones setuptools never finds packages on,
+    the same way the top levels of a package on disk are worked out.
+    `tests` is a top level, as it is on disk.
+
+    Return a (name, single module) pair, name is None if it is not on any.
+    Modules at the root are only single module top levels if they are named
+    after the project, which the caller needs to check.
+    """
+    parts = relative_path.split("/")
+    if parts[0] == "src" and len(parts) > 1:
+        parts = parts[1:]
+
+    if len(parts) == 1:
+        name, extension = os.path.splitext(parts[0])
+        return (name if extension == ".py" else None), True
+
+    name = parts[0]
+    if name.endswith(INSTALLED_METADATA_SUFFIXES) or (
+        _is_excluded_folder(name) and name != "tests"
+    ):
+        return None, False
+    return name, False
+
+
+def _is_excluded_folder(name):
+    return any(
+        fnmatch.fnmatchcase(name, pattern) for pattern in FLAT_LAYOUT_EXCLUDED_FOLDERS
+    )
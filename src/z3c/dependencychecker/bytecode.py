@@ -0,0 +1,118 @@
+from importlib.util import cache_from_source
+from importlib.util import MAGIC_NUMBER
+from importlib.util import source_hash
+
+import dis
+import logging
+import marshal
+import os
+import types
+
+
+logger = logging.getLogger(__name__)
+
+# a pyc file starts with the magic number, some flags, and then either the
+# modification time and size of its source, or a hash of it (PEP 552)
+HEADER_SIZE = 16
+HASH_BASED_FLAG = 0b01
+CHECK_SOURCE_FLAG = 0b10
+
+# instructions that load the level and the from list of an import
+CONSTANT_LOADS = ("LOAD_CONST", "LOAD_SMALL_INT")
+
+
+def load_fresh_code(source_path, source):
+    """Return the code object cached on __pycache__ for source_path
+
+    source are the current contents of source_path.
+
+    Return None if there is no cached file, if it was written by another
+    python version, or if it is not up to date with source.
+    Hash based pyc files are always checked against source,
+    even if they are not meant to be checked.
+    """
+    try:
+        pyc_path = cache_from_source(os.fspath(source_path))
+        with open(pyc_path, "rb") as pyc_file:
+            data = pyc_file.read()
+    except (OSError, NotImplementedError, ValueError):
+        return None
+
+    if len(data) < HEADER_SIZE or data[:4] != MAGIC_NUMBER:
+        return None
+
+    flags = int.from_bytes(data[4:8], "little")
+    if flags & ~(HASH_BASED_FLAG | CHECK_SOURCE_FLAG):
+        return None
+    if flags & HASH_BASED_FLAG:
+        if data[8:16] != source_hash(source):
+            return None
+    elif not _same_timestamp(data, source_path, source):
+        return None
+
+    try:
+        code = marshal.loads(memoryview(data)[HEADER_SIZE:])
+    except (EOFError, ValueError, TypeError):
+        return None
+
+    if not isinstance(code, types.CodeType):
+        return None
+    logger.debug("Using the bytecode cached on %s", pyc_path)
+    return code
+
+
+def _same_timestamp(data, source_path, source):
+    try:
+        mtime = int(os.stat(source_path).st_mtime)
+    except OSError:
+        return False
+    return (
+        int.from_bytes(data[8:12], "little") == mtime & 0xFFFFFFFF
+        and int.from_bytes(data[12:16], "little") == len(source) & 0xFFFFFFFF
+    )
+
+
+def imports_from_code(code):
+    """Return the absolute imports done by code, and the code nested in it
+
+    They are (dotted name, line number) pairs, named the same way as
+    PythonModule does from the source,
+    i.e. `from a import b` is `a.b` and `from a import *` is `a`.
+
+    Return None if the instructions are not the ones expected around an
+    import, so that the source is parsed instead.
+    """
+    imports = []
+    pending = [code]
+    while pending:
+        code = pending.pop()
+        instructions = list(dis.get_instructions(code))
+        for index, instruction in enumerate(instructions):
+            if instruction.opname != "IMPORT_NAME":
+                continue
+            if index < 2:
+                return None
+            level, from_list = instructions[index - 2], instructions[index - 1]
+            if level.opname not in CONSTANT_LOADS:
+                return None
+            if from_list.opname not in CONSTANT_LOADS:
+                return None
+            lineno = instruction.positions.lineno
+            if lineno is None:
+                return None
+
+            if level.argval != 0:
+                # relative imports
+                continue
+
+            module = instruction.argval
+            if from_list.argval is None:
+                imports.append((module, lineno))
+                continue
+            for name in from_list.argval:
+                dotted_name = module if name == "*" else f"{module}.{name}"
+                imports.append((dotted_name, lineno))
+
+        pending.extend(x for x in code.co_consts if isinstance(x, types.CodeType))
+
+    return imports
@@ -0,0 +1,171 @@
+from pathlib import Path
+
+import hashlib
+import json
+import logging
+import os
+import tempfile
+
+
+logger = logging.getLogger(__name__)
+
+# folder where the cache is kept, an empty value disables the cache
+CACHE_DIR_VARIABLE = "DEPENDENCYCHECKER_CACHE_DIR"
+CACHE_FILE_NAME = "wheels.json"
+CACHE_VERSION = 1
+
+# wheels kept on the cache, the ones added longest ago are dropped first
+MAX_CACHED_WHEELS = 256
+
+DIGEST_CHUNK_SIZE = 1024 * 1024
+
+
+def cache_folder():
+    """Return the folder of the persistent cache, None if it is disabled
+
+    It is the DEPENDENCYCHECKER_CACHE_DIR environment variable,
+    or `z3c.dependencychecker` on the user cache folder.
+    """
+    folder = os.environ.get(CACHE_DIR_VARIABLE)
+    if folder is not None:
+        return Path(folder) if folder else None
+
+    base = os.environ.get("XDG_CACHE_HOME") or Path.home() / ".cache"
+    return Path(base) / "z3c.dependencychecker"
+
+
+def file_digest(path):
+    with open(path, "rb") as digest_file:
+        return hashlib.file_digest(digest_file, "sha256").hexdigest()
+
+
+class WheelMetadataCache:
+    """The metadata of the wheels already inspected, kept across runs
+
+    Wheels are looked up by their path, size and modification time,
+    so an unchanged wheel is not even opened.
+    If any of them changed, i.e. the wheel was built again or copied to
+    another folder, the digest of its contents is looked up then,
+    and only if that is not known either the wheel is inspected.
+
+    Only the parts of the output of wheel_inspect that are used are kept:
+    the name, requires_dist and top_level.
+    """
+
+    def __init__(self, folder):
+        self.path = folder / CACHE_FILE_NAME
+        self._data = self._load()
+
+    def _load(self):
+        data = read_cache_file(self.path)
+        if data is None:
+            return {"version": CACHE_VERSION, "wheels": {}, "digests": {}}
+        return data
+
+    def get(self, wheel_path, inspect):
+        """Return the metadata of the wheel at wheel_path
+
+        inspect(wheel_path) returns it, like wheel_inspect does,
+        if it is not on the cache.
+        """
+        key = os.path.abspath(wheel_path)
+        stat = os.stat(wheel_path)
+        signature = [stat.st_size, stat.st_mtime_ns]
+
+        wheels = self._data["wheels"]
+        digests = self._data["digests"]
+        entry = wheels.get(key)
+        if entry is not None and entry["signature"] == signature:
+            dist_info = digests.get(entry["digest"])
+            if dist_info is not None:
+                logger.debug("Using the cached metadata of %s", wheel_path)
+                return {"dist_info": dist_info}
+
+        digest = file_digest(wheel_path)
+        dist_info = digests.get(digest)
+        if dist_info is None:
+            wheel_info = inspect(wheel_path)
+            dist_info = _cacheable_dist_info(wheel_info["dist_info"])
+            if dist_info is None:
+                return wheel_info
+        else:
+            logger.debug("Using the cached metadata of the contents of %s", key)
+
+        # most recently added last, the cache is not written on hits
+        wheels.pop(key, None)
+        wheels[key] = {"signature": signature, "digest": digest}
+        digests[digest] = dist_info
+        self._prune()
+        self._save()
+        return {"dist_info": dist_info}
+
+    def _prune(self):
+        wheels = self._data["wheels"]
+        for key in list(wheels)[: max(len(wheels) - MAX_CACHED_WHEELS, 0)]:
+            del wheels[key]
+
+        used = {entry["digest"] for entry in wheels.values()}
+        digests = self._data["digests"]
+        for digest in [x for x in digests if x not in used]:
+            del digests[digest]
+
+    def _save(self):
+        write_cache_file(self.path, self._data)
+
+
+def read_cache_file(path, version=CACHE_VERSION):
+    """Return the data on the cache file at path
+
+    Return None if it can not be read, or it was written by another version.
+    """
+    try:
+        with open(path, encoding="utf-8") as cache_file:
+            data = json.load(cache_file)
+    except (OSError, ValueError) as error:
+        logger.debug("Could not read the cache %s: %s", path, error)
+        return None
+
+    if not isinstance(data, dict) or data.get("version") != version:
+        return None
+    return data
+
+
+def write_cache_file(path, data):
+    """Write data on the cache file at path
+
+    It is replaced at once, so readers never see half of it.
+    Failing to write it is not an error, the cache is just not used.
+    """
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with tempfile.NamedTemporaryFile(
+            "w",
+            encoding="utf-8",
+            dir=path.parent,
+            prefix=f".{path.name}",
+            delete=False,
+        ) as cache_file:
+            json.dump(data, cache_file)
+        os.replace(cache_file.name, path)
+    except OSError as error:
+        logger.debug("Could not write the cache %s: %s", path, error)
+
+
+def _cacheable_dist_info(dist_info):
+    """Keep only the parts of dist_info that are used
+
+    Return None if the wheel has no metadata, it is not cached then.
+    """
+    metadata = dist_info.get("metadata")
+    if metadata is None:
+        return None
+
+    cacheable = {
+        "metadata": {
+            "name": metadata["name"],
+            "requires_dist": metadata.get("requires_dist", []),
+        },
+    }
+    if "top_level" in dist_info:
+        cacheable["top_level"] = dist_info["top_level"]
+    return cacheable
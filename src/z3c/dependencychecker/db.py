@@ -1,3 +1,4 @@
+from z3c.dependencychecker.distributions import canonical_name
 from z3c.dependencychecker.dotted_name import DottedName
 
 import logging
@@ -10,6 +11,10 @@ logger = logging.getLogger(__name__)
 # starting from python 3.10 the list of builtin methods are available directly
 PY_10_OR_HIGHER = sys.version_info[1] >= 10
 
+# how many places where a dotted name is imported are remembered,
+# to explain where findings come from without using too much memory
+MAX_LOCATIONS = 5
+
 
 class ImportsDatabase:
     """Store all imports and requirements of a package
@@ -26,6 +31,16 @@ class ImportsDatabase:
         self.reverse_user_mappings = {}
         self.ignored_packages = set()
         self.own_dotted_name = None
+        # file the requirements were read from, kept on snapshots
+        self.metadata_source = None
+        # (safe name, is test) -> [(file path, line number), ...],
+        # see get_locations
+        self.locations = {}
+        self.occurrences = {}
+        self.max_locations = MAX_LOCATIONS
+        # DistributionsIndex of the installed distributions, if any,
+        # to tell which requirement provides an import without guessing
+        self.distributions = None
 
     def add_requirements(self, requirements):
         self._requirements = set(requirements)
@@ -62,9 +77,69 @@ class ImportsDatabase:
             if unknown_import:
                 logger.debug("    Import found: %s", single_import.name)
                 self.imports_used.append(single_import)
+                self._add_location(single_import)
             else:
                 logger.debug("    Import found & ignored: %s", single_import.name)
 
+    def merge(self, other):
+        """Add the requirements and imports found on another database
+
+        Used to put together the partial results of scanning a package
+        in shards.
+        The order in which databases are merged does not change the result.
+        """
+        other_name = other.own_dotted_name
+        if self.own_dotted_name is None:
+            self.own_dotted_name = other_name
+        elif other_name is not None and other_name != self.own_dotted_name:
+            raise ValueError(
+                f"Can not merge results of {other_name.name} "
+                f"into results of {self.own_dotted_name.name}"
+            )
+        if self.metadata_source is None:
+            self.metadata_source = other.metadata_source
+
+        self._requirements.update(other._requirements)
+        for extra_name, dotted_names in other._extras_requirements.items():
+            self._extras_requirements.setdefault(extra_name, set()).update(dotted_names)
+        self.imports_used.extend(other.imports_used)
+        for single_import in other.imports_used:
+            self._add_location(single_import)
+
+    def _add_location(self, dotted_name):
+        # test and non test imports are kept apart, so that the ones in tests
+        # do not take all the places of the ones that matter for a finding
+        key = (dotted_name.safe_name, bool(dotted_name.is_test))
+        self.occurrences[key] = self.occurrences.get(key, 0) + 1
+        locations = self.locations.setdefault(key, [])
+        if len(locations) < self.max_locations:
+            locations.append((dotted_name.file_path, dotted_name.lineno))
+
+    def get_locations(self, dotted_name, is_test=None):
+        """Explain where a dotted name, as found on any report, is imported
+
+        Return a list of (file path, line number) pairs,
+        at most max_locations of them,
+        and the total number of times it has been imported.
+
+        Imports within the dotted name are also considered,
+        so that requirements can be explained as well.
+        is_test limits them to the imports on test files, or to the rest,
+        None means both.
+        """
+        safe_name = dotted_name.safe_name
+        prefix = f"{safe_name}."
+        locations = []
+        total = 0
+        for key in sorted(self.locations):
+            name, on_test = key
+            if is_test is not None and on_test != is_test:
+                continue
+            if name == safe_name or name.startswith(prefix):
+                locations.extend(self.locations[key])
+                total += self.occurrences[key]
+        return locations[: self.max_locations], total
+
     def add_user_mapping(self, package_name, provided_names):
         package = DottedName(package_name)
         packages_provided = [DottedName(name) for name in provided_names]
@@ -96,6 +171,7 @@ class ImportsDatabase:
     def get_missing_imports(self):
         filters = (
             self._filter_out_testing_imports,
+            self._filter_out_installed(self._requirements),
             self._filter_out_requirements,
             self._filter_out_ignored_imports,
         )
@@ -107,7 +183,9 @@ class ImportsDatabase:
     def get_missing_test_imports(self):
         filters = (
             self._filter_out_only_testing_imports,
+            self._filter_out_installed(self._requirements),
             self._filter_out_requirements,
+            self._filter_out_installed(self._get_test_extra()),
             self._filter_out_test_requirements,
             self._filter_out_ignored_imports,
         )
@@ -125,6 +203,7 @@ class ImportsDatabase:
             all_but_test_requirements.remove(dotted_name)
         filters = (
             self._filter_out_python_standard_library,
+            self._filter_out_installed_imports(self.imports_used),
             self._filter_out_used_imports,
             self._filter_out_ignored_imports,
             self._filter_out_mappings,
@@ -147,10 +226,12 @@ class ImportsDatabase:
                 continue
             complete_non_testing_imports.append(non_test_import)
 
+        non_testing_provided = self._distributions_of(non_testing_imports)
         requirements_not_used = [
             requirement
             for requirement in self._requirements
-            if self._discard_if_found_obj_in_list(
+            if canonical_name(requirement.name) not in non_testing_provided
+            and self._discard_if_found_obj_in_list(
                 requirement,
                 complete_non_testing_imports,
             )
@@ -170,10 +251,12 @@ class ImportsDatabase:
                 complete_test_imports.append(meta_package)
                 continue
             complete_test_imports.append(test_import)
+        test_provided = self._distributions_of(testing_imports)
         should_be_test_requirements = [
             requirement
             for requirement in requirements_not_used
-            if not self._discard_if_found_obj_in_list(
+            if canonical_name(requirement.name) in test_provided
+            or not self._discard_if_found_obj_in_list(
                 requirement,
                 complete_test_imports,
             )
@@ -193,6 +276,7 @@ class ImportsDatabase:
 
         filters = (
             self._filter_out_python_standard_library,
+            self._filter_out_installed_imports(self.imports_used),
             self._filter_out_used_imports,
             self._filter_out_ignored_imports,
             self._filter_out_mappings_on_test,
@@ -311,6 +395,52 @@ class ImportsDatabase:
             test_requirements,
         )
 
+    def _provided_by(self, dotted_name):
+        """Return the canonical names of the installed distributions that
+        provide dotted_name, if there is an index of them
+        """
+        if self.distributions is None:
+            return frozenset()
+        return self.distributions.provided_by(dotted_name)
+
+    def _distributions_of(self, dotted_names):
+        """Return the canonical names of the installed distributions that
+        provide any of dotted_names
+        """
+        if self.distributions is None:
+            return set()
+        provided = set()
+        for dotted_name in dotted_names:
+            provided.update(self.distributions.provided_by(dotted_name))
+        return provided
+
+    def _filter_out_installed(self, requirements):
+        """Return a filter that discards the dotted names provided by
+        the installed distributions of requirements
+
+        It goes before the filters that guess it from the names,
+        so that only the dotted names not found on the index are guessed.
+        """
+        names = set()
+        if self.distributions is not None:
+            names = {canonical_name(x.name) for x in requirements}
+
+        def filter_out_installed(dotted_name):
+            return not names or not self._provided_by(dotted_name) & names
+
+        return filter_out_installed
+
+    def _filter_out_installed_imports(self, imports):
+        """Return a filter that discards the requirements whose installed
+        distribution provides any of imports
+        """
+        provided = self._distributions_of(imports)
+
+        def filter_out_installed_imports(requirement):
+            return canonical_name(requirement.name) not in provided
+
+        return filter_out_installed_imports
+
     def _filter_out_python_standard_library(self, dotted_name):
         std_library = self._build_std_library()
         return self._discard_if_found_obj_in_list(dotted_name, std_library)
@@ -0,0 +1,379 @@
+import errno
+import fnmatch
+import logging
+import os
+import re
+import subprocess
+
+
+logger = logging.getLogger(__name__)
+
+FOLDERS_TO_IGNORE = ("node_modules", "__pycache__", "venv")
+
+# tracked files, files not ignored by .gitignore, and with a tag to tell apart
+# the files that are tracked but not on disk
+GIT_LS_FILES = (
+    "git",
+    "ls-files",
+    "-z",
+    "-t",
+    "--cached",
+    "--deleted",
+    "--others",
+    "--exclude-standard",
+)
+# removed from disk, or outside of a sparse checkout
+GIT_MISSING_TAGS = ("R", "S")
+
+
+class FileFilter:
+    """Decide which files and folders are scanned
+
+    Besides the folders that are always ignored (see FOLDERS_TO_IGNORE and
+    folders starting with a dot), users can provide shell-style patterns on
+    the `exclude` and `include` keys of [tool.dependencychecker].
+
+    Patterns are matched against paths relative to the package root,
+    with `/` as separator.
+    Patterns without a `/` are matched against the file or folder name only,
+    no matter how deep it is, i.e. `build` or `*.min.js`.
+
+    Excluded folders are not even looked into.
+    If there are include patterns, only the files that match any of them are
+    scanned.
+    """
+
+    def __init__(self, exclude=(), include=()):
+        self._exclude = _compile_patterns(exclude)
+        self._include = _compile_patterns(include)
+
+    def excludes_folder(self, name, relative_path):
+        if name in FOLDERS_TO_IGNORE or name.startswith("."):
+            return True
+        return self._exclude is not None and self._exclude(relative_path) is not None
+
+    def includes_file(self, relative_path):
+        if self._exclude is not None and self._exclude(relative_path) is not None:
+            return False
+        if self._include is not None and self._include(relative_path) is None:
+            return False
+        return True
+
+
+def _compile_patterns(patterns):
+    """Turn all patterns into a single regular expression matcher"""
+    if not patterns:
+        return None
+
+    regexes = []
+    for pattern in patterns:
+        pattern = pattern.strip("/")
+        regex = fnmatch.translate(pattern)
+        if "/" not in pattern:
+            # match the name at any depth
+            regex = f"(?:.*/)?{regex}"
+        regexes.append(regex)
+    return re.compile("|".join(f"(?:{regex})" for regex in regexes)).match
+
+
+DEFAULT_FILTER = FileFilter()
+
+
+def walk_folder(folder, file_filter=DEFAULT_FILTER, root=None):
+    """Yield the paths of all files within folder that need to be scanned
+
+    folder is not always a folder but can also be a single file,
+    in which case it is the only path returned.
+
+    Folders are walked with os.scandir, so the file type information that
+    comes with listing a folder is reused rather than asking for it again.
+    Excluded folders are pruned before descending into them.
+
+    root is the folder against which the include/exclude patterns are
+    matched, it defaults to folder itself.
+    folder itself is checked against the patterns as well,
+    but not the folders between root and it.
+    """
+    if root is not None and excludes_top_level(folder, file_filter, root):
+        return
+
+    if not os.path.isdir(folder):
+        if os.path.exists(folder):
+            yield folder
+        return
+
+    folder = os.fspath(folder)
+    root = os.fspath(root) if root is not None else folder
+    if not folder.startswith(root):
+        root = folder
+    root_length = len(root.rstrip(os.sep)) + 1
+    convert_separator = os.sep != "/"
+
+    pending = [folder]
+    while pending:
+        current = pending.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError as error:
+            logger.warning("Could not read folder %s: %s", current, error)
+            continue
+
+        with entries:
+            for entry in entries:
+                relative_path = entry.path[root_length:]
+                if convert_separator:  # pragma: no cover
+                    relative_path = relative_path.replace(os.sep, "/")
+
+                try:
+                    is_folder = entry.is_dir()
+                except OSError:
+                    continue
+
+                if is_folder:
+                    # like os.walk, do not follow symbolic links to folders
+                    if entry.is_symlink():
+                        continue
+                    if not file_filter.excludes_folder(entry.name, relative_path):
+                        pending.append(entry.path)
+                elif file_filter.includes_file(relative_path):
+                    yield entry.path
+
+
+def list_git_files(folder):
+    """Return the files within folder according to git
+
+    That is the tracked files, plus the untracked ones that are not ignored
+    by .gitignore, as paths relative to folder with `/` as separator.
+
+    Return None if folder is not within a git checkout, or git is not
+    available, so that the caller can walk the folder instead.
+    """
+    try:
+        result = subprocess.run(
+            GIT_LS_FILES,
+            cwd=folder,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        logger.debug("%s is not a git checkout", folder)
+        return None
+
+    files = []
+    missing = set()
+    for line in result.stdout.split(b"\0"):
+        if not line:
+            continue
+        tag, relative_path = line[:1].decode("ascii"), os.fsdecode(line[2:])
+        if tag in GIT_MISSING_TAGS:
+            missing.add(relative_path)
+        else:
+            files.append(relative_path)
+    if missing:
+        files = [x for x in files if x not in missing]
+    logger.debug("git knows about %s files within %s", len(files), folder)
+    return files
+
+
+def select_files(relative_paths, top_folder, file_filter=DEFAULT_FILTER, root=None):
+    """Yield the paths within top_folder that need to be scanned
+
+    relative_paths is a list of files, relative to root and with `/` as
+    separator, i.e. from list_git_files.
+
+    The same rules than walk_folder apply: top_folder can be a single file,
+    and it is checked against the filter as well.
+
+    git lists a symbolic link to a folder, a submodule or a nested checkout
+    as a single entry without looking into it,
+    so such a top_folder is walked instead.
+    So it is if git lists no file within it at all,
+    i.e. if it is ignored by the .gitignore of an enclosing checkout.
+    """
+    root = os.fspath(root if root is not None else top_folder)
+    if excludes_top_level(top_folder, file_filter, root):
+        return
+
+    prefix = os.path.relpath(top_folder, root).replace(os.sep, "/")
+    if prefix == ".":
+        prefix = ""
+
+    if prefix in relative_paths:
+        if os.path.isdir(top_folder):
+            yield from walk_folder(top_folder, file_filter, root)
+        else:
+            # a single module top level
+            yield top_folder
+        return
+
+    if prefix:
+        prefix += "/"
+    prefix_length = len(prefix)
+    excluded_folders = {}
+    listed = False
+    for relative_path in relative_paths:
+        if not relative_path.startswith(prefix):
+            continue
+        listed = True
+        if in_excluded_folder(
+            relative_path, prefix_length, file_filter, excluded_folders
+        ):
+            continue
+        if file_filter.includes_file(relative_path):
+            yield os.path.join(root, *relative_path.split("/"))
+
+    if not listed and os.path.exists(top_folder):
+        logger.warning(
+            "git lists no files within %s, is it ignored by git?\n"
+            "Walking the folder instead.",
+            top_folder,
+        )
+        yield from walk_folder(top_folder, file_filter, root)
+
+
+def excludes_top_level(top_level, file_filter, root):
+    """Check if the top level folder or file is left out by file_filter
+
+    It is matched with its path relative to root, like the files below it.
+    """
+    relative_path = os.path.relpath(top_level, root).replace(os.sep, "/")
+    if relative_path == "." or relative_path.startswith("../"):
+        return False
+    if os.path.isdir(top_level):
+        name = relative_path[relative_path.rfind("/") + 1 :]
+        return file_filter.excludes_folder(name, relative_path)
+    return not file_filter.includes_file(relative_path)
+
+
+def in_excluded_folder(relative_path, start, file_filter, cache):
+    """Check the folders of relative_path, after the start position"""
+    position = relative_path.find("/", start)
+    while position != -1:
+        folder = relative_path[:position]
+        excluded = cache.get(folder)
+        if excluded is None:
+            name = folder[folder.rfind("/") + 1 :]
+            excluded = cache[folder] = file_filter.excludes_folder(name, folder)
+        if excluded:
+            return True
+        position = relative_path.find("/", position + 1)
+    return False
+
+
+def parse_file_list(data):
+    """Split the bytes of a newline or NUL separated list of files
+
+    If there is any NUL byte the list is NUL separated,
+    as i.e. `find -print0` or `git ls-files -z` produce.
+    """
+    if b"\0" in data:
+        lines = data.split(b"\0")
+    else:
+        lines = [x.rstrip(b"\r") for x in data.split(b"\n")]
+    return [os.fsdecode(x) for x in lines if x.strip()]
+
+
+def select_listed_files(file_paths, top_folders, file_filter=DEFAULT_FILTER, root="."):
+    """Yield (top folder, file path) pairs for the files within root
+
+    file_paths are given by the user, i.e. with --files-from,
+    either absolute or relative to the current folder.
+
+    Every file is paired with the top folder it belongs to,
+    or root if it is not within any of them.
+    Files outside of root are ignored, and the exclude/include patterns
+    of file_filter apply, like for walk_folder: from the top folder down.
+    """
+    root = os.path.abspath(root)
+    top_paths = []
+    for top_folder in top_folders:
+        top_path = os.path.abspath(top_folder)
+        relative_top = os.path.relpath(top_path, root).replace(os.sep, "/")
+        # where the top folder starts on the relative paths of its files
+        start = relative_top.rfind("/") + 1
+        top_paths.append((top_path, top_folder, start))
+
+    excluded_folders = {}
+    for file_path in file_paths:
+        file_path = os.path.abspath(file_path)
+        relative_path = os.path.relpath(file_path, root).replace(os.sep, "/")
+        if relative_path.startswith("../"):
+            logger.warning("%s is not within %s, ignoring it", file_path, root)
+            continue
+
+        for top_path, top_folder, start in top_paths:
+            if file_path == top_path or file_path.startswith(top_path + os.sep):
+                break
+        else:
+            top_folder, start = root, 0
+
+        if in_excluded_folder(relative_path, start, file_filter, excluded_folders):
+            continue
+        if not file_filter.includes_file(relative_path):
+            continue
+        yield top_folder, file_path
+
+
+def unique_top_levels(top_levels):
+    """Drop the top levels that are the same, or within, another top level
+
+    Paths are compared once symbolic links are resolved,
+    so a top level that is a symbolic link to another one is dropped as well.
+    Top levels that can not be resolved, i.e. symbolic link loops,
+    are dropped with a warning.
+    """
+    resolved = []
+    for top_level in top_levels:
+        real_path = os.path.realpath(top_level)
+        try:
+            os.stat(real_path)
+        except OSError as error:
+            _warn_unreadable(top_level, error)
+            continue
+        resolved.append((real_path, top_level))
+
+    unique = []
+    kept = set()
+    for real_path, top_level in resolved:
+        within_another = any(
+            real_path.startswith(other_path + os.sep) for other_path, _ in resolved
+        )
+        if within_another or real_path in kept:
+            logger.debug("Top level %s is already scanned", top_level)
+            continue
+        kept.add(real_path)
+        unique.append(top_level)
+    return unique
+
+
+def unique_files(files):
+    """Yield the (top level, file path, size) of the files not seen before
+
+    files are (top level, file path) pairs.
+    Files are told apart by their device and inode,
+    so that a file reachable through symbolic or hard links is only
+    scanned once.
+    The size comes from the same stat call, so that it is not asked again.
+    """
+    seen = set()
+    for top_level, file_path in files:
+        try:
+            stat = os.stat(file_path)
+        except OSError as error:
+            _warn_unreadable(file_path, error)
+            continue
+
+        key = (stat.st_dev, stat.st_ino)
+        if key in seen:
+            logger.debug("%s was already scanned", file_path)
+            continue
+        seen.add(key)
+        yield top_level, file_path, stat.st_size
+
+
+def _warn_unreadable(path, error):
+    if error.errno == errno.ELOOP:
+        logger.warning("Symbolic link loop on %s, ignoring it", path)
+    else:
+        logger.warning("Could not read %s: %s", path, error)
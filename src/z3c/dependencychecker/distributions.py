@@ -0,0 +1,210 @@
+from importlib import metadata as importlib_metadata
+from pathlib import Path
+from z3c.dependencychecker.cache import cache_folder
+from z3c.dependencychecker.cache import read_cache_file
+from z3c.dependencychecker.cache import write_cache_file
+from z3c.dependencychecker.metadata import INSTALLED_METADATA_SUFFIXES
+
+import logging
+import os
+import re
+import sys
+
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE_NAME = "distributions.json"
+INDEX_VERSION = 1
+
+# sys.path folders kept on the index, the ones indexed longest ago are
+# dropped first, so that running on several environments does not make it
+# grow forever
+MAX_INDEXED_FOLDERS = 64
+
+# extensions of the files that can be imported
+MODULE_SUFFIXES = (".py", ".so", ".pyd")
+
+
+def canonical_name(name):
+    """Normalize a distribution name, so that `Zope.Interface`,
+    `zope-interface` and `zope_interface` are all the same
+    """
+    return re.sub(r"[-_.]+", "_", name).lower()
+
+
+class DistributionsIndex:
+    """Which installed distributions provide every import name
+
+    Import names are the top level packages and modules of the
+    distributions, but for namespace packages, where they are the first
+    regular package below them, i.e. `zope.interface` rather than `zope`.
+
+    Looking up which distributions provide a dotted name is a dictionary
+    lookup for every level of the dotted name, the deepest one first.
+    """
+
+    def __init__(self, roots):
+        # import name, lowercase -> canonical names of the distributions
+        self._roots = roots
+
+    @classmethod
+    def from_distributions(cls, distributions):
+        """Build an index out of (canonical name, import names) pairs"""
+        roots = {}
+        for name, import_names in distributions:
+            for import_name in import_names:
+                roots.setdefault(import_name.lower(), set()).add(name)
+        return cls({key: frozenset(value) for key, value in roots.items()})
+
+    def provided_by(self, dotted_name):
+        """Return the canonical names of the distributions that provide
+        dotted_name, a DottedName
+        """
+        namespaces = dotted_name.namespaces
+        for depth in range(len(namespaces), 0, -1):
+            names = self._roots.get(".".join(namespaces[:depth]))
+            if names is not None:
+                return names
+        return frozenset()
+
+
+def import_names(distribution):
+    """Return the import names of an importlib.metadata Distribution
+
+    They are worked out from the files on its RECORD, which tell namespace
+    packages apart, or read from its top_level.txt otherwise.
+    """
+    names = _names_from_files(distribution.files or ())
+    if names:
+        return sorted(names)
+
+    top_level = distribution.read_text("top_level.txt") or ""
+    return sorted({x.strip().replace("/", ".") for x in top_level.split() if x})
+
+
+def _names_from_files(files):
+    paths = []
+    packages = set()
+    for file_path in files:
+        parts = file_path.parts
+        if not parts or not file_path.name.endswith(MODULE_SUFFIXES):
+            continue
+        module_name = file_path.name.split(".")[0]
+        folders = parts[:-1]
+        if not all(x.isidentifier() for x in (*folders, module_name)):
+            # i.e. ../../bin, *.dist-info or *.data
+            continue
+        if module_name.startswith("__editable__"):
+            continue
+        if module_name == "__init__":
+            packages.add(folders)
+        paths.append((folders, module_name))
+
+    names = set()
+    for folders, module_name in paths:
+        for depth in range(1, len(folders) + 1):
+            if folders[:depth] in packages:
+                names.add(".".join(folders[:depth]))
+                break
+        else:
+            if module_name != "__init__":
+                names.add(".".join((*folders, module_name)))
+    return names
+
+
+def load_distributions_index(path=None):
+    """Return the DistributionsIndex of the distributions on path
+
+    path defaults to sys.path, that is, the distributions installed on the
+    python environment dependencychecker runs on.
+
+    The index is kept on the persistent cache (see cache_folder), and only
+    the folders of path that changed since, i.e. because something was
+    installed on them, are looked at again.
+    Only the distributions that changed on them are read again.
+    """
+    if path is None:
+        path = sys.path
+
+    folder = cache_folder()
+    index_path = None if folder is None else folder / INDEX_FILE_NAME
+    data = None if index_path is None else read_cache_file(index_path, INDEX_VERSION)
+    if data is None:
+        data = {"version": INDEX_VERSION, "folders": {}}
+
+    folders = data["folders"]
+    changed = False
+    distributions = []
+    seen = set()
+    for entry in path:
+        entry = os.path.abspath(entry or ".")
+        if entry in seen:
+            continue
+        seen.add(entry)
+        try:
+            mtime = os.stat(entry).st_mtime_ns
+        except OSError:
+            continue
+
+        cached = folders.get(entry)
+        if cached is None or cached["mtime"] != mtime:
+            cached_distributions = {} if cached is None else cached["distributions"]
+            folders.pop(entry, None)
+            folders[entry] = {
+                "mtime": mtime,
+                "distributions": _index_folder(entry, cached_distributions),
+            }
+            changed = True
+        distributions.extend(folders[entry]["distributions"].values())
+
+    if changed and index_path is not None:
+        for entry in list(folders)[: max(len(folders) - MAX_INDEXED_FOLDERS, 0)]:
+            del folders[entry]
+        write_cache_file(index_path, data)
+
+    # the first distribution found on path is the one imported
+    found = {}
+    for distribution in distributions:
+        found.setdefault(distribution["name"], distribution["import_names"])
+    return DistributionsIndex.from_distributions(found.items())
+
+
+def _index_folder(folder, cached):
+    """Return metadata folder name -> distribution data of folder
+
+    The data on cached, for the metadata folders that did not change,
+    is reused.
+    """
+    logger.debug("Indexing the distributions installed on %s", folder)
+    indexed = {}
+    try:
+        entries = list(os.scandir(folder))
+    except OSError as error:
+        logger.debug("Could not read folder %s: %s", folder, error)
+        return indexed
+
+    for entry in entries:
+        if not entry.name.endswith(INSTALLED_METADATA_SUFFIXES):
+            continue
+        try:
+            if not entry.is_dir():
+                continue
+            mtime = entry.stat().st_mtime_ns
+        except OSError:
+            continue
+
+        previous = cached.get(entry.name)
+        if previous is not None and previous["mtime"] == mtime:
+            indexed[entry.name] = previous
+            continue
+
+        distribution = importlib_metadata.PathDistribution(Path(entry.path))
+        name = distribution.metadata["Name"]
+        if not name:
+            continue
+        indexed[entry.name] = {
+            "mtime": mtime,
+            "name": canonical_name(name),
+            "import_names": import_names(distribution),
+        }
+    return indexed
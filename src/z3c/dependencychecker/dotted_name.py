@@ -21,12 +21,14 @@ class DottedName:
         name,
         file_path=None,
         is_test=False,
+        lineno=None,
     ):
         self.name = name
         self.safe_name = name.lower().replace("-", "_")
 
         self.file_path = file_path
         self.is_test = is_test
+        self.lineno = lineno
 
     @cached_property
     def namespaces(self):
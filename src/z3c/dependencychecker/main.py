@@ -1,7 +1,16 @@
 from importlib.metadata import version
 from pathlib import Path
+from z3c.dependencychecker.archives import is_sdist
+from z3c.dependencychecker.discovery import parse_file_list
+from z3c.dependencychecker.distributions import load_distributions_index
+from z3c.dependencychecker.dotted_name import DottedName
 from z3c.dependencychecker.package import Package
 from z3c.dependencychecker.report import Report
+from z3c.dependencychecker.snapshot import save_snapshot
+from z3c.dependencychecker.snapshot import SnapshotError
+from z3c.dependencychecker.stats import TooManyErrors
+from z3c.dependencychecker.store import ImportsStore
+from z3c.dependencychecker.store import StoreError
 
 import logging
 import optparse
@@ -12,14 +21,132 @@ logger = logging.getLogger(__name__)
 
 
 def main():
+    subcommand = SUBCOMMANDS.get(sys.argv[1] if len(sys.argv) > 1 else None)
+    if subcommand:
+        subcommand()
+
     options, args = parse_command_line()
     set_log_level(options.verbose)
     path = get_path(args)
 
-    package_analyzed = Package(path)
-    package_analyzed.inspect()
+    if options.from_snapshot:
+        package_analyzed = load_package_from_snapshot(path, [options.from_snapshot])
+    else:
+        store = open_store(options.store) if options.store else None
+        files = read_file_list(options.files_from) if options.files_from else None
+        sdist = path.is_file()
+        if sdist and (options.files_from or options.installed or options.scan_wheel):
+            logger.error(
+                "--files-from, --installed and --scan-wheel can not be used "
+                "on an sdist: %s",
+                path,
+            )
+            sys.exit(1)
+        package_analyzed = Package(
+            path,
+            shard=options.shard,
+            store=store,
+            files=files,
+            strict=options.strict,
+            installed=options.installed,
+            scan_wheel=options.scan_wheel,
+            sdist=sdist,
+        )
+        try:
+            package_analyzed.inspect()
+        except TooManyErrors as error:
+            logger.error(error)
+            sys.exit(1)
+        if store is not None:
+            store.close()
+
+    if options.save_snapshot:
+        save_snapshot(package_analyzed.imports, Path(options.save_snapshot))
+
+    if options.shard:
+        # a report on a single shard would be misleading,
+        # it is done once all shards are merged
+        logger.info(
+            "Shard %s/%s stored on %s, use `dependencychecker merge` to report.",
+            *options.shard,
+            options.save_snapshot,
+        )
+        exit(0)
+
+    print_report(package_analyzed, options)
+
+
+def merge():
+    """Report on the results of scanning a package in shards
+
+    Every shard is scanned with `--shard i/N --save-snapshot PATH`,
+    this command merges all those snapshots and reports on them.
+    """
+    options, snapshot_paths = parse_merge_command_line()
+    set_log_level(options.verbose)
+    path = get_path([options.path] if options.path else [])
+
+    package_analyzed = load_package_from_snapshot(path, snapshot_paths)
+
+    if options.save_snapshot:
+        save_snapshot(package_analyzed.imports, Path(options.save_snapshot))
+
+    print_report(package_analyzed, options)
+
+
+def query():
+    """Answer questions about the imports kept on a store
+
+    See the --store option.
+    """
+    options, args = parse_query_command_line()
+    set_log_level(options.verbose)
+    store = open_store(options.store)
+    include_tests = options.include_tests
+
+    if options.package:
+        for dotted_name in store.imports_of(options.package, include_tests):
+            print(dotted_name)
+        exit(0)
+
+    for name in args:
+        results = store.packages_importing(DottedName(name), include_tests)
+        if options.files:
+            for package_name, file_path, line, dotted_name in results:
+                location = file_path if line is None else f"{file_path}:{line}"
+                print(f"{package_name}: {location}: {dotted_name}")
+        else:
+            for package_name in sorted({row[0] for row in results}):
+                print(package_name)
+    exit(0)
+
+
+def open_store(store_path):
+    try:
+        return ImportsStore(store_path)
+    except StoreError as error:
+        logger.error(error)
+        sys.exit(1)
+
+
+def read_file_list(files_from):
+    """Read the files to scan from the path files_from, or stdin if it is -"""
+    if files_from == "-":
+        return parse_file_list(sys.stdin.buffer.read())
+
+    try:
+        with open(files_from, "rb") as list_file:
+            return parse_file_list(list_file.read())
+    except OSError as error:
+        logger.error("Could not read the list of files: %s", error)
+        sys.exit(1)
+
 
-    report = Report(package_analyzed)
+def print_report(package_analyzed, options):
+    if options.match_installed:
+        package_analyzed.imports.distributions = load_distributions_index()
+
+    report = Report(package_analyzed, explain=options.explain)
     report.print_report()
 
     if options.exit_status:
@@ -29,8 +156,166 @@ def main():
 
 
 def parse_command_line():
-    usage = 'Usage: %prog [path]\n(path defaults to package name, fallback is "src/")'
+    usage = (
+        'Usage: %prog [path]\n(path defaults to package name, fallback is "src/")\n'
+        "       %prog [options] sdist.tar.gz\n"
+        "       %prog merge [options] snapshot [snapshot ...]"
+    )
+    parser = optparse.OptionParser(usage=usage, version=_version())
+    _add_common_options(parser)
+    parser.add_option(
+        "--shard",
+        dest="shard",
+        metavar="I/N",
+        type="string",
+        action="callback",
+        callback=_parse_shard,
+        help=(
+            "Only scan the I-th of N shards of the files, "
+            "needs --save-snapshot to store the partial results, "
+            "see `dependencychecker merge --help`."
+        ),
+    )
+    parser.add_option(
+        "--from-snapshot",
+        dest="from_snapshot",
+        metavar="PATH",
+        help=(
+            "Do not scan the package, "
+            "report on the scan results stored on PATH by --save-snapshot."
+        ),
+    )
+    parser.add_option(
+        "--store",
+        dest="store",
+        metavar="PATH",
+        help=(
+            "Keep the imports found on the SQLite database at PATH, "
+            "see `dependencychecker query --help`."
+        ),
+    )
+    parser.add_option(
+        "--files-from",
+        dest="files_from",
+        metavar="PATH",
+        help=(
+            "Only scan the files listed on PATH (- for stdin), "
+            "one per line or NUL separated, rather than looking for them."
+        ),
+    )
+    parser.add_option(
+        "--strict",
+        action="store_true",
+        dest="strict",
+        default=False,
+        help=(
+            "Stop on the first file that can not be scanned, "
+            "i.e. because of a syntax error, rather than skipping it."
+        ),
+    )
+    parser.add_option(
+        "--installed",
+        action="store_true",
+        dest="installed",
+        default=False,
+        help=(
+            "Read the requirements from the distribution installed from the "
+            "package, i.e. with `pip install -e .`, rather than from its "
+            "sources or a built wheel."
+        ),
+    )
+    parser.add_option(
+        "--scan-wheel",
+        action="store_true",
+        dest="scan_wheel",
+        default=False,
+        help=(
+            "Scan the files shipped on the wheel built from the package, "
+            "on its dist folder, rather than the package sources."
+        ),
+    )
+    options, args = parser.parse_args()
+    if options.files_from and options.from_snapshot:
+        parser.error("--files-from can not be used with --from-snapshot")
+    if options.shard and not options.save_snapshot:
+        parser.error("--shard needs --save-snapshot")
+    if options.shard and options.store:
+        parser.error("--shard can not be used with --store")
+    if options.scan_wheel and options.files_from:
+        parser.error("--scan-wheel can not be used with --files-from")
+    if options.scan_wheel and options.installed:
+        parser.error("--scan-wheel can not be used with --installed")
+    return options, args
+
+
+def parse_merge_command_line():
+    usage = "Usage: %prog merge [options] snapshot [snapshot ...]"
+    parser = optparse.OptionParser(usage=usage, version=_version())
+    _add_common_options(parser)
+    parser.add_option(
+        "--path",
+        dest="path",
+        help=(
+            "Folder of the package, to read its configuration from "
+            "(defaults to the current folder)."
+        ),
+    )
+    options, args = parser.parse_args(sys.argv[2:])
+    if not args:
+        parser.error("at least one snapshot is needed")
+    return options, args
+
+
+def parse_query_command_line():
+    usage = (
+        "Usage: %prog query --store PATH dotted.name [dotted.name ...]\n"
+        "       %prog query --store PATH --package PACKAGE"
+    )
     parser = optparse.OptionParser(usage=usage, version=_version())
+    parser.add_option(
+        "-v",
+        "--verbose",
+        action="store_true",
+        dest="verbose",
+        default=False,
+        help="Show debug output",
+    )
+    parser.add_option(
+        "--store",
+        dest="store",
+        metavar="PATH",
+        help="SQLite database filled with `dependencychecker --store PATH`.",
+    )
+    parser.add_option(
+        "--package",
+        dest="package",
+        help="List the dotted names imported by PACKAGE.",
+    )
+    parser.add_option(
+        "--files",
+        action="store_true",
+        dest="files",
+        default=False,
+        help="List the files where the dotted names are imported.",
+    )
+    parser.add_option(
+        "--no-tests",
+        action="store_false",
+        dest="include_tests",
+        default=True,
+        help="Ignore imports done on tests.",
+    )
+    options, args = parser.parse_args(sys.argv[2:])
+    if not options.store:
+        parser.error("--store is needed")
+    if not args and not options.package:
+        parser.error("a dotted name or --package is needed")
+    if not Path(options.store).exists():
+        parser.error(f"store {options.store} does not exist")
+    return options, args
+
+
+def _add_common_options(parser):
     parser.add_option(
         "-v",
         "--verbose",
@@ -46,14 +331,64 @@ def parse_command_line():
         default=True,
         help='Exit with status code "0" even if there are errors.',
     )
-    options, args = parser.parse_args()
-    return options, args
+    parser.add_option(
+        "--save-snapshot",
+        dest="save_snapshot",
+        metavar="PATH",
+        help="Store the scan results on PATH, see --from-snapshot.",
+    )
+    parser.add_option(
+        "--explain",
+        action="store_true",
+        dest="explain",
+        default=False,
+        help="Show the files and lines where each reported dotted name is imported.",
+    )
+    parser.add_option(
+        "--match-installed",
+        action="store_true",
+        dest="match_installed",
+        default=False,
+        help=(
+            "Tell which requirement provides each import by looking at the "
+            "files of the distributions installed, on the python environment "
+            "dependencychecker runs on, rather than guessing it from their names."
+        ),
+    )
+
+
+def _parse_shard(option, opt_str, value, parser):
+    try:
+        index, total = (int(number) for number in value.split("/"))
+    except ValueError:
+        raise optparse.OptionValueError(f"{opt_str} needs to be like 1/4")
+
+    if not 1 <= index <= total:
+        raise optparse.OptionValueError(
+            f"{opt_str} index needs to be between 1 and {total}"
+        )
+
+    parser.values.shard = (index, total)
+
+
+def load_package_from_snapshot(path, snapshot_paths):
+    try:
+        return Package.from_snapshot(path, *[Path(x) for x in snapshot_paths])
+    except (SnapshotError, ValueError) as error:
+        logger.error(error)
+        sys.exit(1)
 
 
 def _version():
     return version("z3c.dependencychecker")
 
 
+SUBCOMMANDS = {
+    "merge": merge,
+    "query": query,
+}
+
+
 def set_log_level(verbose):
     level = logging.INFO
     if verbose:
@@ -70,6 +405,7 @@ def get_path(args):
 
     If no path is given on the command line arguments, the current working
     directory is used instead.
+    The path can also be an sdist archive, i.e. `name-1.0.tar.gz`.
     """
     path = Path(".").resolve()
 
@@ -78,9 +414,9 @@ def get_path(args):
         return path
 
     path = Path(args[0]).resolve()
-    if path.is_dir():
+    if path.is_dir() or (path.is_file() and is_sdist(path)):
         logger.debug("path used: %s", path)
         return path
 
-    logger.error("Given path is not a folder: %s", args[0])
+    logger.error("Given path is not a folder nor an sdist: %s", args[0])
     sys.exit(1)
@@ -0,0 +1,731 @@
+from email.parser import BytesHeaderParser
+from importlib import metadata as importlib_metadata
+from packaging.requirements import InvalidRequirement
+from packaging.requirements import Requirement
+from pathlib import Path
+from urllib.parse import unquote
+from urllib.parse import urlparse
+
+import ast
+import configparser
+import fnmatch
+import json
+import logging
+import os
+import toml
+
+
+logger = logging.getLogger(__name__)
+
+# fields of [project] that are needed, if any of them is dynamic,
+# only the build backend knows its value
+PROJECT_FIELDS = ("name", "dependencies", "optional-dependencies")
+
+# build backend of projects without a [build-system] table
+DEFAULT_BUILD_BACKEND = "setuptools.build_meta:__legacy__"
+
+# folders and modules that setuptools never finds on a flat layout,
+# see setuptools.discovery.FlatLayoutPackageFinder and FlatLayoutModuleFinder
+FLAT_LAYOUT_EXCLUDED_FOLDERS = (
+    "ci",
+    "bin",
+    "debian",
+    "doc",
+    "docs",
+    "documentation",
+    "manpages",
+    "news",
+    "newsfragments",
+    "changelog",
+    "test",
+    "tests",
+    "unit_test",
+    "unit_tests",
+    "example",
+    "examples",
+    "scripts",
+    "tools",
+    "util",
+    "utils",
+    "python",
+    "build",
+    "dist",
+    "venv",
+    "env",
+    "requirements",
+    "tasks",
+    "fabfile",
+    "site_scons",
+    "benchmark",
+    "benchmarks",
+    "exercise",
+    "exercises",
+    "htmlcov",
+    "[._]*",
+)
+FLAT_LAYOUT_EXCLUDED_MODULES = (
+    "setup",
+    "conftest",
+    "test",
+    "tests",
+    "example",
+    "examples",
+    "build",
+    "toxfile",
+    "noxfile",
+    "pavement",
+    "dodo",
+    "tasks",
+    "fabfile",
+    "[Ss][Cc]onstruct",
+    "conanfile",
+    "manage",
+    "benchmark",
+    "benchmarks",
+    "exercise",
+    "exercises",
+    "[._]*",
+)
+# packages that setuptools' find never returns
+FIND_EXCLUDED_PACKAGES = ("ez_setup", "*__pycache__")
+
+
+class Discovery:
+    """How setuptools finds the packages of a project
+
+    Either packages and py_modules are listed, or packages are found below
+    the `where` folders.
+    If nothing is configured at all, setuptools discovers them on its own.
+    """
+
+    def __init__(
+        self,
+        packages=None,
+        py_modules=(),
+        find=None,
+        package_dir=None,
+    ):
+        # explicit list of packages
+        self.packages = packages
+        self.py_modules = py_modules
+        # options of find/find_namespace: where, include, exclude, namespaces
+        self.find = find
+        # {"": "src"} to find the packages on the src folder
+        self.package_dir = package_dir or {}
+
+    @property
+    def is_automatic(self):
+        return self.packages is None and self.find is None and not self.py_modules
+
+
+def read_source_metadata(path):
+    """Return the metadata of the package at path read from its sources
+
+    The `[project]` table of pyproject.toml (PEP 621) is used if present,
+    otherwise the setup.cfg of setuptools based projects.
+
+    The result has the same shape as the `dist_info` of `wheel_inspect`,
+    with only the `metadata` name and requires_dist, and the `top_level`
+    keys.
+
+    Return a (file path, metadata) pair, or None if the metadata is not
+    static, i.e. it is dynamic on pyproject.toml, or a setup.py can change it,
+    so that it is read from a built wheel instead.
+    """
+    for file_name, read_metadata in SOURCE_READERS:
+        metadata = read_metadata(path)
+        if metadata is None:
+            continue
+
+        name, dependencies, extras, discovery = metadata
+        top_levels = find_top_levels(path, name, discovery)
+        requires_dist = build_requires_dist(dependencies, extras)
+        if top_levels is None or requires_dist is None:
+            return None
+        dist_info = {
+            "metadata": {"name": name, "requires_dist": requires_dist},
+            "top_level": top_levels,
+        }
+        return path / file_name, dist_info
+    return None
+
+
+def _read_pyproject(path):
+    """Return the name, dependencies, extras and Discovery of pyproject.toml
+
+    Discovery is None if the build backend is not setuptools.
+    """
+    try:
+        pyproject = toml.load(path / "pyproject.toml")
+    except (OSError, toml.TomlDecodeError):
+        return None
+
+    project = _static_project(pyproject)
+    if project is None:
+        return None
+
+    build_system = pyproject.get("build-system", {})
+    backend = build_system.get("build-backend", DEFAULT_BUILD_BACKEND)
+    discovery = None
+    if backend.startswith("setuptools."):
+        if not _is_static_setup_py(path):
+            return None
+        discovery = _setuptools_discovery(pyproject.get("tool", {}).get("setuptools"))
+
+    return (*project, discovery)
+
+
+def _static_project(pyproject):
+    """Return the name, dependencies and extras of the [project] table
+
+    Return None if there is no such table, or they are dynamic.
+    """
+    project = pyproject.get("project")
+    if not isinstance(project, dict) or "name" not in project:
+        return None
+
+    dynamic = [x for x in project.get("dynamic", []) if x in PROJECT_FIELDS]
+    if dynamic:
+        logger.debug("%s are dynamic on pyproject.toml", ", ".join(dynamic))
+        return None
+
+    return (
+        project["name"],
+        project.get("dependencies", []),
+        project.get("optional-dependencies", {}),
+    )
+
+
+def _setuptools_discovery(options):
+    """Build a Discovery from the [tool.setuptools] table"""
+    if not options:
+        return Discovery()
+
+    packages = options.get("packages")
+    find = None
+    if isinstance(packages, dict):
+        find = dict(packages.get("find", {}))
+        # unlike on setup.cfg, namespaces are found by default
+        find.setdefault("namespaces", True)
+        packages = None
+    return Discovery(
+        packages=packages,
+        py_modules=options.get("py-modules", ()),
+        find=find,
+        package_dir=options.get("package-dir"),
+    )
+
+
+def _read_setup_cfg(path):
+    """Return the name, dependencies, extras and Discovery of setup.cfg"""
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        if not parser.read(path / "setup.cfg", encoding="utf-8"):
+            return None
+    except (configparser.Error, UnicodeDecodeError):
+        return None
+
+    name = parser.get("metadata", "name", fallback=None)
+    if not name or not _is_static_setup_py(path):
+        return None
+
+    dependencies = _cfg_list(parser.get("options", "install_requires", fallback=""))
+    extras = {}
+    if parser.has_section("options.extras_require"):
+        for extra, value in parser.items("options.extras_require"):
+            extras[extra] = _cfg_list(value)
+    if dependencies is None or None in extras.values():
+        logger.debug("Dependencies are read from other files on setup.cfg")
+        return None
+
+    packages = parser.get("options", "packages", fallback=None)
+    find = None
+    if packages is not None and packages.strip() in ("find:", "find_namespace:"):
+        find = {
+            "namespaces": packages.strip() == "find_namespace:",
+            "where": _cfg_list(
+                parser.get("options.packages.find", "where", fallback="")
+            )
+            or None,
+            "include": _cfg_list(
+                parser.get("options.packages.find", "include", fallback="")
+            ),
+            "exclude": _cfg_list(
+                parser.get("options.packages.find", "exclude", fallback="")
+            ),
+        }
+        packages = None
+    elif packages is not None:
+        packages = _cfg_list(packages)
+
+    package_dir = {}
+    for line in _cfg_list(parser.get("options", "package_dir", fallback="")) or ():
+        package, _, folder = line.rpartition("=")
+        package_dir[package.strip()] = folder.strip()
+
+    discovery = Discovery(
+        packages=packages,
+        py_modules=_cfg_list(parser.get("options", "py_modules", fallback="")),
+        find=find,
+        package_dir=package_dir,
+    )
+    return name, dependencies, extras, discovery
+
+
+SOURCE_READERS = (
+    ("pyproject.toml", _read_pyproject),
+    ("setup.cfg", _read_setup_cfg),
+)
+SOURCE_METADATA_FILES = tuple(file_name for file_name, _ in SOURCE_READERS)
+# folders holding the metadata of installed distributions
+INSTALLED_METADATA_SUFFIXES = (".dist-info", ".egg-info")
+# files of an sdist, relative to its root folder, that its metadata is read
+# from, besides the requires.txt of setuptools, see read_sdist_metadata
+SDIST_METADATA_FILES = ("PKG-INFO", "pyproject.toml")
+
+
+def _cfg_list(value):
+    """Split a setup.cfg list, one item per line or comma separated
+
+    Return None if the list is read from another file (`file:`).
+    """
+    value = value.strip()
+    if value.startswith(("file:", "attr:")):
+        return None
+
+    separator = "\n" if "\n" in value else ","
+    items = []
+    for item in value.split(separator):
+        item = item.split(" #", 1)[0].strip()
+        if item and not item.startswith("#"):
+            items.append(item)
+    return items
+
+
+def _is_static_setup_py(path):
+    """Check that setup.py, if any, does not change the metadata
+
+    That is, it only imports setuptools and calls setup() without arguments.
+    """
+    try:
+        source = (path / "setup.py").read_bytes()
+    except FileNotFoundError:
+        return True
+    except OSError:
+        return False
+
+    try:
+        tree = ast.parse(source)
+    except (SyntaxError, ValueError):
+        return False
+
+    statements = []
+    for node in tree.body:
+        if isinstance(node, ast.If):
+            # if __name__ == "__main__":
+            statements.extend(node.body + node.orelse)
+        else:
+            statements.append(node)
+
+    for node in statements:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            continue
+        if isinstance(node, ast.Expr) and isinstance(node.value, ast.Constant):
+            # docstring
+            continue
+        if not _is_empty_setup_call(node):
+            logger.debug("setup.py can change the package metadata")
+            return False
+    return True
+
+
+def _is_empty_setup_call(node):
+    if not isinstance(node, ast.Expr) or not isinstance(node.value, ast.Call):
+        return False
+    call = node.value
+    function = call.func
+    if isinstance(function, ast.Attribute):
+        function_name = function.attr
+    elif isinstance(function, ast.Name):
+        function_name = function.id
+    else:
+        return False
+    return function_name == "setup" and not call.args and not call.keywords
+
+
+def build_requires_dist(dependencies, extras):
+    """Turn requirement strings into the requires_dist of wheel_inspect
+
+    Requirements of extras get an `extra == "name"` marker, as they do on
+    the metadata of a wheel.
+    Return None if any requirement can not be parsed.
+    """
+    requires_dist = []
+    groups = [(None, dependencies)] + list(extras.items())
+    for extra, requirements in groups:
+        for requirement in requirements:
+            try:
+                requirement = Requirement(requirement)
+            except InvalidRequirement as error:
+                logger.warning("Invalid requirement %r: %s", requirement, error)
+                return None
+
+            marker = str(requirement.marker) if requirement.marker else None
+            if extra is not None:
+                extra_marker = f'extra == "{extra}"'
+                marker = f"({marker}) and {extra_marker}" if marker else extra_marker
+            requires_dist.append(
+                {
+                    "name": requirement.name,
+                    "url": requirement.url,
+                    "extras": sorted(requirement.extras),
+                    "specifier": str(requirement.specifier),
+                    "marker": marker,
+                }
+            )
+    return requires_dist
+
+
+def find_top_levels(path, name, discovery):
+    """Return the top level packages and modules of the project at path
+
+    That is what setuptools writes on top_level.txt,
+    see Discovery for how they are found.
+    If discovery is None, the project is not built with setuptools and
+    the top level is guessed from its name.
+
+    Return None if they can not be found.
+    """
+    if discovery is None:
+        return guess_top_levels(path, name)
+
+    root = discovery.package_dir.get("", "")
+    if set(discovery.package_dir) - {""}:
+        logger.debug("Packages are spread on several folders")
+        return None
+
+    if discovery.is_automatic:
+        return _discover_top_levels(path, root)
+
+    top_levels = set()
+    for dotted_name in list(discovery.packages or ()) + list(discovery.py_modules):
+        top_levels.add(dotted_name.split(".")[0])
+    if discovery.find is not None:
+        top_levels.update(_find_top_levels(path, root, discovery.find))
+    return sorted(top_levels) or None
+
+
+def guess_top_levels(path, name):
+    """Guess the top level of a project from its name
+
+    i.e. `my-package` is on `my_package`, and `my.package` on `my`.
+    """
+    candidate = guess_top_level_name(name)
+    for folder in (path, path / "src"):
+        if (folder / candidate).is_dir() or (folder / f"{candidate}.py").exists():
+            return [candidate]
+    logger.debug("Could not guess the top level of %s", name)
+    return None
+
+
+def guess_top_level_name(name):
+    normalized = name.lower().replace("-", "_")
+    return normalized.split(".")[0]
+
+
+def _discover_top_levels(path, root):
+    """Mimic setuptools automatic discovery, src and flat layouts"""
+    if not root and (path / "src").is_dir():
+        root = "src"
+    folder = path / root if root else path
+    if root:
+        # src layout, everything is a package or module
+        top_levels = _package_folders(folder, namespaces=True)
+        top_levels += _module_names(folder)
+        return sorted(top_levels) or None
+
+    packages = [
+        x
+        for x in _package_folders(folder, namespaces=False)
+        if not _matches(x, FLAT_LAYOUT_EXCLUDED_FOLDERS)
+    ]
+    modules = [
+        x
+        for x in _module_names(folder)
+        if not _matches(x, FLAT_LAYOUT_EXCLUDED_MODULES)
+    ]
+    top_levels = packages or modules
+    if len(top_levels) != 1:
+        # setuptools refuses to guess, it needs configuration
+        logger.debug("No single top level package or module on a flat layout")
+        return None
+    return top_levels
+
+
+def _find_top_levels(path, root, options):
+    """Top levels of the packages that find/find_namespace returns"""
+    include = options.get("include") or ["*"]
+    exclude = list(options.get("exclude") or ()) + list(FIND_EXCLUDED_PACKAGES)
+    namespaces = options.get("namespaces", False)
+    top_levels = []
+    # where is relative to the project, it defaults to the package_dir root
+    for where in options.get("where") or [root or "."]:
+        folder = path / where
+        for top_level in _package_folders(folder, namespaces):
+            if _has_matching_package(folder, top_level, include, exclude, namespaces):
+                top_levels.append(top_level)
+    return top_levels
+
+
+def _has_matching_package(folder, package, include, exclude, namespaces):
+    """Check if package, or any package below it, is included"""
+    pending = [package]
+    while pending:
+        package = pending.pop()
+        if _matches(package, include) and not _matches(package, exclude):
+            return True
+        package_folder = folder.joinpath(*package.split("."))
+        pending.extend(
+            f"{package}.{x}" for x in _package_folders(package_folder, namespaces)
+        )
+    return False
+
+
+def _package_folders(folder, namespaces):
+    try:
+        entries = list(os.scandir(folder))
+    except OSError:
+        return []
+
+    names = []
+    for entry in entries:
+        if "." in entry.name or not entry.name.isidentifier():
+            continue
+        if not entry.is_dir():
+            continue
+        if namespaces or os.path.exists(os.path.join(entry.path, "__init__.py")):
+            names.append(entry.name)
+    return names
+
+
+def _module_names(folder):
+    try:
+        entries = list(os.scandir(folder))
+    except OSError:
+        return []
+    return [
+        entry.name[:-3]
+        for entry in entries
+        if entry.name.endswith(".py") and entry.name[:-3].isidentifier()
+    ]
+
+
+def _matches(name, patterns):
+    return any(fnmatch.fnmatchcase(name, pattern) for pattern in patterns)
+
+
+def read_project_name(path):
+    """Return the name of the project at path, from pyproject.toml or setup.cfg
+
+    Unlike read_source_metadata, the rest of the metadata does not need to
+    be static.
+    """
+    try:
+        name = toml.load(path / "pyproject.toml").get("project", {}).get("name")
+    except (OSError, toml.TomlDecodeError):
+        name = None
+    if name:
+        return name
+
+    parser = configparser.ConfigParser(interpolation=None)
+    try:
+        parser.read(path / "setup.cfg", encoding="utf-8")
+    except (configparser.Error, UnicodeDecodeError):
+        return None
+    return parser.get("metadata", "name", fallback=None)
+
+
+def find_installed_distribution(path):
+    """Return the importlib.metadata Distribution installed from path
+
+    That is the one whose folder pip records on `direct_url.json` (PEP 610),
+    i.e. for `pip install -e .`, or whose metadata is on path or path/src,
+    i.e. for `setup.py develop`.
+    The one named like the project is looked at first.
+
+    A distribution named like the project, but installed from somewhere
+    else, i.e. from PyPI, is only returned, with a warning, if there is no
+    other: its requirements might not be the ones on the sources.
+
+    Return None if there is none.
+    """
+    real_path = os.path.realpath(path)
+    name = read_project_name(path)
+    named = None
+    if name is not None:
+        try:
+            named = importlib_metadata.distribution(name)
+        except importlib_metadata.PackageNotFoundError:
+            logger.debug("%s is not installed", name)
+        else:
+            if _is_installed_from(named, real_path):
+                return named
+
+    for distribution in importlib_metadata.distributions():
+        if _is_installed_from(distribution, real_path):
+            return distribution
+
+    if named is not None:
+        logger.warning(
+            "%s is installed, but not from %s.\n"
+            "Its requirements might not be the ones on the sources.",
+            name,
+            path,
+        )
+    return named
+
+
+def _is_installed_from(distribution, real_path):
+    if _installed_from(distribution) == real_path:
+        return True
+    # setup.py develop leaves the metadata next to the packages
+    metadata_path = installed_metadata_path(distribution)
+    if metadata_path is None:
+        return False
+    metadata_folder = os.path.dirname(os.path.realpath(metadata_path))
+    return metadata_folder in (real_path, os.path.join(real_path, "src"))
+
+
+def _installed_from(distribution):
+    """Return the local folder distribution was installed from, if any"""
+    try:
+        direct_url = json.loads(distribution.read_text("direct_url.json") or "{}")
+    except ValueError:
+        return None
+
+    url = urlparse(direct_url.get("url", ""))
+    if url.scheme != "file":
+        return None
+    return os.path.realpath(unquote(url.path))
+
+
+def installed_metadata_path(distribution):
+    """Return the .dist-info folder of distribution, None if not on disk"""
+    # the distributions found on sys.path know it, but do not make it public
+    path = getattr(distribution, "_path", None)
+    return None if path is None else Path(path)
+
+
+def installed_top_levels(distribution):
+    """Return the top level packages and modules of an installed distribution
+
+    They are on top_level.txt for distributions built with setuptools,
+    otherwise they are worked out from the files on RECORD.
+    Editable installs, however, only list the files that point to the
+    sources, so the result can be empty.
+    """
+    top_level = distribution.read_text("top_level.txt")
+    if top_level:
+        return [x.strip() for x in top_level.splitlines() if x.strip()]
+
+    top_levels = set()
+    for file_path in distribution.files or ():
+        parts = file_path.parts
+        if parts[0] in ("..", "__pycache__") or parts[0].endswith(
+            (*INSTALLED_METADATA_SUFFIXES, ".data", ".pth")
+        ):
+            continue
+        if len(parts) > 1:
+            top_levels.add(parts[0])
+        elif parts[0].endswith(".py") and not parts[0].startswith("__editable__"):
+            top_levels.add(parts[0][:-3])
+    return sorted(top_levels)
+
+
+def is_sdist_metadata_file(relative_path):
+    """Check if the file of an sdist at relative_path is read for its metadata"""
+    if relative_path in SDIST_METADATA_FILES:
+        return True
+    parts = relative_path.split("/")
+    if parts[0] == "src":
+        parts = parts[1:]
+    return (
+        len(parts) == 2
+        and parts[0].endswith(".egg-info")
+        and parts[1] == "requires.txt"
+    )
+
+
+def read_sdist_metadata(files):
+    """Return the metadata of an sdist from the contents of its metadata files
+
+    files maps the paths, relative to the root folder of the sdist, of the
+    files that is_sdist_metadata_file accepts to their bytes.
+
+    The name is read from PKG-INFO, and so are the requirements, as
+    Requires-Dist.
+    Older sdists do not have them, their requirements are read from the
+    requires.txt of setuptools or, if there is none, from the `[project]`
+    table of pyproject.toml if it is static.
+
+    Return a (file name, metadata) pair like read_source_metadata,
+    or None if there is no metadata at all.
+    """
+    name = None
+    requirements = []
+    if "PKG-INFO" in files:
+        headers = BytesHeaderParser().parsebytes(files["PKG-INFO"])
+        name = headers.get("Name")
+        requirements = headers.get_all("Requires-Dist") or []
+
+    project = None
+    try:
+        project = _static_project(toml.loads(files["pyproject.toml"].decode("utf-8")))
+    except (KeyError, UnicodeDecodeError, toml.TomlDecodeError):
+        pass
+    if name is None and project is not None:
+        name = project[0]
+    if not name:
+        return None
+
+    requires_files = sorted(x for x in files if x.endswith("/requires.txt"))
+    if requirements or ("PKG-INFO" in files and not (requires_files or project)):
+        file_name, dependencies, extras = "PKG-INFO", requirements, {}
+    elif requires_files:
+        file_name = requires_files[0]
+        text = files[file_name].decode("utf-8", errors="replace")
+        dependencies, extras = _parse_requires_txt(text)
+    else:
+        file_name, (_, dependencies, extras) = "pyproject.toml", project
+
+    requires_dist = build_requires_dist(dependencies, extras)
+    if requires_dist is None:
+        return None
+    dist_info = {
+        "metadata": {"name": name, "requires_dist": requires_dist},
+        # the files to scan are not found from the top levels on sdists
+        "top_level": [],
+    }
+    return file_name, dist_info
+
+
+def _parse_requires_txt(text):
+    """Return the dependencies and extras of a setuptools requires.txt
+
+    Sections are either an extra, `[extra]`, a marker for the requirements
+    below it, `[:marker]`, or both, `[extra:marker]`.
+    """
+    dependencies = []
+    extras = {}
+    requirements = dependencies
+    marker = ""
+    for line in text.splitlines():
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        if line.startswith("[") and line.endswith("]"):
+            extra, _, marker = line[1:-1].partition(":")
+            requirements = extras.setdefault(extra, []) if extra else dependencies
+            continue
+        requirements.append(f"{line}; {marker}" if marker else line)
+    return dependencies, extras
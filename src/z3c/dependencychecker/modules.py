@@ -1,11 +1,19 @@
-from xml.etree import ElementTree
+from collections import deque
+from z3c.dependencychecker.bytecode import imports_from_code
+from z3c.dependencychecker.bytecode import load_fresh_code
+from z3c.dependencychecker.discovery import walk_folder
 from z3c.dependencychecker.dotted_name import DottedName
+from z3c.dependencychecker.xmlparsers import DEFAULT_XML_BACKEND
+from z3c.dependencychecker.xmlparsers import XML_PARSERS
 
 import ast
+import codecs
 import fnmatch
+import io
 import logging
 import os
 import re
+import time
 
 
 TEST_REGEX = r"""
@@ -26,14 +34,100 @@ s?     # ensure plurals are handled as well
 
 TEST_IN_PATH_REGEX = re.compile(TEST_REGEX, re.VERBOSE)
 
+# fields of ast nodes that hold statements, or nodes holding statements:
+# except handlers (`handlers`) and match cases (`cases`)
+STATEMENT_FIELDS = ("body", "handlers", "orelse", "finalbody", "cases")
+
+UNICODE_BOMS = (
+    codecs.BOM_UTF32_LE,
+    codecs.BOM_UTF32_BE,
+    codecs.BOM_UTF16_LE,
+    codecs.BOM_UTF16_BE,
+)
+
+# PEP 263 encoding declaration, only valid on the first two lines
+CODING_RE = re.compile(rb"^[ \t\f]*#.*?coding[:=][ \t]*([-\w.]+)", re.MULTILINE)
+XML_ENCODING_RE = re.compile(rb"""\A<\?xml[^>]*encoding=["']([-\w.]+)""")
+# character references and entities can spell anything on XML files
+XML_INDIRECTIONS = (b"&#", b"<!ENTITY")
+
 logger = logging.getLogger(__name__)
 
-FOLDERS_TO_IGNORE = ("node_modules", "__pycache__", "venv")
+
+def walk_statements(tree):
+    """Like ast.walk, but only over statements
+
+    Imports can only be statements, so there is no need to go through
+    expressions, which are most of the nodes of a tree.
+
+    Nodes are yielded in the same (breadth first) order than ast.walk,
+    except handlers and match cases included.
+    """
+    pending = deque([tree])
+    while pending:
+        node = pending.popleft()
+        yield node
+        for field in STATEMENT_FIELDS:
+            children = getattr(node, field, None)
+            if children:
+                pending.extend(children)
+
+
+def is_ascii_compatible(source, encoding_re=CODING_RE):
+    """Check if ASCII text is written with the same bytes on source
+
+    That is what allows looking for keywords and markers on the raw bytes
+    of a file, without decoding it.
+    encoding_re finds the encoding declared on the file, if any.
+    If in doubt, i.e. an unknown encoding is declared, it is not.
+    """
+    if source.startswith(UNICODE_BOMS):
+        return False
+
+    second_line_end = source.find(b"\n", source.find(b"\n") + 1)
+    head = source if second_line_end == -1 else source[:second_line_end]
+    match = encoding_re.search(head)
+    if match is None:
+        return True
+
+    sample = "import >>>"
+    try:
+        return sample.encode(match.group(1).decode("ascii")) == sample.encode()
+    except (LookupError, UnicodeError):
+        return False
+
+
+def is_xml_ascii_compatible(source):
+    """Like is_ascii_compatible, for XML documents
+
+    Besides the encoding, character references and entities can spell
+    markers with other bytes.
+    """
+    if any(indirection in source for indirection in XML_INDIRECTIONS):
+        return False
+    return is_ascii_compatible(source, XML_ENCODING_RE)
+
+
+class ScanTimeout(Exception):
+    """Scanning a file took longer than its time budget"""
 
 
 class BaseModule:
-    def __init__(self, package_path, full_path):
+    # shell-style patterns of the file names this class knows how to scan
+    FILE_PATTERNS = ()
+    # bytes of which at least one needs to be on a file to find anything on it
+    MARKERS = ()
+    # time.monotonic() value after which scanning the file is given up
+    deadline = None
+    # set by scan() when a look at the raw bytes of the file was enough
+    # to know that there is nothing to find on it
+    prefiltered = False
+
+    def __init__(self, package_path, full_path, source=None):
         self.path = full_path
+        # the raw bytes of the file, if they are already known,
+        # i.e. Package reads them once for all the scanners of a file
+        self._source = source
         self._relative_path = self._get_relative_path(package_path, full_path)
         self.testing = self._is_test_module()
 
@@ -46,25 +140,7 @@ class BaseModule:
 
     @classmethod
     def create_from_files(cls, top_dir):
-        raise NotImplementedError
-
-    def scan(self):
-        raise NotImplementedError
-
-    def walk_and_filter_folder(folder):
-        for path, folders, filenames in os.walk(folder):
-            # ignore known folder names
-            folders[:] = [d for d in folders if d not in FOLDERS_TO_IGNORE]
-            # ignore all folders that start with a dot
-            folders[:] = fnmatch.filter(folders, "[!.]*")
-            for filename in filenames:
-                yield path, filename
-
-
-class PythonModule(BaseModule):
-    @classmethod
-    def create_from_files(cls, top_dir):
-        """Find all python files in the package
+        """Find all files in the package that this class knows how to scan
 
         For that it gets the path to where top_level.txt points to,
         which is not always a folder:
@@ -74,28 +150,163 @@ class PythonModule(BaseModule):
         Return this very same class, which would allow to call the scan()
         method to get an iterator over all this file's imports.
         """
-        if top_dir.suffix == ".py":
-            yield cls(top_dir, top_dir)
-            return
+        if not cls.FILE_PATTERNS:
+            raise NotImplementedError
 
-        for path, filename in cls.walk_and_filter_folder(top_dir):
-            if filename.endswith(".py"):
-                yield cls(
-                    top_dir,
-                    os.path.join(path, filename),
-                )
+        return (
+            cls(top_dir, file_path)
+            for file_path in walk_folder(top_dir)
+            if cls.accepts(file_path)
+        )
+
+    @classmethod
+    def accepts(cls, file_path):
+        """Check if file_path is a file this class knows how to scan"""
+        file_name = os.path.basename(file_path)
+        return any(
+            fnmatch.fnmatchcase(file_name, pattern) for pattern in cls.FILE_PATTERNS
+        )
+
+    def scan(self):
+        raise NotImplementedError
+
+    def is_prefiltered(self):
+        """Check if a look at the raw bytes is enough to know there is nothing
+        to find on the file, so that it does not need to be parsed
+
+        Scanners call it before anything else.
+        """
+        if self.MARKERS and not self.prefiltered:
+            source = self.read_source()
+            if not self._has_markers(source) and self._is_ascii_compatible(source):
+                self.prefiltered = True
+        return self.prefiltered
+
+    def _has_markers(self, source):
+        return any(marker in source for marker in self.MARKERS)
+
+    @staticmethod
+    def _is_ascii_compatible(source):
+        """Check if the markers would be written as in ASCII on source"""
+        return is_ascii_compatible(source)
+
+    def read_source(self):
+        """Return the raw bytes of the file"""
+        if self._source is None:
+            with open(self.path, "rb") as source_file:
+                self._source = source_file.read()
+        return self._source
+
+    def check_deadline(self):
+        """Give up scanning the file if its time budget is exhausted
+
+        Scanners call it after the expensive steps, i.e. parsing a file,
+        and within long loops.
+        """
+        if self.deadline is not None and time.monotonic() > self.deadline:
+            raise ScanTimeout(self.path)
+
+
+class ModulePass:
+    """Everything the scanners need from a python module, found in one pass
+
+    The module is parsed once, and its statements gone through once,
+    collecting both the import statements and the docstrings,
+    so that PythonModule and PythonDocstrings do not parse and walk the same
+    module each on their own.
+    """
+
+    NODES_WITH_DOCSTRINGS = (
+        ast.Module,
+        ast.ClassDef,
+        ast.FunctionDef,
+        ast.AsyncFunctionDef,
+    )
+
+    def __init__(self, path, source):
+        self.path = os.fspath(path)
+        self.source = source
+        # bytes, rather than text, so that the parser decodes them according
+        # to the PEP 263 encoding declaration of the file, if any
+        self.tree = ast.parse(source)
+        self.imports = []
+        # (docstring, line number of its first line) pairs
+        self.docstrings = []
+
+        for node in walk_statements(self.tree):
+            if isinstance(node, (ast.Import, ast.ImportFrom)):
+                self.imports.append(node)
+            elif isinstance(node, self.NODES_WITH_DOCSTRINGS):
+                # not cleaned, so that its lines match the ones on the file
+                docstring = ast.get_docstring(node, clean=False)
+                if docstring:
+                    self.docstrings.append((docstring, node.body[0].lineno))
+
+    def is_for(self, path, source):
+        return self.path == os.fspath(path) and self.source == source
+
+
+class PythonModule(BaseModule):
+    FILE_PATTERNS = ("*.py",)
+    MARKERS = (b"import",)
+
+    # the pass over the last module scanned, shared by all python scanners
+    _last_pass = None
+    # read the imports from an up to date __pycache__ file, if there is one,
+    # rather than parsing the module
+    use_bytecode = False
 
     def scan(self):
-        for node in ast.walk(self._get_tree()):
+        if self.is_prefiltered():
+            return
+
+        if self.use_bytecode:
+            imports = self._get_imports_from_bytecode()
+            if imports is not None:
+                for dotted_name, lineno in imports:
+                    yield DottedName(
+                        dotted_name,
+                        file_path=self.path,
+                        is_test=self.testing,
+                        lineno=lineno,
+                    )
+                return
+
+        for node in self._get_pass().imports:
             yield from self._process_ast_node(node)
 
+    def _get_imports_from_bytecode(self):
+        """Return (dotted name, line number) pairs found on the bytecode
+
+        Return None if there is no usable bytecode, so that the module
+        is parsed instead.
+
+        Code that the compiler leaves out, i.e. within `if False:` blocks,
+        can not be seen on the bytecode.
+        """
+        code = load_fresh_code(self.path, self.read_source())
+        if code is None:
+            return None
+        return imports_from_code(code)
+
+    def _get_pass(self):
+        source = self.read_source()
+        module_pass = PythonModule._last_pass
+        if module_pass is None or not module_pass.is_for(self.path, source):
+            module_pass = ModulePass(self.path, source)
+            PythonModule._last_pass = module_pass
+        self.check_deadline()
+        return module_pass
+
     def _get_tree(self):
-        with open(self.path) as module_file:
-            source_text = module_file.read()
-        tree = ast.parse(source_text)
-        return tree
+        return self._get_pass().tree
 
-    def _process_ast_node(self, node):
+    def _process_ast_node(self, node, lineno=None):
+        """Get the dotted names imported by node, if it is an import
+
+        lineno overrides the line number of the node,
+        for code that is not parsed from the file itself, i.e. doctests.
+        """
         if isinstance(node, ast.Import):
             for name in node.names:
                 dotted_name = name.name
@@ -103,6 +314,7 @@ class PythonModule(BaseModule):
                     dotted_name,
                     file_path=self.path,
                     is_test=self.testing,
+                    lineno=lineno or node.lineno,
                 )
 
         elif isinstance(node, ast.ImportFrom):
@@ -117,6 +329,7 @@ class PythonModule(BaseModule):
                     dotted_name,
                     file_path=self.path,
                     is_test=self.testing,
+                    lineno=lineno or node.lineno,
                 )
 
     @staticmethod
@@ -124,13 +337,35 @@ class PythonModule(BaseModule):
         return import_node.level > 0
 
 
-class ZCMLFile(BaseModule):
+class XMLModule(BaseModule):
+    """Base class for the scanners of XML files"""
+
+    # one of XML_PARSERS, set by Package from the xml-backend option
+    xml_backend = DEFAULT_XML_BACKEND
+
+    _is_ascii_compatible = staticmethod(is_xml_ascii_compatible)
+
+    def iter_elements(self, tags, attributes_only=False):
+        """Yield the (tag, attributes, text, line) of the elements named tags
+
+        See xmlparsers.iter_etree_elements for the details.
+        """
+        iter_elements = XML_PARSERS[self.xml_backend]
+        source = self.read_source()
+        for element in iter_elements(source, tags, attributes_only):
+            self.check_deadline()
+            yield element
+
+
+class ZCMLFile(XMLModule):
     """Extract imports from .zcml files
 
     These files are in common use in Zope/Plone based projects to define its
     components and more.
     """
 
+    FILE_PATTERNS = ("*.zcml",)
+
     ELEMENTS = {
         "include": ("package",),
         "adapter": ("for", "factory", "provides"),
@@ -141,36 +376,24 @@ class ZCMLFile(BaseModule):
         "genericsetup:registerProfile": ("provides",),
         "implements": ("interface",),
     }
-
-    @classmethod
-    def create_from_files(cls, top_dir):
-        """Find all ZCML files in the package
-
-        Return this very same class, which would allow to call the scan()
-        method to get an iterator over all this file's imports.
-        """
-        if top_dir.suffix == ".py":
-            return
-
-        for path, filename in cls.walk_and_filter_folder(top_dir):
-            if filename.endswith(".zcml"):
-                yield cls(
-                    top_dir,
-                    os.path.join(path, filename),
-                )
+    # the elements, without their namespace prefix
+    MARKERS = tuple(element.split(":")[-1].encode() for element in ELEMENTS)
 
     def scan(self):
-        tree = ElementTree.parse(self.path).getroot()
-
-        for element in self.ELEMENTS:
-            element_namespaced = self._build_namespaced_element(element)
-            for node in tree.iter(element_namespaced):
-                for attrib in self.ELEMENTS[element]:
-                    yield from self._extract_dotted_name(node, attrib)
+        if self.is_prefiltered():
+            return
 
-    def _extract_dotted_name(self, node, attr):
-        if attr in node.keys():
-            candidate_text = node.get(attr)
+        tags = {
+            self._build_namespaced_element(element): attributes
+            for element, attributes in self.ELEMENTS.items()
+        }
+        for tag, attributes, _, line in self.iter_elements(tags, attributes_only=True):
+            for attrib in tags[tag]:
+                yield from self._extract_dotted_name(attributes, attrib, line)
+
+    def _extract_dotted_name(self, attributes, attr, line):
+        if attr in attributes:
+            candidate_text = attributes[attr]
             for dotted_name in candidate_text.split(" "):
                 if not dotted_name or dotted_name.startswith("."):
                     continue
@@ -182,6 +405,7 @@ class ZCMLFile(BaseModule):
                     dotted_name,
                     file_path=self.path,
                     is_test=self.testing,
+                    lineno=line,
                 )
 
     @staticmethod
@@ -196,85 +420,76 @@ class ZCMLFile(BaseModule):
         return f"{{http://namespaces.zope.org/zope}}{element}"
 
 
-class FTIFile(BaseModule):
+class FTIFile(XMLModule):
     """Extract imports from Factory Type Information files
 
     These are xml files, usually located inside a types folder and used by
     Zope/Plone based projects to define its content types.
     """
 
+    FILE_PATTERNS = ("*.xml",)
     TYPES_FOLDER = f"{os.sep}types"
 
     @classmethod
-    def create_from_files(cls, top_dir):
-        """Find all FTI files, which are xml, in the package
+    def accepts(cls, file_path):
+        """Only xml files inside a types folder are FTI files"""
+        return super().accepts(file_path) and cls.TYPES_FOLDER in os.path.dirname(
+            file_path
+        )
 
-        Return this very same class, which would allow to call the scan()
-        method to get an iterator over all this file's imports.
-        """
-        if top_dir.suffix == ".py":
+    # the only properties holding dotted names, each appears once on a file
+    PROPERTIES = ("klass", "schema")
+    MARKERS = tuple(x.encode() for x in PROPERTIES)
+
+    def scan(self):
+        if self.is_prefiltered():
             return
 
-        for path, filename in cls.walk_and_filter_folder(top_dir):
-            if filename.endswith(".xml") and cls.TYPES_FOLDER in path:
-                yield cls(
-                    top_dir,
-                    os.path.join(path, filename),
+        found = set()
+        for _, attributes, text, line in self.iter_elements(("property",)):
+            name = attributes.get("name")
+            if name in self.PROPERTIES and text:
+                yield DottedName(
+                    text.strip(),
+                    file_path=self.path,
+                    is_test=self.testing,
+                    lineno=line,
                 )
-
-    def scan(self):
-        tree = ElementTree.parse(self.path).getroot()
-
-        for node in tree.iter("property"):
-            if "name" in node.keys():
-                name = node.get("name")
-                if name in ("klass", "schema"):
-                    if node.text:
-                        yield DottedName(
-                            node.text.strip(),
-                            file_path=self.path,
-                            is_test=self.testing,
-                        )
+                found.add(name)
+                if len(found) == len(self.PROPERTIES):
+                    # there is nothing else to look for
+                    return
 
 
-class GSMetadata(BaseModule):
+class GSMetadata(XMLModule):
     """Extract imports from Generic Setup metadata.xml files
 
     These files are in common use in Zope/Plone to define Generic Setup
     profile dependencies between projects.
     """
 
+    FILE_PATTERNS = ("metadata.xml",)
     PROFILE_RE = re.compile(r"profile-(?P<dotted_name>[\w.]+):[\w\W]+")
-
-    @classmethod
-    def create_from_files(cls, top_dir):
-        """Find all metadata.xml files in the package
-
-        Return this very same class, which would allow to call the scan()
-        method to get an iterator over all this file's imports.
-        """
-        if top_dir.suffix == ".py":
-            return
-
-        for path, filename in cls.walk_and_filter_folder(top_dir):
-            if filename == "metadata.xml":
-                yield cls(
-                    top_dir,
-                    os.path.join(path, filename),
-                )
+    MARKERS = (b"profile-",)
 
     def scan(self):
-        tree = ElementTree.parse(self.path).getroot()
+        if self.is_prefiltered():
+            return
 
-        for node in tree.iter("dependency"):
-            if not node.text:
+        for tag, _, text, line in self.iter_elements(("dependency", "dependencies")):
+            if tag == "dependencies":
+                # all dependencies are within a single element
+                return
+            if not text:
                 continue
-            result = self.PROFILE_RE.search(node.text.strip())
+
+            result = self.PROFILE_RE.search(text.strip())
             if result:
                 yield DottedName(
                     result.group("dotted_name"),
                     file_path=self.path,
                     is_test=self.testing,
+                    lineno=line,
                 )
 
 
@@ -286,25 +501,34 @@ class PythonDocstrings(PythonModule):
     either at class or method/function level.
     """
 
-    NODES_WITH_DOCSTRINGS = (
-        ast.Module,
-        ast.ClassDef,
-        ast.FunctionDef,
+    # what could end up being a `>>>` within a docstring: the marker itself,
+    # a string ending with `>` concatenated to another one, a `>` before a
+    # line continuation, or an escape sequence for `>`: any octal one,
+    # as they can be one to three digits long
+    DOCTEST_MARKERS_RE = re.compile(
+        rb""">>>|>["']|>\\\r?\n|\\(?:[xX]3[eE]|[0-7]|u003[eE]|U0000003[eE]|N\{)"""
     )
 
+    MARKERS = (b">>>",)
+
+    def _has_markers(self, source):
+        return self.DOCTEST_MARKERS_RE.search(source) is not None
+
     def scan(self):
-        for node in ast.walk(self._get_tree()):
-            if isinstance(node, self.NODES_WITH_DOCSTRINGS):
-                docstring = ast.get_docstring(node)
-                yield from self._parse_docstring(docstring)
+        if self.is_prefiltered():
+            return
+
+        for docstring, first_line in self._get_pass().docstrings:
+            yield from self._parse_docstring(docstring, first_line)
 
-    def _parse_docstring(self, docstring):
+    def _parse_docstring(self, docstring, first_line=1):
         if not docstring:
             return
 
-        for line in docstring.split("\n"):
+        for number, line in enumerate(docstring.split("\n"), start=first_line):
             code = self._extract_code(line)
             if code:
+                self.check_deadline()
                 try:
                     tree = ast.parse(code)
                 except SyntaxError:
@@ -315,8 +539,8 @@ class PythonDocstrings(PythonModule):
                     )
                     continue
 
-                for node in ast.walk(tree):
-                    for dotted_name in self._process_ast_node(node):
+                for node in walk_statements(tree):
+                    for dotted_name in self._process_ast_node(node, number):
                         dotted_name.is_test = True
                         yield dotted_name
 
@@ -335,27 +559,9 @@ class DocFiles(PythonDocstrings):
     documentation.
     """
 
-    @classmethod
-    def create_from_files(cls, top_dir):
-        """Find all documentation files in the package
-
-        For that it gets the path to where top_level.txt points to,
-        which is not always a folder:
-        - folder example: z3c.dependencychecker itself
-        - file example: flake8-isort or any other single file distribution
-
-        Return this very same class, which would allow to call the scan()
-        method to get an iterator over all this file's imports.
-        """
-        if top_dir.suffix == ".py":
-            return
-
-        for path, filename in cls.walk_and_filter_folder(top_dir):
-            if filename.endswith(".txt") or filename.endswith(".rst"):
-                yield cls(
-                    top_dir,
-                    os.path.join(path, filename),
-                )
+    FILE_PATTERNS = ("*.txt", "*.rst")
+    # no escape sequences on plain text
+    DOCTEST_MARKERS_RE = re.compile(rb">>>")
 
     def scan(self):
         try:
@@ -364,10 +570,15 @@ class DocFiles(PythonDocstrings):
             logger.error("Unicode Problems parsing %s", self.path)
 
     def _scan(self):
-        with open(self.path) as doc_file:
-            for line in doc_file:
+        if self.is_prefiltered():
+            return
+
+        # like open() in text mode does, also for files within an archive
+        with io.TextIOWrapper(io.BytesIO(self.read_source())) as doc_file:
+            for number, line in enumerate(doc_file, start=1):
                 code = self._extract_code(line)
                 if code:
+                    self.check_deadline()
                     try:
                         tree = ast.parse(code)
                     except SyntaxError:
@@ -378,8 +589,8 @@ class DocFiles(PythonDocstrings):
                         )
                         continue
 
-                    for node in ast.walk(tree):
-                        for dotted_name in self._process_ast_node(node):
+                    for node in walk_statements(tree):
+                        for dotted_name in self._process_ast_node(node, number):
                             dotted_name.is_test = True
                             yield dotted_name
 
@@ -390,72 +601,80 @@ class DjangoSettings(PythonModule):
     These files are used to enable Django components.
     """
 
-    @classmethod
-    def create_from_files(cls, top_dir):
-        """Find all settings.py files in the package
+    FILE_PATTERNS = ("*settings.py",)
 
-        For that it gets the path to where top_level.txt points to,
-        which is not always a folder:
-        - folder example: z3c.dependencychecker itself
-        - file example: flake8-isort or any other single file distribution
+    # settings holding lists of apps-like dotted paths
+    APPS_LIKE_LISTS = ("INSTALLED_APPS", "MIDDLEWARE", "AUTHENTICATION_BACKENDS")
+    ASSIGNMENTS = (ast.Assign, ast.AugAssign, ast.AnnAssign)
+    MARKERS = tuple(x.encode() for x in (*APPS_LIKE_LISTS, "TEST_RUNNER"))
 
-        Return this very same class, which would allow to call the scan()
-        method to get an iterator over all this file's imports.
-        """
-        if top_dir.suffix == ".py":
+    def scan(self):
+        if self.is_prefiltered():
             return
 
-        for path, filename in cls.walk_and_filter_folder(top_dir):
-            if fnmatch.fnmatch(filename, "*settings.py"):
-                yield cls(
-                    top_dir,
-                    os.path.join(path, filename),
-                )
+        for node in self._module_level_statements(self._get_tree().body):
+            if not isinstance(node, self.ASSIGNMENTS) or node.value is None:
+                continue
 
-    def scan(self):
-        for node in ast.walk(self._get_tree()):
-            if isinstance(node, ast.Assign):
-                if self._is_apps_assignment(node):
-                    if isinstance(node.value, (ast.Tuple, ast.List)):
-                        for element in node.value.elts:
-                            if isinstance(element, ast.Constant):
-                                yield DottedName(
-                                    element.value,
-                                    file_path=self.path,
-                                    is_test=self.testing,
-                                )
-
-                if self._is_test_runner_assignment(node):
-                    if isinstance(node.value, ast.Constant):
-                        yield DottedName(
-                            node.value.value,  # yes, .value.value
-                            file_path=self.path,
-                            is_test=True,
-                        )
+            target = self._get_target_name(node)
+            if target in self.APPS_LIKE_LISTS:
+                if isinstance(node.value, (ast.Tuple, ast.List)):
+                    for element in node.value.elts:
+                        if isinstance(element, ast.Constant):
+                            yield DottedName(
+                                element.value,
+                                file_path=self.path,
+                                is_test=self.testing,
+                                lineno=element.lineno,
+                            )
+
+            elif target == "TEST_RUNNER":
+                if isinstance(node.value, ast.Constant):
+                    yield DottedName(
+                        node.value.value,  # yes, .value.value
+                        file_path=self.path,
+                        is_test=True,
+                        lineno=node.lineno,
+                    )
 
     @staticmethod
-    def _is_apps_assignment(node):
-        # Assignment to INSTALLED_APPS and other lists of apps-like dotted paths
-        APPS_LIKE_LISTS = ["INSTALLED_APPS", "MIDDLEWARE", "AUTHENTICATION_BACKENDS"]
-        if (
-            len(node.targets) == 1
-            and isinstance(node.targets[0], ast.Name)
-            and node.targets[0].id in APPS_LIKE_LISTS
-        ):
-            return True
+    def _is_ascii_compatible(source):
+        # non-ASCII identifiers are normalized (NFKC),
+        # so they could end up being any of the settings
+        return source.isascii()
 
-        return False
+    @classmethod
+    def _module_level_statements(cls, statements):
+        """Yield the statements, and the ones within if and try blocks
 
-    @staticmethod
-    def _is_test_runner_assignment(node):
-        if (
-            len(node.targets) == 1
-            and isinstance(node.targets[0], ast.Name)
-            and node.targets[0].id == "TEST_RUNNER"
-        ):
-            return True
+        Settings are defined at module level, there is no need to look into
+        functions, classes or expressions.
+        """
+        for node in statements:
+            yield node
+            if isinstance(node, ast.If):
+                yield from cls._module_level_statements(node.body)
+                yield from cls._module_level_statements(node.orelse)
+            elif isinstance(node, (ast.Try, ast.TryStar)):
+                yield from cls._module_level_statements(node.body)
+                for handler in node.handlers:
+                    yield from cls._module_level_statements(handler.body)
+                yield from cls._module_level_statements(node.orelse)
+                yield from cls._module_level_statements(node.finalbody)
 
-        return False
+    @staticmethod
+    def _get_target_name(node):
+        """Name assigned to by node, if it assigns to a single plain name"""
+        if isinstance(node, ast.Assign):
+            if len(node.targets) != 1:
+                return None
+            target = node.targets[0]
+        else:
+            target = node.target
+
+        if isinstance(target, ast.Name):
+            return target.id
+        return None
 
 
 MODULES = (
@@ -1,14 +1,49 @@
 from cached_property import cached_property
 from collections import defaultdict
+from contextlib import ExitStack
 from pathlib import Path
 from wheel_inspect import inspect_wheel
+from wheel_inspect.classes import WheelFile
+from wheel_inspect.inspecting import inspect as inspect_wheel_file
+from z3c.dependencychecker.archives import iter_sdist_files
+from z3c.dependencychecker.archives import iter_wheel_files
+from z3c.dependencychecker.archives import sdist_top_level
+from z3c.dependencychecker.cache import cache_folder
+from z3c.dependencychecker.cache import WheelMetadataCache
 from z3c.dependencychecker.db import ImportsDatabase
+from z3c.dependencychecker.discovery import FileFilter
+from z3c.dependencychecker.discovery import in_excluded_folder
+from z3c.dependencychecker.discovery import list_git_files
+from z3c.dependencychecker.discovery import select_files
+from z3c.dependencychecker.discovery import select_listed_files
+from z3c.dependencychecker.discovery import unique_files
+from z3c.dependencychecker.discovery import unique_top_levels
+from z3c.dependencychecker.discovery import walk_folder
 from z3c.dependencychecker.dotted_name import DottedName
+from z3c.dependencychecker.metadata import build_requires_dist
+from z3c.dependencychecker.metadata import find_installed_distribution
+from z3c.dependencychecker.metadata import guess_top_level_name
+from z3c.dependencychecker.metadata import guess_top_levels
+from z3c.dependencychecker.metadata import installed_metadata_path
+from z3c.dependencychecker.metadata import installed_top_levels
+from z3c.dependencychecker.metadata import is_sdist_metadata_file
+from z3c.dependencychecker.metadata import read_sdist_metadata
+from z3c.dependencychecker.metadata import read_source_metadata
 from z3c.dependencychecker.modules import MODULES
+from z3c.dependencychecker.modules import ScanTimeout
+from z3c.dependencychecker.snapshot import load_snapshot
+from z3c.dependencychecker.stats import ScanStatistics
+from z3c.dependencychecker.xmlparsers import DEFAULT_XML_BACKEND
+from z3c.dependencychecker.xmlparsers import XML_BACKENDS
+from z3c.dependencychecker.xmlparsers import XML_PARSERS
 
 import logging
+import os
 import sys
+import tarfile
+import time
 import toml
+import zlib
 
 
 METADATA_FILES = (
@@ -17,6 +52,31 @@ METADATA_FILES = (
     "pyproject.toml",
 )
 
+# keys of [tool.dependencychecker] that are settings rather than user mappings
+CONFIG_OPTIONS = (
+    "discovery",
+    "exclude",
+    "include",
+    "max-errors",
+    "max-file-size",
+    "max-file-time",
+    "use-bytecode",
+    "xml-backend",
+)
+
+# what scanners raise on files they can not make sense of: syntax errors,
+# XML parse errors (a SyntaxError subclass), undecodable or unreadable files
+SCAN_ERRORS = (SyntaxError, ValueError, OSError)
+
+# per file budgets, files bigger (in bytes) or taking longer (in seconds)
+# to scan are skipped. 0 disables the check.
+DEFAULT_MAX_FILE_SIZE = 5 * 1024 * 1024
+DEFAULT_MAX_FILE_TIME = 10
+
+# how to find the files to scan: ask git and walk the folders if that fails,
+# or always walk the folders
+DISCOVERY_BACKENDS = ("git", "filesystem")
+
 logger = logging.getLogger(__name__)
 
 
@@ -26,8 +86,31 @@ class PackageMetadata:
     def __init__(self, path):
         logger.debug("Reading package metadata for %s...", path)
         self._path = path
-        self._wheel_path = self._find_wheel_path()
-        self.wheel_info = inspect_wheel(self._wheel_path)
+        # where the metadata is read from
+        self.source = None
+        self.wheel_info = self._read_metadata()
+
+    def _read_metadata(self):
+        """Read the metadata from the package sources, if it is static,
+        or from a built wheel otherwise
+
+        The result has the shape of wheel_inspect's output.
+        """
+        source_metadata = read_source_metadata(self._path)
+        if source_metadata is not None:
+            self.source, dist_info = source_metadata
+            logger.debug("Using the metadata on %s", self.source)
+            return {"dist_info": dist_info}
+
+        self.source = self._find_wheel_path()
+        return self._inspect_wheel(inspect_wheel)
+
+    def _inspect_wheel(self, inspect):
+        """Return inspect(wheel path), unless it is on the persistent cache"""
+        folder = cache_folder()
+        if folder is None:
+            return inspect(self.source)
+        return WheelMetadataCache(folder).get(self.source, inspect)
 
     def _find_wheel_path(self):
         dist_folder = self._path / "dist"
@@ -123,8 +206,9 @@ class PackageMetadata:
                 continue
             logger.warning(
                 "Top level %s\n"
-                "not found but referenced by top_level metadata in wheel.",
+                "not found but referenced by top_level metadata in %s.",
                 possible_top_level,
+                self.name if self.source is None else self.source.name,
             )
 
         if top_levels:
@@ -137,6 +221,106 @@ class PackageMetadata:
         sys.exit(1)
 
 
+class InstalledPackageMetadata(PackageMetadata):
+    """Information of the distribution installed from the package sources
+
+    i.e. with `pip install -e .`, so that there is no need to build a wheel.
+    """
+
+    def _read_metadata(self):
+        logger.debug("Looking for the distribution installed from %s...", self._path)
+        self.distribution = find_installed_distribution(self._path)
+        if self.distribution is None:
+            logger.error(
+                "No installed distribution found for %s.\n"
+                "You need to install the package first, e.g. with pip install -e .",
+                self._path,
+            )
+            sys.exit(1)
+
+        self.source = installed_metadata_path(self.distribution)
+        name = self.distribution.metadata["Name"]
+        requires_dist = build_requires_dist(self.distribution.requires or [], {})
+        if requires_dist is None:
+            logger.error("Invalid requirements on %s", self.source or name)
+            sys.exit(1)
+        top_levels = installed_top_levels(self.distribution)
+        if not top_levels:
+            top_levels = guess_top_levels(self._path, name) or []
+        return {
+            "dist_info": {
+                "metadata": {"name": name, "requires_dist": requires_dist},
+                "top_level": top_levels,
+            }
+        }
+
+
+class WheelPackageMetadata(PackageMetadata):
+    """Information of the built wheel of the package
+
+    The wheel is kept open after reading its metadata, so that the files to
+    scan are read from the very same archive, see close().
+    """
+
+    def _read_metadata(self):
+        self.source = self._find_wheel_path()
+        self._exit_stack = ExitStack()
+        self.wheel_file = self._exit_stack.enter_context(WheelFile(self.source))
+        return self._inspect_wheel(lambda _: inspect_wheel_file(self.wheel_file))
+
+    def iter_files(self, file_filter):
+        """Yield (top folder, file path, size, read function) for the files
+        of the wheel
+
+        Paths are made up by joining the path of the wheel with the path of
+        the file within it, so that they read like the file is within a folder.
+        """
+        for relative_path, size, read in iter_wheel_files(
+            self.wheel_file.zipfile, file_filter
+        ):
+            file_path = os.path.join(self.source, *relative_path.split("/"))
+            yield self.source, file_path, size, read
+
+    @cached_property
+    def top_level(self):
+        # the files are scanned on the wheel, rather than on the top levels
+        return []
+
+    def close(self):
+        self._exit_stack.close()
+
+
+class SdistPackageMetadata(PackageMetadata):
+    """Information of an sdist archive, read from the files within it
+
+    files maps the paths, relative to the root folder of the sdist, of the
+    files its metadata is read from to their bytes, see
+    is_sdist_metadata_file.
+    """
+
+    def __init__(self, path, files):
+        self._files = files
+        super().__init__(path)
+
+    def _read_metadata(self):
+        sdist_metadata = read_sdist_metadata(self._files)
+        if sdist_metadata is None:
+            logger.error("No metadata found on %s", self._path)
+            sys.exit(1)
+        file_name, dist_info = sdist_metadata
+        self.source = self._path / file_name
+        return {"dist_info": dist_info}
+
+    @cached_property
+    def metadata_file_path(self):
+        return self.source
+
+    @cached_property
+    def top_level(self):
+        # the files to scan are found on the archive, see sdist_top_level
+        return []
+
+
 class Package:
     """The python package that is being analyzed
 
@@ -144,21 +328,95 @@ class Package:
     with the ImportsDatabase, where the important bits are.
     """
 
-    def __init__(self, path):
+    def __init__(
+        self,
+        path,
+        imports=None,
+        shard=None,
+        store=None,
+        files=None,
+        strict=False,
+        installed=False,
+        scan_wheel=False,
+        sdist=False,
+    ):
         self.path = path
-        self.metadata = PackageMetadata(path)
-        self.imports = ImportsDatabase()
-        self.imports.own_dotted_name = DottedName(self.metadata.name)
+        # read the metadata from the installed distribution
+        self.installed = installed
+        # scan the files of the built wheel rather than the package sources
+        self.scan_wheel = scan_wheel
+        # path is an sdist archive rather than a folder
+        self.sdist = sdist
+        if imports is None:
+            imports = ImportsDatabase()
+            # the name of an sdist is only known once it is scanned
+            if not sdist:
+                imports.own_dotted_name = DottedName(self.metadata.name)
+        self.imports = imports
+        # (index, total) pair, only files within that shard are scanned
+        self.shard = shard
+        # an ImportsStore where to keep the scan results
+        self.store = store
+        # the files to scan, rather than finding them on the top levels
+        self.files = files
+        # give up on the first file that can not be scanned
+        self.strict = strict
+        self.statistics = ScanStatistics(max_errors=self._max_errors())
+
+    @classmethod
+    def from_snapshot(cls, path, *snapshot_paths):
+        """Use the scan results stored on snapshots rather than scanning again
+
+        If more than one snapshot is given, i.e. one per shard,
+        their results are merged together.
+
+        The user mappings and ignored packages are read again,
+        so they can be tweaked without re-scanning the package.
+        """
+        imports = load_snapshot(snapshot_paths[0])
+        for snapshot_path in snapshot_paths[1:]:
+            imports.merge(load_snapshot(snapshot_path))
+
+        package = cls(path, imports=imports)
+        package.set_user_mappings()
+        return package
+
+    @cached_property
+    def metadata(self):
+        if self.installed:
+            return InstalledPackageMetadata(self.path)
+        if self.scan_wheel:
+            return WheelPackageMetadata(self.path)
+        if self.sdist:
+            # it is read while the files are scanned, see _analyze_sdist
+            return SdistPackageMetadata(self.path, self._read_sdist_metadata_files())
+        return PackageMetadata(self.path)
+
+    @property
+    def metadata_source(self):
+        """The file the metadata was read from, None if it is not known
+
+        On results loaded from snapshots, it is the one stored with them.
+        """
+        metadata = self.__dict__.get("metadata")
+        if metadata is None:
+            return self.imports.metadata_source
+        return metadata.source
 
     def inspect(self):
+        if self.sdist:
+            # the metadata and the configuration are read while scanning
+            self.analyze_package()
         self.set_declared_dependencies()
         self.set_declared_extras_dependencies()
         self.set_user_mappings()
-        self.analyze_package()
+        if not self.sdist:
+            self.analyze_package()
 
     def set_declared_dependencies(self):
         """Add this packages' dependencies defined in its configuration to the database"""
         self.imports.add_requirements(self.metadata.get_required_dependencies())
+        self.imports.metadata_source = self.metadata.source
 
     def set_declared_extras_dependencies(self):
         """Add this packages' extras dependencies defined in its configuration
@@ -175,8 +433,9 @@ class Package:
 
         See tests/test_user_mappings.py for examples.
         """
-        config = self._load_user_config()
-        for package, packages_provided in config.items():
+        for package, packages_provided in self.config.items():
+            if package in CONFIG_OPTIONS:
+                continue
             if package == "ignore-packages":
                 if isinstance(packages_provided, list):
                     self.imports.add_ignored_packages(packages_provided)
@@ -189,20 +448,370 @@ class Package:
                 self.imports.add_user_mapping(package, packages_provided)
 
     def analyze_package(self):
-        for top_folder in self.metadata.top_level:
+        scan_results = []
+        if self.sdist:
+            scan_results = self._analyze_sdist()
+        elif self.scan_wheel:
+            try:
+                for top_folder, file_path, size, read in self.metadata.iter_files(
+                    self.file_filter
+                ):
+                    if self._is_in_shard(file_path):
+                        scan_results.extend(
+                            self._scan_file(top_folder, file_path, size, read)
+                        )
+            finally:
+                self.metadata.close()
+        else:
+            for top_folder, file_path, size in self._files_to_scan():
+                if self._is_in_shard(file_path):
+                    scan_results.extend(self._scan_file(top_folder, file_path, size))
+        self.statistics.log_summary()
+
+        if self.store is not None:
+            self.store.update_package(self.metadata.name, self.path, scan_results)
+
+    def _analyze_sdist(self):
+        """Scan the files of the sdist at path while the archive is streamed
+
+        Its metadata and configuration are read from it on the way,
+        the files found before the configuration, and the modules at the root
+        of the sdist, are kept in memory until it is known whether and how
+        to scan them.
+        """
+        metadata_files = {}
+        scan_results = []
+        pending = []
+        configured = False
+        with tarfile.open(self.path, "r|*") as tar_file:
+            for relative_path, size, read in iter_sdist_files(tar_file):
+                if is_sdist_metadata_file(relative_path):
+                    metadata_files[relative_path] = read()
+                    if relative_path == "pyproject.toml":
+                        self._set_sdist_config(metadata_files[relative_path])
+                        configured = True
+                        scan_results.extend(self._scan_pending_sdist_files(pending))
+                    continue
+
+                top_level, single_module = sdist_top_level(relative_path)
+                if top_level is None:
+                    continue
+                if not any(x.accepts(relative_path) for x in MODULES):
+                    continue
+                if single_module or not configured:
+                    pending.append((relative_path, size, read(), single_module))
+                else:
+                    scan_results.extend(
+                        self._scan_sdist_file(relative_path, size, read)
+                    )
+
+        if not configured:
+            self._set_sdist_config(b"")
+        # the metadata is only known once the whole archive has been read
+        self.metadata = SdistPackageMetadata(self.path, metadata_files)
+        scan_results.extend(self._scan_pending_sdist_files(pending, finished=True))
+
+        # imports of the package itself are only told apart once its name is known
+        self.imports.own_dotted_name = DottedName(self.metadata.name)
+        self.imports.add_imports(dotted_name for _, dotted_name in scan_results)
+        if self.store is None:
+            return []
+        return scan_results
+
+    def _set_sdist_config(self, pyproject):
+        """Use the configuration of the pyproject.toml found on the sdist,
+        given as bytes, rather than the one next to it
+        """
+        try:
+            config = toml.loads(pyproject.decode("utf-8"))
+            self.config = config["tool"]["dependencychecker"]
+        except (KeyError, UnicodeDecodeError, toml.TomlDecodeError):
+            self.config = {}
+        self.statistics.max_errors = self._max_errors()
+
+    def _read_sdist_metadata_files(self):
+        """Read only the files of the sdist its metadata is read from"""
+        with tarfile.open(self.path, "r|*") as tar_file:
+            return {
+                relative_path: read()
+                for relative_path, _, read in iter_sdist_files(tar_file)
+                if is_sdist_metadata_file(relative_path)
+            }
+
+    def _scan_pending_sdist_files(self, pending, finished=False):
+        """Scan the files kept in memory by _analyze_sdist that can be scanned
+
+        Modules at the root of the sdist need the whole archive to be read,
+        only the one named after the project is scanned then.
+        """
+        scan_results = []
+        module_name = guess_top_level_name(self.metadata.name) if finished else None
+        remaining = []
+        for relative_path, size, source, single_module in pending:
+            if single_module:
+                if not finished:
+                    remaining.append((relative_path, size, source, single_module))
+                    continue
+                if sdist_top_level(relative_path)[0] != module_name:
+                    continue
+            scan_results.extend(
+                self._scan_sdist_file(relative_path, size, lambda x=source: x)
+            )
+        pending[:] = remaining
+        return scan_results
+
+    def _scan_sdist_file(self, relative_path, size, read):
+        file_filter = self.file_filter
+        if in_excluded_folder(relative_path, 0, file_filter, {}):
+            return []
+        if not file_filter.includes_file(relative_path):
+            return []
+
+        file_path = os.path.join(self.path, *relative_path.split("/"))
+        if not self._is_in_shard(file_path):
+            return []
+        return self._find_imports(self.path, file_path, size, read)
+
+    def _files_to_scan(self):
+        """Yield (top level, file path, size) of all the files to scan
+
+        Only the files that any of the MODULES knows how to scan are
+        yielded, and every file only once, even if it can be reached through
+        more than one path.
+        """
+        return unique_files(
+            (top_folder, file_path)
+            for top_folder, file_path in self._find_files()
+            if any(x.accepts(file_path) for x in MODULES)
+        )
+
+    def _find_files(self):
+        top_levels = unique_top_levels(self.metadata.top_level)
+        if self.files is not None:
+            yield from select_listed_files(
+                self.files, top_levels, self.file_filter, self.path
+            )
+            return
+
+        git_files = None
+        if self._discovery_backend == "git":
+            git_files = list_git_files(self.path)
+
+        for top_folder in top_levels:
             logger.debug("Analyzing package top_level %s...", top_folder)
-            for module_obj in MODULES:
+            if git_files is None:
+                files = walk_folder(top_folder, self.file_filter, self.path)
+            else:
+                files = select_files(git_files, top_folder, self.file_filter, self.path)
+            for file_path in files:
+                yield top_folder, file_path
+
+    @property
+    def _discovery_backend(self):
+        backend = self.config.get("discovery", DISCOVERY_BACKENDS[0])
+        if backend in DISCOVERY_BACKENDS:
+            return backend
+
+        logger.warning(
+            "discovery key in pyproject.toml needs to be one of %s, not %r.",
+            ", ".join(DISCOVERY_BACKENDS),
+            backend,
+        )
+        return DISCOVERY_BACKENDS[0]
+
+    def _scan_file(self, top_folder, file_path, size=None, read=None):
+        """Scan file_path and add the imports found to the database
+
+        Return the (scanner name, DottedName) pairs found,
+        if they need to be kept on a store.
+        """
+        scan_results = self._find_imports(top_folder, file_path, size, read)
+        self.imports.add_imports(dotted_name for _, dotted_name in scan_results)
+        if self.store is None:
+            return []
+        return scan_results
+
+    def _find_imports(self, top_folder, file_path, size=None, read=None):
+        """Scan file_path with all the MODULES that know how to
+
+        Return the (scanner name, DottedName) pairs found.
+
+        Files that are too big, take too long to scan or are too deeply
+        nested to be parsed are skipped altogether.
+
+        For files that are not on disk, i.e. within an archive,
+        size is their size and read a function that returns their contents.
+        Only the files that any of the MODULES scans count as scanned.
+        """
+        modules = [x for x in MODULES if x.accepts(file_path)]
+        if not modules:
+            return []
+
+        max_size = self.max_file_size
+        if max_size:
+            if size is None:
+                size = os.path.getsize(file_path)
+            if size > max_size:
+                self.statistics.skip(
+                    file_path,
+                    "too large",
+                    f"{size} bytes, more than max-file-size ({max_size})",
+                )
+                return []
+
+        deadline = None
+        if self.max_file_time:
+            deadline = time.monotonic() + self.max_file_time
+
+        scan_results = []
+        try:
+            # read once, for all the scanners
+            source = read() if read is not None else self._read_file(file_path)
+            for module_obj in modules:
                 logger.debug(
-                    "Starting analyzing files using %s...",
-                    module_obj,
+                    "Searching dependencies (with %s) in file %s...",
+                    module_obj.__name__,
+                    file_path,
                 )
-                for source_file in module_obj.create_from_files(top_folder):
-                    logger.debug(
-                        "Searching dependencies (with %s) in file %s...",
-                        module_obj.__name__,
-                        source_file.path,
-                    )
-                    self.imports.add_imports(source_file.scan())
+                source_file = module_obj(top_folder, file_path, source)
+                source_file.deadline = deadline
+                # there is no __pycache__ within archives
+                source_file.use_bytecode = self.use_bytecode and read is None
+                source_file.xml_backend = self.xml_backend
+                for dotted_name in source_file.scan():
+                    scan_results.append((module_obj.__name__, dotted_name))
+                    source_file.check_deadline()
+                if source_file.prefiltered:
+                    self.statistics.prefiltered[module_obj.__name__] += 1
+        except ScanTimeout:
+            self.statistics.skip(
+                file_path,
+                "too slow",
+                f"took more than max-file-time ({self.max_file_time} seconds)",
+            )
+            return []
+        except (RecursionError, MemoryError):
+            # what the parser raises on deeply nested expressions
+            self.statistics.skip(file_path, "too deeply nested")
+            return []
+        except SCAN_ERRORS as error:
+            self.statistics.error(file_path, error)
+            return []
+
+        self.statistics.files_scanned += 1
+        return scan_results
+
+    @staticmethod
+    def _read_file(file_path):
+        with open(file_path, "rb") as source_file:
+            return source_file.read()
+
+    @cached_property
+    def use_bytecode(self):
+        value = self.config.get("use-bytecode", False)
+        if isinstance(value, bool):
+            return value
+
+        logger.warning("use-bytecode key in pyproject.toml needs to be true or false.")
+        return False
+
+    @cached_property
+    def xml_backend(self):
+        """Which of XML_PARSERS scans XML files
+
+        `auto` picks the fastest one, see DEFAULT_XML_BACKEND.
+        """
+        backend = self.config.get("xml-backend", "auto")
+        if backend == "auto":
+            return DEFAULT_XML_BACKEND
+        if backend in XML_PARSERS:
+            logger.debug("Parsing XML files with %s", backend)
+            return backend
+
+        if backend in XML_BACKENDS:
+            logger.warning(
+                "xml-backend %r is not available, is it installed? Using %s.",
+                backend,
+                DEFAULT_XML_BACKEND,
+            )
+        else:
+            logger.warning(
+                "xml-backend key in pyproject.toml needs to be auto or one of "
+                "%s, not %r.",
+                ", ".join(XML_BACKENDS),
+                backend,
+            )
+        return DEFAULT_XML_BACKEND
+
+    @cached_property
+    def max_file_size(self):
+        return self._get_budget("max-file-size", DEFAULT_MAX_FILE_SIZE)
+
+    @cached_property
+    def max_file_time(self):
+        return self._get_budget("max-file-time", DEFAULT_MAX_FILE_TIME)
+
+    def _max_errors(self):
+        """How many files can fail to be scanned before giving up
+
+        None means there is no limit.
+        """
+        if self.strict:
+            return 0
+        if "max-errors" not in self.config:
+            return None
+        return self._get_budget("max-errors", 0) or None
+
+    def _get_budget(self, key, default):
+        value = self.config.get(key, default)
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            if value >= 0:
+                return value
+
+        logger.warning(
+            "%s key in pyproject.toml needs to be a positive number, "
+            "or 0 to disable the check.",
+            key,
+        )
+        return default
+
+    @cached_property
+    def file_filter(self):
+        return FileFilter(
+            exclude=self._get_patterns("exclude"),
+            include=self._get_patterns("include"),
+        )
+
+    def _get_patterns(self, key):
+        patterns = self.config.get(key, [])
+        if isinstance(patterns, list) and all(isinstance(x, str) for x in patterns):
+            return patterns
+
+        logger.warning(
+            "%s key in pyproject.toml needs to be a list of strings, "
+            "even for a single pattern.",
+            key,
+        )
+        return []
+
+    def _is_in_shard(self, file_path):
+        """Check if file_path needs to be scanned when scanning only a shard
+
+        Files are assigned to shards based on a checksum of their path
+        relative to the package, so that every machine scanning a shard
+        gets the same files.
+        """
+        if self.shard is None:
+            return True
+
+        index, total = self.shard
+        relative_path = os.path.relpath(file_path, self.path).replace(os.sep, "/")
+        return zlib.crc32(relative_path.encode("utf-8")) % total == index - 1
+
+    @cached_property
+    def config(self):
+        """The [tool.dependencychecker] table of the pyproject.toml file"""
+        return self._load_user_config()
 
     def _load_user_config(self):
         config_file_path = self.path / "pyproject.toml"
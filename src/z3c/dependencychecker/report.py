@@ -1,12 +1,20 @@
+from z3c.dependencychecker.archives import is_sdist
+from z3c.dependencychecker.metadata import INSTALLED_METADATA_SUFFIXES
+from z3c.dependencychecker.metadata import SOURCE_METADATA_FILES
+
 import logging
+import os
 
 
 logger = logging.getLogger(__name__)
 
 
 class Report:
-    def __init__(self, package):
+    def __init__(self, package, explain=False):
         self._database = package.imports
+        self._path = package.path
+        self._metadata_source = package.metadata_source
+        self.explain = explain
         self.exit_status = 0
 
     def print_report(self):
@@ -27,12 +35,14 @@ class Report:
         self._print_metric(
             "Missing requirements",
             self._database.get_missing_imports,
+            is_test=False,
         )
 
     def missing_test_requirements(self):
         self._print_metric(
             "Missing test requirements",
             self._database.get_missing_test_imports,
+            is_test=True,
         )
 
     def unneeded_requirements(self):
@@ -45,6 +55,7 @@ class Report:
         self._print_metric(
             "Requirements that should be test requirements",
             self._database.requirements_that_should_be_test_requirements,
+            is_test=True,
         )
 
     def unneeded_test_requirements(self):
@@ -53,15 +64,45 @@ class Report:
             self._database.get_unneeded_test_requirements,
         )
 
-    @staticmethod
-    def print_notice():
+    def print_notice(self):
+        source = self._metadata_source
+        if source is None:
+            # i.e. a snapshot saved before the requirements were read
+            print("")
+            print("Note: it is not known where the requirements are read from.")
+            print("")
+            return
+        if is_sdist(self._path):
+            print("")
+            print(
+                f"Note: requirements are read from "
+                f"{source.relative_to(self._path)} within {self._path.name}."
+            )
+            print("")
+            return
+        if source.name in SOURCE_METADATA_FILES:
+            print("")
+            print(f"Note: requirements are read from {source.name}.")
+            print("")
+            return
+        if source.suffix in INSTALLED_METADATA_SUFFIXES:
+            print("")
+            print(f"Note: requirements are read from the installed {source.name}.")
+            print("Re-install the package if they changed.")
+            print("")
+            return
+
         print("")
         print("Note: requirements are parsed from a built wheel archive")
         print("found in the dist folder.")
         print("Re-generate it, via `python -m build`.")
         print("")
 
-    def _print_metric(self, title, method):
+    def _print_metric(self, title, method, is_test=None):
+        """Print the dotted names that method returns, under title
+
+        is_test tells which imports explain them, see get_locations.
+        """
         missed = method()
         if len(missed) == 0:
             return
@@ -71,6 +112,31 @@ class Report:
         self._print_header(title)
         for dotted_name in missed:
             print(f"     {dotted_name.name}")
+            if self.explain:
+                self._print_locations(dotted_name, is_test)
+
+    def _print_locations(self, dotted_name, is_test=None):
+        locations, total = self._database.get_locations(dotted_name, is_test)
+        for file_path, lineno in locations:
+            print(f"         {self._display_location(file_path, lineno)}")
+        if total > len(locations):
+            print(f"         ... and {total - len(locations)} more")
+
+    def _display_location(self, file_path, lineno):
+        """path:line, or only the path for the files not scanned line by line"""
+        path = self._display_path(file_path)
+        if lineno is None:
+            return path
+        return f"{path}:{lineno}"
+
+    def _display_path(self, file_path):
+        if file_path is None:
+            return "(unknown)"
+        file_path = str(file_path)
+        package_path = str(self._path)
+        if file_path.startswith(package_path):
+            return os.path.relpath(file_path, package_path)
+        return file_path
 
     @staticmethod
     def _print_header(message):
@@ -0,0 +1,199 @@
+from array import array
+from pathlib import Path
+from z3c.dependencychecker.db import ImportsDatabase
+from z3c.dependencychecker.dotted_name import DottedName
+
+import logging
+import struct
+import sys
+
+
+logger = logging.getLogger(__name__)
+
+MAGIC = b"Z3CDCSNP"
+SNAPSHOT_VERSION = 3
+
+# magic, version, strings blob length
+HEADER = struct.Struct("<8sHI")
+
+# sentinel used for optional values (i.e. a DottedName without file_path)
+NO_STRING = -1
+NO_LINE = -1
+
+IS_TEST_FLAG = 1
+
+
+class SnapshotError(Exception):
+    """The snapshot file can not be read"""
+
+
+class _StringTable:
+    """Deduplicate all strings of a snapshot into a single blob
+
+    Dotted names and file paths repeat a lot, storing them only once keeps
+    snapshots small and makes loading them fast.
+    """
+
+    def __init__(self):
+        self._indexes = {}
+
+    def add(self, value):
+        if value is None:
+            return NO_STRING
+        value = str(value)
+        if value not in self._indexes:
+            self._indexes[value] = len(self._indexes)
+        return self._indexes[value]
+
+    def to_bytes(self):
+        return "\0".join(self._indexes).encode("utf-8")
+
+
+def save_snapshot(database, path):
+    """Write the scan results held by database into path
+
+    Only the data gathered while inspecting a package is stored:
+    its name, its requirements, the file they were read from
+    and the imports found.
+    User mappings and ignored packages are left out on purpose,
+    so that they can be changed and applied again when loading the snapshot.
+
+    The layout is a fixed header, followed by a NUL separated blob of strings
+    and a single array of little-endian 32 bit integers that reference
+    them.
+    """
+    strings = _StringTable()
+    numbers = array("i")
+
+    numbers.append(strings.add(_name_or_none(database.own_dotted_name)))
+    numbers.append(strings.add(database.metadata_source))
+
+    _add_dotted_names(numbers, strings, sorted(database._requirements))
+
+    numbers.append(len(database._extras_requirements))
+    for extra_name, dotted_names in database._extras_requirements.items():
+        numbers.append(strings.add(extra_name))
+        _add_dotted_names(numbers, strings, sorted(dotted_names))
+
+    numbers.append(len(database.imports_used))
+    for dotted_name in database.imports_used:
+        numbers.append(strings.add(dotted_name.name))
+        numbers.append(strings.add(dotted_name.file_path))
+        numbers.append(IS_TEST_FLAG if dotted_name.is_test else 0)
+        numbers.append(NO_LINE if dotted_name.lineno is None else dotted_name.lineno)
+
+    blob = strings.to_bytes()
+    if sys.byteorder == "big":  # pragma: no cover
+        numbers.byteswap()
+
+    with open(path, "wb") as snapshot_file:
+        snapshot_file.write(HEADER.pack(MAGIC, SNAPSHOT_VERSION, len(blob)))
+        snapshot_file.write(blob)
+        numbers.tofile(snapshot_file)
+
+    logger.debug(
+        "Snapshot with %s imports saved on %s",
+        len(database.imports_used),
+        path,
+    )
+
+
+def load_snapshot(path):
+    """Create an ImportsDatabase out of a snapshot written by save_snapshot"""
+    try:
+        with open(path, "rb") as snapshot_file:
+            data = snapshot_file.read()
+    except OSError as error:
+        raise SnapshotError(f"Could not read snapshot {path}: {error}")
+
+    if len(data) < HEADER.size:
+        raise SnapshotError(f"{path} is not a snapshot file")
+
+    magic, version, blob_length = HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise SnapshotError(f"{path} is not a snapshot file")
+    if version != SNAPSHOT_VERSION:
+        raise SnapshotError(
+            f"Snapshot {path} has version {version}, "
+            f"only version {SNAPSHOT_VERSION} is supported. "
+            "Re-create it."
+        )
+
+    start = HEADER.size
+    view = memoryview(data)
+    strings = str(view[start : start + blob_length], "utf-8").split("\0")
+    numbers = array("i")
+    try:
+        numbers.frombytes(view[start + blob_length :])
+    except ValueError:
+        raise SnapshotError(f"Snapshot {path} is truncated")
+    if sys.byteorder == "big":  # pragma: no cover
+        numbers.byteswap()
+
+    try:
+        database = _build_database(strings, iter(numbers))
+    except (IndexError, StopIteration):
+        raise SnapshotError(f"Snapshot {path} is corrupted")
+
+    logger.debug(
+        "Snapshot with %s imports loaded from %s",
+        len(database.imports_used),
+        path,
+    )
+    return database
+
+
+def _build_database(strings, numbers):
+    def string(index):
+        if index == NO_STRING:
+            return None
+        return strings[index]
+
+    def dotted_names():
+        amount = next(numbers)
+        return {DottedName(strings[next(numbers)]) for _ in range(amount)}
+
+    database = ImportsDatabase()
+
+    own_name = string(next(numbers))
+    if own_name is not None:
+        database.own_dotted_name = DottedName(own_name)
+
+    metadata_source = string(next(numbers))
+    if metadata_source is not None:
+        database.metadata_source = Path(metadata_source)
+
+    database.add_requirements(dotted_names())
+
+    for _ in range(next(numbers)):
+        extra_name = strings[next(numbers)]
+        database._extras_requirements[extra_name] = dotted_names()
+
+    imports_used = database.imports_used
+    for _ in range(next(numbers)):
+        name = strings[next(numbers)]
+        file_path = string(next(numbers))
+        flags = next(numbers)
+        lineno = next(numbers)
+        dotted_name = DottedName(
+            name,
+            file_path=file_path,
+            is_test=bool(flags & IS_TEST_FLAG),
+            lineno=None if lineno == NO_LINE else lineno,
+        )
+        imports_used.append(dotted_name)
+        database._add_location(dotted_name)
+
+    return database
+
+
+def _add_dotted_names(numbers, strings, dotted_names):
+    numbers.append(len(dotted_names))
+    for dotted_name in dotted_names:
+        numbers.append(strings.add(dotted_name.name))
+
+
+def _name_or_none(dotted_name):
+    if dotted_name is None:
+        return None
+    return dotted_name.name
@@ -0,0 +1,73 @@
+from collections import Counter
+
+import logging
+
+
+logger = logging.getLogger(__name__)
+
+
+class TooManyErrors(Exception):
+    """More files than allowed could not be scanned"""
+
+
+class ScanStatistics:
+    """Keep count of what happened while scanning a package
+
+    Files that are not scanned are logged right away,
+    and summarized once the scan is over.
+    """
+
+    def __init__(self, max_errors=None):
+        self.files_scanned = 0
+        # reason -> number of files skipped because of it
+        self.skipped = Counter()
+        # (file path, error message) of the files that could not be scanned
+        self.errors = []
+        # the scan is aborted once there are more errors than that
+        self.max_errors = max_errors
+        # scanner name -> number of files it did not need to parse,
+        # as a quick look at their bytes showed there was nothing to find
+        self.prefiltered = Counter()
+
+    def skip(self, file_path, reason, details=None):
+        """Count file_path as not scanned
+
+        reason groups the files on the summary, details are only logged.
+        """
+        logger.warning("Skipping %s: %s", file_path, details or reason)
+        self.skipped[reason] += 1
+
+    def error(self, file_path, error):
+        """Count file_path as not scanned because of error
+
+        Raise TooManyErrors if the error budget is exhausted.
+        """
+        logger.debug("Could not scan %s: %s", file_path, error)
+        self.errors.append((file_path, str(error)))
+        if self.max_errors is not None and len(self.errors) > self.max_errors:
+            raise TooManyErrors(
+                f"Could not scan {file_path}: {error}\n"
+                f"Giving up after {len(self.errors)} files with errors."
+            )
+
+    @property
+    def files_skipped(self):
+        return sum(self.skipped.values())
+
+    def log_summary(self):
+        logger.debug("Scanned %s files", self.files_scanned)
+        for scanner, count in sorted(self.prefiltered.items()):
+            logger.debug("  %s did not need to parse %s of them", scanner, count)
+        if self.errors:
+            logger.warning("%s files could not be scanned:", len(self.errors))
+            for file_path, error in self.errors:
+                logger.warning("  %s: %s", file_path, error)
+
+        if not self.skipped:
+            return
+
+        logger.info(
+            "Scanned %s files, skipped %s:", self.files_scanned, self.files_skipped
+        )
+        for reason, count in sorted(self.skipped.items()):
+            logger.info("  %s: %s", reason, count)
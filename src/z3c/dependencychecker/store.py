@@ -0,0 +1,160 @@
+from contextlib import closing
+
+import logging
+import os
+import sqlite3
+import time
+
+
+logger = logging.getLogger(__name__)
+
+STORE_VERSION = 2
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS packages (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE,
+    path TEXT NOT NULL,
+    scanned_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS imports (
+    package_id INTEGER NOT NULL REFERENCES packages (id) ON DELETE CASCADE,
+    file TEXT NOT NULL,
+    line INTEGER,
+    dotted_name TEXT NOT NULL,
+    safe_name TEXT NOT NULL,
+    is_test INTEGER NOT NULL,
+    scanner TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS imports_by_name ON imports (safe_name, is_test);
+CREATE INDEX IF NOT EXISTS imports_by_package ON imports (package_id, is_test);
+"""
+
+
+class StoreError(Exception):
+    """The store can not be used"""
+
+
+class ImportsStore:
+    """Keep the imports found on many packages in a SQLite database
+
+    Every time a package is analyzed, its previous results are replaced,
+    the other packages are left untouched.
+
+    That allows asking questions about a whole monorepo,
+    i.e. which packages import a given dotted name,
+    without having to scan all of them again.
+    """
+
+    def __init__(self, path):
+        self.path = path
+        try:
+            self._connection = sqlite3.connect(path)
+            self._connection.execute("PRAGMA foreign_keys = ON")
+            self._check_version()
+            self._connection.executescript(SCHEMA)
+        except sqlite3.DatabaseError as error:
+            raise StoreError(f"Can not use {path} as a store: {error}")
+
+    def _check_version(self):
+        (version,) = self._connection.execute("PRAGMA user_version").fetchone()
+        if version == 0:
+            self._connection.execute(f"PRAGMA user_version = {STORE_VERSION}")
+        elif version != STORE_VERSION:
+            raise StoreError(
+                f"Store {self.path} has version {version}, "
+                f"only version {STORE_VERSION} is supported. "
+                "Remove it and scan the packages again."
+            )
+
+    def close(self):
+        self._connection.close()
+
+    def update_package(self, name, path, scan_results):
+        """Replace the imports stored for the package name
+
+        scan_results is an iterable of (scanner name, DottedName) pairs,
+        file paths are stored relative to the package path.
+        """
+        package_path = str(path)
+        with self._connection:
+            self._connection.execute("DELETE FROM packages WHERE name = ?", (name,))
+            cursor = self._connection.execute(
+                "INSERT INTO packages (name, path, scanned_at) VALUES (?, ?, ?)",
+                (name, package_path, time.time()),
+            )
+            package_id = cursor.lastrowid
+            self._connection.executemany(
+                "INSERT INTO imports "
+                "(package_id, file, line, dotted_name, safe_name, is_test, scanner) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    (
+                        package_id,
+                        _relative_path(dotted_name.file_path, package_path),
+                        dotted_name.lineno,
+                        dotted_name.name,
+                        dotted_name.safe_name,
+                        dotted_name.is_test,
+                        scanner,
+                    )
+                    for scanner, dotted_name in scan_results
+                ),
+            )
+        logger.debug("Store %s updated with the imports of %s", self.path, name)
+
+    def packages_importing(self, dotted_name, include_tests=True):
+        """Return the packages that import dotted_name, or anything within it
+
+        Each result is a (package name, file, line, dotted name) tuple.
+        """
+        query = (
+            "SELECT packages.name, imports.file, imports.line, imports.dotted_name "
+            "FROM imports JOIN packages ON packages.id = imports.package_id "
+            f"WHERE ({_NAME_CONDITION})"
+        )
+        parameters = _name_parameters(dotted_name)
+        if not include_tests:
+            query += " AND imports.is_test = 0"
+        query += " ORDER BY packages.name, imports.file, imports.line"
+        with closing(self._connection.execute(query, parameters)) as cursor:
+            return cursor.fetchall()
+
+    def imports_of(self, package_name, include_tests=True):
+        """Return the distinct dotted names imported by package_name"""
+        query = (
+            "SELECT DISTINCT imports.dotted_name "
+            "FROM imports JOIN packages ON packages.id = imports.package_id "
+            "WHERE packages.name = ?"
+        )
+        if not include_tests:
+            query += " AND imports.is_test = 0"
+        query += " ORDER BY imports.dotted_name"
+        with closing(self._connection.execute(query, (package_name,))) as cursor:
+            return [row[0] for row in cursor]
+
+    def packages(self):
+        query = "SELECT name FROM packages ORDER BY name"
+        with closing(self._connection.execute(query)) as cursor:
+            return [row[0] for row in cursor]
+
+
+# the dotted name itself, or anything below it: as "/" sorts right after "."
+# this is a range on the index rather than a (slow) LIKE query
+_NAME_CONDITION = (
+    "imports.safe_name = ? OR (imports.safe_name > ? AND imports.safe_name < ?)"
+)
+
+
+def _name_parameters(dotted_name):
+    safe_name = dotted_name.safe_name
+    return (safe_name, f"{safe_name}.", f"{safe_name}/")
+
+
+def _relative_path(file_path, package_path):
+    if file_path is None:
+        return ""
+    file_path = str(file_path)
+    if file_path.startswith(package_path):
+        return os.path.relpath(file_path, package_path)
+    return file_path
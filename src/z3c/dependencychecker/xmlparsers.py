@@ -0,0 +1,159 @@
+from xml.etree import ElementTree
+from xml.parsers import expat
+
+
+try:
+    from lxml import etree as lxml_etree
+except ImportError:  # pragma: no cover
+    lxml_etree = None
+
+# XML documents are fed to the parsers in chunks this big, so that scanners
+# that stop early do not parse the rest of the document
+XML_CHUNK_SIZE = 64 * 1024
+
+# backends that can be chosen with the xml-backend key of
+# [tool.dependencychecker], besides `auto`
+XML_BACKENDS = ("lxml", "expat", "etree")
+
+
+def iter_etree_elements(source, tags, attributes_only=False):
+    """Yield the (tag, attributes, text, line) of the elements named tags
+
+    Elements are yielded as soon as they are closed, and then cleared,
+    so only the elements still open are kept in memory,
+    and the consumer can stop at any point without the rest of the document
+    being parsed.
+    Names are in ElementTree's `{namespace}name` form.
+
+    With attributes_only, text is always None and expat yields the elements
+    as soon as they are opened, which saves it work.
+    attributes is only valid until the next element is asked for.
+    line is the line of the start tag of the element (lxml gives the line
+    where it ends, if it spans more than one), or None if the backend does
+    not know about lines, as it is the case for this one.
+
+    All backends work the same way: this one uses ElementTree's pull parser,
+    and is the reference for the others.
+    """
+    parser = ElementTree.XMLPullParser(events=("end",))
+    view = memoryview(source)
+    for start in range(0, len(source), XML_CHUNK_SIZE):
+        parser.feed(view[start : start + XML_CHUNK_SIZE])
+        yield from _read_etree_events(parser, tags, attributes_only)
+
+    parser.close()
+    yield from _read_etree_events(parser, tags, attributes_only)
+
+
+def _read_etree_events(parser, tags, attributes_only):
+    for _, element in parser.read_events():
+        if element.tag in tags:
+            text = None if attributes_only else element.text
+            yield element.tag, element.attrib, text, None
+        element.clear()
+
+
+def iter_expat_elements(source, tags, attributes_only=False):
+    """Like iter_etree_elements, with handlers set directly on expat
+
+    No element objects are built at all, and text is only gathered for the
+    elements named tags.
+    Namespaced attributes are not renamed to the `{namespace}name` form,
+    as no scanner looks for them.
+    """
+    # expat names are `namespace}name`, the `{` is added when yielding them
+    wanted = {tag.lstrip("{") for tag in tags}
+    parser = expat.ParserCreate(namespace_separator="}")
+    parser.buffer_text = True
+    found = []
+
+    def start_only(name, attributes):
+        if name in wanted:
+            if "}" in name:
+                name = "{" + name
+            found.append((name, attributes, None, parser.CurrentLineNumber))
+
+    # one entry per open element, [name, attributes, text parts, line] for
+    # the elements yielded and None for the rest
+    open_elements = []
+
+    def start(name, attributes):
+        # only the text before the first child is the text of an element
+        parser.CharacterDataHandler = None
+        if name in wanted:
+            entry = [name, attributes, [], parser.CurrentLineNumber]
+            parser.CharacterDataHandler = entry[2].append
+            open_elements.append(entry)
+        else:
+            open_elements.append(None)
+
+    def end(name):
+        entry = open_elements.pop()
+        if entry is None:
+            return
+        parser.CharacterDataHandler = None
+        if "}" in name:
+            name = "{" + name
+        found.append((name, entry[1], "".join(entry[2]) or None, entry[3]))
+
+    if attributes_only:
+        parser.StartElementHandler = start_only
+    else:
+        parser.StartElementHandler = start
+        parser.EndElementHandler = end
+
+    view = memoryview(source)
+    try:
+        for start_index in range(0, len(source), XML_CHUNK_SIZE):
+            parser.Parse(view[start_index : start_index + XML_CHUNK_SIZE], False)
+            yield from found
+            found.clear()
+        parser.Parse(b"", True)
+    except expat.ExpatError as error:
+        # the elements found before the error are still yielded
+        yield from found
+        raise ElementTree.ParseError(str(error)) from error
+    yield from found
+
+
+def iter_lxml_elements(source, tags, attributes_only=False):
+    """Like iter_etree_elements, with lxml's parser
+
+    lxml only hands over the elements named tags,
+    the rest of them are not even seen from Python.
+    Elements are cleared once handed over, but, unlike with the other
+    backends, the (empty) elements not named tags are kept on the tree:
+    dropping them costs more than they weigh.
+    """
+    parser = lxml_etree.XMLPullParser(events=("end",), tag=tuple(tags))
+
+    try:
+        for start in range(0, len(source), XML_CHUNK_SIZE):
+            parser.feed(source[start : start + XML_CHUNK_SIZE])
+            yield from _read_lxml_events(parser, attributes_only)
+        parser.close()
+    except lxml_etree.XMLSyntaxError:
+        # the elements found before the error are still yielded
+        yield from _read_lxml_events(parser, attributes_only)
+        raise
+    yield from _read_lxml_events(parser, attributes_only)
+
+
+def _read_lxml_events(parser, attributes_only):
+    for _, element in parser.read_events():
+        text = None if attributes_only else element.text
+        yield element.tag, element.attrib, text, element.sourceline
+        element.clear(keep_tail=True)
+
+
+XML_PARSERS = {
+    "expat": iter_expat_elements,
+    "etree": iter_etree_elements,
+}
+if lxml_etree is not None:
+    XML_PARSERS["lxml"] = iter_lxml_elements
+
+# the fastest backend on benchmarks/xml_backends.py: the dicts of attributes
+# it hands over are faster to look into than lxml's, which can only hand over
+# dicts, through a parser target, without line numbers
+DEFAULT_XML_BACKEND = "expat"
@@ -8,6 +8,7 @@ reusability.
 """
 
 from pathlib import Path
+from z3c.dependencychecker.cache import CACHE_DIR_VARIABLE
 from z3c.dependencychecker.dotted_name import DottedName
 from z3c.dependencychecker.package import ImportsDatabase
 from zipfile import ZipFile
@@ -98,3 +99,12 @@ def mock_inspect_wheel(mocker):
     """
     mock_wheel_info = mocker.patch("z3c.dependencychecker.package.inspect_wheel")
     return mock_wheel_info
+
+
+@pytest.fixture(autouse=True)
+def no_cache(monkeypatch):
+    """Do not use, nor fill, the persistent cache of the user running the tests
+
+    See tests/test_cache.py for the tests that enable it.
+    """
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, "")
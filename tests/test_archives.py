@@ -0,0 +1,360 @@
+from .utils import write_source_file_at
+from unittest import mock
+from z3c.dependencychecker.archives import is_sdist
+from z3c.dependencychecker.archives import iter_sdist_files
+from z3c.dependencychecker.archives import iter_wheel_files
+from z3c.dependencychecker.archives import sdist_top_level
+from z3c.dependencychecker.discovery import FileFilter
+from z3c.dependencychecker.main import main
+from z3c.dependencychecker.main import parse_command_line
+from z3c.dependencychecker.package import Package
+from z3c.dependencychecker.package import SdistPackageMetadata
+from zipfile import ZipFile
+
+import base64
+import hashlib
+import io
+import pytest
+import sys
+import tarfile
+
+
+METADATA = """Metadata-Version: 2.1
+Name: {0}
+Version: 3.0
+Requires-Dist: one
+Requires-Dist: pytest ; extra == 'test'
+"""
+
+WHEEL = """Wheel-Version: 1.0
+Generator: hand
+Root-Is-Purelib: true
+Tag: py3-none-any
+"""
+
+
+def _record_hash(content):
+    digest = hashlib.sha256(content).digest()
+    return "sha256=" + base64.urlsafe_b64encode(digest).rstrip(b"=").decode()
+
+
+def _build_wheel(path, package_name, files):
+    """Write a wheel of package_name with files, a path -> source mapping
+
+    It replaces the one on minimal_structure, the only one on dist.
+    """
+    dist_info = f"{package_name}-3.0.dist-info"
+    files = dict(files)
+    files[f"{dist_info}/METADATA"] = METADATA.format(package_name)
+    files[f"{dist_info}/WHEEL"] = WHEEL
+    files[f"{dist_info}/top_level.txt"] = f"{package_name}\n"
+
+    wheel_path = path / "dist" / f"{package_name}-3.0-py3-none-any.whl"
+    record = []
+    with ZipFile(wheel_path, "w") as wheel_archive:
+        for name, source in files.items():
+            content = source.encode("utf-8")
+            wheel_archive.writestr(name, content)
+            record.append(f"{name},{_record_hash(content)},{len(content)}")
+        record.append(f"{dist_info}/RECORD,,")
+        wheel_archive.writestr(f"{dist_info}/RECORD", "\n".join(record) + "\n")
+    return wheel_path
+
+
+def _wheel_files(wheel_path, file_filter=FileFilter()):
+    with ZipFile(wheel_path) as wheel_archive:
+        return [
+            (relative_path, size, read())
+            for relative_path, size, read in iter_wheel_files(
+                wheel_archive, file_filter
+            )
+        ]
+
+
+def test_iter_wheel_files(minimal_structure):
+    path, package_name = minimal_structure
+    wheel_path = _build_wheel(
+        path,
+        package_name,
+        {
+            f"{package_name}/__init__.py": "import one",
+            f"{package_name}-3.0.data/purelib/extra.py": "import two",
+            f"{package_name}-3.0.data/scripts/run": "import three",
+        },
+    )
+
+    assert _wheel_files(wheel_path) == [
+        (f"{package_name}/__init__.py", 10, b"import one"),
+        ("extra.py", 10, b"import two"),
+    ]
+
+
+def test_iter_wheel_files_filter(minimal_structure):
+    path, package_name = minimal_structure
+    wheel_path = _build_wheel(
+        path,
+        package_name,
+        {
+            f"{package_name}/__init__.py": "import one",
+            f"{package_name}/vendor/module.py": "import two",
+            f"{package_name}/__pycache__/module.py": "import three",
+        },
+    )
+
+    file_filter = FileFilter(exclude=["vendor"])
+    assert [x[0] for x in _wheel_files(wheel_path, file_filter)] == [
+        f"{package_name}/__init__.py",
+    ]
+
+
+def test_package_scan_wheel(minimal_structure):
+    path, package_name = minimal_structure
+    write_source_file_at(path / package_name, "__init__.py", "import not_shipped")
+    wheel_path = _build_wheel(
+        path,
+        package_name,
+        {
+            f"{package_name}/__init__.py": "import one",
+            f"{package_name}/configure.zcml": (
+                '<configure xmlns="http://namespaces.zope.org/zope">'
+                '<include package="two"/></configure>'
+            ),
+            f"{package_name}/README.rst": ">>> import three",
+            f"{package_name}/tests/test_code.py": "import pytest",
+            # not scanned, nor counted as such
+            f"{package_name}/logo.png": "",
+        },
+    )
+
+    package = Package(path, scan_wheel=True)
+    package.inspect()
+
+    imports = {x.name: x for x in package.imports.imports_used}
+    assert sorted(imports) == ["one", "pytest", "three", "two"]
+    assert imports["three"].is_test
+    assert imports["pytest"].is_test
+    assert not imports["one"].is_test
+    assert imports["one"].file_path.startswith(str(wheel_path))
+    assert package.metadata.name == package_name
+    assert package.metadata_source == wheel_path
+    assert package.statistics.files_scanned == 4
+    # the archive is closed once scanned
+    assert package.metadata.wheel_file.zipfile is None
+
+
+def test_package_scan_wheel_max_file_size(minimal_structure):
+    path, package_name = minimal_structure
+    write_source_file_at(
+        path, "pyproject.toml", "[tool.dependencychecker]\nmax-file-size = 12\n"
+    )
+    _build_wheel(
+        path,
+        package_name,
+        {
+            f"{package_name}/__init__.py": "import one",
+            f"{package_name}/big.py": "import two, three",
+        },
+    )
+
+    package = Package(path, scan_wheel=True)
+    package.analyze_package()
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+    assert package.statistics.files_skipped == 1
+
+
+def test_scan_wheel_option(capsys, minimal_structure):
+    path, package_name = minimal_structure
+    _build_wheel(path, package_name, {f"{package_name}/__init__.py": "import two"})
+
+    arguments = ["dependencychecker", "--scan-wheel", str(path)]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    out, _ = capsys.readouterr()
+
+    assert "one" in out
+    assert "two" in out
+
+
+@pytest.mark.parametrize("option", ["--installed", "--files-from=-"])
+def test_scan_wheel_option_conflicts(option):
+    arguments = ["dependencychecker", "--scan-wheel", option]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            parse_command_line()
+
+
+PKG_INFO = """Metadata-Version: 2.1
+Name: my-package
+Version: 1.0
+Requires-Dist: one
+Requires-Dist: pytest; extra == "test"
+"""
+
+
+def _build_sdist(folder, files, name="my-package-1.0.tar.gz"):
+    """Write an sdist with files, a path -> source mapping, in that order"""
+    sdist_path = folder / name
+    root = name.split(".tar")[0]
+    with tarfile.open(sdist_path, "w:gz") as sdist_archive:
+        folder_info = tarfile.TarInfo(root)
+        folder_info.type = tarfile.DIRTYPE
+        sdist_archive.addfile(folder_info)
+        for file_name, source in files.items():
+            content = source.encode("utf-8")
+            info = tarfile.TarInfo(f"{root}/{file_name}")
+            info.size = len(content)
+            sdist_archive.addfile(info, io.BytesIO(content))
+    return sdist_path
+
+
+@pytest.mark.parametrize(
+    "file_name,expected",
+    [
+        ("my-package-1.0.tar.gz", True),
+        ("my-package-1.0.TGZ", True),
+        ("my-package-1.0.tar.bz2", True),
+        ("my-package-1.0.zip", False),
+        ("my-package-1.0-py3-none-any.whl", False),
+    ],
+)
+def test_is_sdist(file_name, expected):
+    assert is_sdist(file_name) is expected
+
+
+def test_iter_sdist_files(tmp_path):
+    sdist_path = _build_sdist(tmp_path, {"PKG-INFO": "a", "src/b/c.py": "import d"})
+
+    with tarfile.open(sdist_path, "r|*") as tar_file:
+        files = [
+            (relative_path, size, read())
+            for relative_path, size, read in iter_sdist_files(tar_file)
+        ]
+
+    assert files == [("PKG-INFO", 1, b"a"), ("src/b/c.py", 8, b"import d")]
+
+
+@pytest.mark.parametrize(
+    "relative_path,expected",
+    [
+        ("my_package/__init__.py", ("my_package", False)),
+        ("src/my_package/__init__.py", ("my_package", False)),
+        ("tests/test_code.py", ("tests", False)),
+        ("my_package.py", ("my_package", True)),
+        ("src/my_package.py", ("my_package", True)),
+        ("README.rst", (None, True)),
+        ("docs/conf.py", (None, False)),
+        ("_build/html/conf.py", (None, False)),
+        (".tox/py/lib/x.py", (None, False)),
+        ("src/my_package.egg-info/SOURCES.txt", (None, False)),
+    ],
+)
+def test_sdist_top_level(relative_path, expected):
+    assert sdist_top_level(relative_path) == expected
+
+
+def test_package_sdist(tmp_path):
+    sdist_path = _build_sdist(
+        tmp_path,
+        {
+            "PKG-INFO": PKG_INFO,
+            "README.rst": ">>> import readme",
+            "docs/conf.py": "import sphinx",
+            "_build/conf.py": "import built",
+            # found before the configuration that excludes it
+            "my_package/generated.py": "import excluded",
+            "my_package/__init__.py": "import one",
+            "pyproject.toml": '[tool.dependencychecker]\nexclude = ["generated.py"]\n',
+            "setup.py": "import setuptools",
+            "my_package/configure.zcml": (
+                '<configure xmlns="http://namespaces.zope.org/zope">'
+                '<include package="two"/></configure>'
+            ),
+            "my_package.egg-info/SOURCES.txt": ">>> import sources",
+            "tests/test_code.py": "import pytest",
+        },
+    )
+
+    package = Package(sdist_path, sdist=True)
+    package.inspect()
+
+    imports = {x.name: x for x in package.imports.imports_used}
+    assert sorted(imports) == ["one", "pytest", "two"]
+    assert imports["pytest"].is_test
+    assert imports["one"].file_path.startswith(str(sdist_path))
+    assert package.metadata.name == "my-package"
+    assert package.metadata_source == sdist_path / "PKG-INFO"
+    assert package.imports.own_dotted_name.name == "my-package"
+    assert [x.name for x in package.imports._requirements] == ["one"]
+
+
+def test_package_sdist_single_module(tmp_path):
+    sdist_path = _build_sdist(
+        tmp_path,
+        {
+            "my_package.py": "import one",
+            "setup.py": "import setuptools",
+            "conftest.py": "import pytest",
+            "PKG-INFO": PKG_INFO,
+        },
+    )
+
+    package = Package(sdist_path, sdist=True)
+    package.inspect()
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+
+
+def test_package_sdist_without_metadata(tmp_path):
+    sdist_path = _build_sdist(tmp_path, {"my_package/__init__.py": "import one"})
+
+    package = Package(sdist_path, sdist=True)
+    with pytest.raises(SystemExit):
+        package.inspect()
+
+
+def test_package_sdist_metadata_without_scanning(tmp_path):
+    sdist_path = _build_sdist(
+        tmp_path, {"PKG-INFO": PKG_INFO, "my_package/__init__.py": "import one"}
+    )
+
+    package = Package(sdist_path, sdist=True)
+
+    assert package.metadata.name == "my-package"
+    assert package.metadata.source == sdist_path / "PKG-INFO"
+    assert package.imports.imports_used == []
+
+
+def test_sdist_package_metadata(tmp_path):
+    metadata = SdistPackageMetadata(tmp_path, {"PKG-INFO": PKG_INFO.encode()})
+
+    assert metadata.name == "my-package"
+    assert metadata.source == tmp_path / "PKG-INFO"
+    assert [x.name for x in metadata.get_required_dependencies()] == ["one"]
+
+
+def test_sdist_path(capsys, tmp_path):
+    sdist_path = _build_sdist(
+        tmp_path, {"PKG-INFO": PKG_INFO, "my_package/__init__.py": "import two"}
+    )
+
+    arguments = ["dependencychecker", str(sdist_path)]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    out, _ = capsys.readouterr()
+
+    assert "one" in out
+    assert "two" in out
+    assert "read from PKG-INFO within my-package-1.0.tar.gz" in out
+
+
+def test_sdist_path_with_scan_wheel(tmp_path):
+    sdist_path = _build_sdist(tmp_path, {"PKG-INFO": PKG_INFO})
+
+    arguments = ["dependencychecker", "--scan-wheel", str(sdist_path)]
+    with pytest.raises(SystemExit) as exit_info:
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    assert exit_info.value.code == 1
@@ -0,0 +1,197 @@
+from .utils import dist_info
+from .utils import write_source_file_at
+from importlib.util import cache_from_source
+from pathlib import Path
+from z3c.dependencychecker.bytecode import imports_from_code
+from z3c.dependencychecker.bytecode import load_fresh_code
+from z3c.dependencychecker.modules import ModulePass
+from z3c.dependencychecker.modules import PythonModule
+from z3c.dependencychecker.package import Package
+
+import email
+import json
+import os
+import py_compile
+import pytest
+import shutil
+import z3c.dependencychecker
+
+
+SOURCE = """
+from __future__ import annotations
+import one
+import two.three as four, five
+from six import seven, eight as nine
+from ten.eleven import *
+from . import relative
+from .relative import other
+
+
+class Twelve:
+    from thirteen import fourteen
+
+    def method(self):
+        import fifteen
+
+        async def inner():
+            from sixteen import (
+                seventeen,
+                eighteen,
+            )
+"""
+
+INVALIDATION_MODES = list(py_compile.PycInvalidationMode)
+
+
+def _write_module(folder, source=SOURCE, mode=INVALIDATION_MODES[0]):
+    module_path = write_source_file_at(folder, "module.py", source)
+    py_compile.compile(str(module_path), invalidation_mode=mode, doraise=True)
+    return module_path
+
+
+def _scan(module_path, use_bytecode):
+    python_module = PythonModule(module_path.parent, module_path)
+    python_module.use_bytecode = use_bytecode
+    return sorted((x.name, x.lineno, x.is_test) for x in python_module.scan())
+
+
+@pytest.mark.parametrize("mode", INVALIDATION_MODES)
+def test_load_fresh_code(tmp_path, mode):
+    module_path = _write_module(tmp_path, mode=mode)
+    assert load_fresh_code(module_path, module_path.read_bytes()) is not None
+
+
+def test_no_pyc(tmp_path):
+    module_path = write_source_file_at(tmp_path, "module.py", SOURCE)
+    assert load_fresh_code(module_path, module_path.read_bytes()) is None
+
+
+@pytest.mark.parametrize("mode", INVALIDATION_MODES)
+def test_stale_pyc(tmp_path, mode):
+    module_path = _write_module(tmp_path, mode=mode)
+    source = module_path.read_bytes() + b"import nineteen\n"
+    module_path.write_bytes(source)
+    stat = module_path.stat()
+    os.utime(module_path, (stat.st_atime, stat.st_mtime + 10))
+
+    assert load_fresh_code(module_path, source) is None
+
+
+@pytest.mark.parametrize(
+    "corrupt",
+    [
+        lambda data: b"",
+        lambda data: b"\0\0\0\0" + data[4:],
+        lambda data: data[:4] + b"\x08\0\0\0" + data[8:],
+        lambda data: data[:-10],
+        lambda data: data[:16] + b"\xff" * 20,
+    ],
+)
+def test_corrupt_pyc(tmp_path, corrupt):
+    module_path = _write_module(tmp_path)
+    pyc_path = Path(cache_from_source(str(module_path)))
+    pyc_path.write_bytes(corrupt(pyc_path.read_bytes()))
+
+    assert load_fresh_code(module_path, module_path.read_bytes()) is None
+
+
+def test_not_a_code_object(tmp_path):
+    module_path = _write_module(tmp_path)
+    pyc_path = Path(cache_from_source(str(module_path)))
+    data = pyc_path.read_bytes()
+    pyc_path.write_bytes(data[:16] + b"N")
+
+    assert load_fresh_code(module_path, module_path.read_bytes()) is None
+
+
+def test_imports_from_code():
+    code = compile(SOURCE, "module.py", "exec")
+    assert sorted(imports_from_code(code)) == [
+        ("__future__.annotations", 2),
+        ("fifteen", 15),
+        ("five", 4),
+        ("one", 3),
+        ("six.eight", 5),
+        ("six.seven", 5),
+        ("sixteen.eighteen", 18),
+        ("sixteen.seventeen", 18),
+        ("ten.eleven", 6),
+        ("thirteen.fourteen", 12),
+        ("two.three", 4),
+    ]
+
+
+@pytest.mark.parametrize("mode", INVALIDATION_MODES)
+def test_bytecode_same_as_source(tmp_path, mode, mocker):
+    module_path = _write_module(tmp_path, mode=mode)
+    from_source = _scan(module_path, use_bytecode=False)
+
+    PythonModule._last_pass = None
+    module_pass = mocker.spy(ModulePass, "__init__")
+    from_bytecode = _scan(module_path, use_bytecode=True)
+
+    assert module_pass.call_count == 0
+    assert from_bytecode == from_source
+
+
+def test_bytecode_stale_falls_back(tmp_path, mocker):
+    module_path = _write_module(tmp_path)
+    module_path.write_text(SOURCE + "import nineteen\n")
+    stat = module_path.stat()
+    os.utime(module_path, (stat.st_atime, stat.st_mtime + 10))
+
+    module_pass = mocker.spy(ModulePass, "__init__")
+    names = [x[0] for x in _scan(module_path, use_bytecode=True)]
+
+    assert module_pass.call_count == 1
+    assert "nineteen" in names
+
+
+def test_bytecode_unexpected_instructions_falls_back(tmp_path, mocker):
+    module_path = _write_module(tmp_path)
+    mocker.patch("z3c.dependencychecker.modules.imports_from_code", return_value=None)
+    module_pass = mocker.spy(ModulePass, "__init__")
+
+    assert _scan(module_path, use_bytecode=True) == _scan(
+        module_path, use_bytecode=False
+    )
+    assert module_pass.call_count >= 1
+
+
+@pytest.mark.parametrize(
+    "package",
+    [z3c.dependencychecker, email, json],
+    ids=lambda x: x.__name__,
+)
+def test_bytecode_same_as_source_on_packages(tmp_path, package):
+    folder = tmp_path / package.__name__
+    shutil.copytree(
+        Path(package.__file__).parent,
+        folder,
+        ignore=shutil.ignore_patterns("__pycache__"),
+    )
+    module_paths = sorted(folder.rglob("*.py"))
+    assert module_paths
+
+    for module_path in module_paths:
+        py_compile.compile(str(module_path), doraise=True)
+        assert load_fresh_code(module_path, module_path.read_bytes()) is not None
+        from_source = _scan(module_path, use_bytecode=False)
+        from_bytecode = _scan(module_path, use_bytecode=True)
+        assert from_bytecode == from_source, module_path
+
+
+def test_package_use_bytecode(minimal_structure, mock_inspect_wheel, mocker):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _write_module(path / package_name)
+    write_source_file_at(
+        path, "pyproject.toml", "[tool.dependencychecker]\nuse-bytecode = true\n"
+    )
+    module_pass = mocker.spy(ModulePass, "__init__")
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert module_pass.call_count == 0
+    assert "sixteen.eighteen" in [x.name for x in package.imports.imports_used]
@@ -0,0 +1,163 @@
+from .utils import dist_info
+from z3c.dependencychecker import cache
+from z3c.dependencychecker.cache import CACHE_DIR_VARIABLE
+from z3c.dependencychecker.cache import cache_folder
+from z3c.dependencychecker.cache import WheelMetadataCache
+from z3c.dependencychecker.package import PackageMetadata
+
+import os
+import pytest
+import shutil
+
+
+@pytest.fixture
+def cache_path(monkeypatch, tmp_path):
+    path = tmp_path / "cache"
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, str(path))
+    return path
+
+
+@pytest.fixture
+def wheel(tmp_path):
+    wheel_path = tmp_path / "my_package-1.0-py3-none-any.whl"
+    wheel_path.write_bytes(b"wheel contents")
+    return wheel_path
+
+
+@pytest.fixture
+def inspect(mocker):
+    inspect = mocker.Mock()
+    inspect.return_value = dist_info(name="my-package", requirements=["|one|"])
+    return inspect
+
+
+def _get(cache_path, wheel_path, inspect):
+    return WheelMetadataCache(cache_path).get(wheel_path, inspect)
+
+
+def test_cache_folder(monkeypatch, tmp_path):
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, str(tmp_path))
+    assert cache_folder() == tmp_path
+
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, "")
+    assert cache_folder() is None
+
+    monkeypatch.delenv(CACHE_DIR_VARIABLE)
+    monkeypatch.setenv("XDG_CACHE_HOME", str(tmp_path))
+    assert cache_folder() == tmp_path / "z3c.dependencychecker"
+
+
+def test_unchanged_wheel(cache_path, wheel, inspect, mocker):
+    first = _get(cache_path, wheel, inspect)
+    digest = mocker.spy(cache, "file_digest")
+    second = _get(cache_path, wheel, inspect)
+
+    assert first == second == inspect.return_value
+    assert inspect.call_count == 1
+    # not even the digest is needed
+    assert digest.call_count == 0
+
+
+def test_touched_wheel(cache_path, wheel, inspect, mocker):
+    _get(cache_path, wheel, inspect)
+    os.utime(wheel, ns=(0, 0))
+    digest = mocker.spy(cache, "file_digest")
+    _get(cache_path, wheel, inspect)
+
+    assert inspect.call_count == 1
+    assert digest.call_count == 1
+
+
+def test_copied_wheel(cache_path, wheel, inspect, tmp_path):
+    _get(cache_path, wheel, inspect)
+    copy = tmp_path / "dist" / wheel.name
+    copy.parent.mkdir()
+    shutil.copy(wheel, copy)
+
+    assert _get(cache_path, copy, inspect) == inspect.return_value
+    assert inspect.call_count == 1
+
+
+def test_changed_wheel(cache_path, wheel, inspect):
+    _get(cache_path, wheel, inspect)
+    wheel.write_bytes(b"other wheel contents")
+    inspect.return_value = dist_info(name="my-package", requirements=["|two|"])
+
+    assert _get(cache_path, wheel, inspect) == inspect.return_value
+    assert inspect.call_count == 2
+
+
+def test_only_used_metadata_is_kept(cache_path, wheel, inspect):
+    wheel_info = dist_info(name="my-package")
+    wheel_info["dist_info"]["record"] = ["lots", "of", "files"]
+    wheel_info["derived"] = {"readme_renders": True}
+    inspect.return_value = wheel_info
+
+    _get(cache_path, wheel, inspect)
+
+    assert _get(cache_path, wheel, inspect) == dist_info(name="my-package")
+
+
+def test_wheel_without_metadata_is_not_cached(cache_path, wheel, inspect):
+    inspect.return_value = {"dist_info": {}, "valid": False}
+
+    assert _get(cache_path, wheel, inspect) == inspect.return_value
+    _get(cache_path, wheel, inspect)
+    assert inspect.call_count == 2
+
+
+@pytest.mark.parametrize("content", ["not json", '{"version": 0}', "[]"])
+def test_unreadable_cache(cache_path, wheel, inspect, content):
+    cache_path.mkdir()
+    (cache_path / "wheels.json").write_text(content)
+
+    assert _get(cache_path, wheel, inspect) == inspect.return_value
+    assert _get(cache_path, wheel, inspect) == inspect.return_value
+    assert inspect.call_count == 1
+
+
+def test_unwritable_cache(tmp_path, wheel, inspect):
+    cache_path = tmp_path / "file"
+    cache_path.write_text("not a folder")
+
+    assert _get(cache_path, wheel, inspect) == inspect.return_value
+    assert _get(cache_path, wheel, inspect) == inspect.return_value
+    assert inspect.call_count == 2
+
+
+def test_oldest_are_dropped(cache_path, inspect, tmp_path, mocker):
+    mocker.patch.object(cache, "MAX_CACHED_WHEELS", 2)
+    wheels = []
+    for number in range(3):
+        wheel_path = tmp_path / f"my_package-{number}-py3-none-any.whl"
+        wheel_path.write_bytes(f"wheel {number}".encode())
+        wheels.append(wheel_path)
+
+    for wheel_path in wheels:
+        _get(cache_path, wheel_path, inspect)
+    assert inspect.call_count == 3
+
+    _get(cache_path, wheels[2], inspect)
+    _get(cache_path, wheels[1], inspect)
+    assert inspect.call_count == 3
+    _get(cache_path, wheels[0], inspect)
+    assert inspect.call_count == 4
+
+
+def test_package_metadata(cache_path, minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+
+    assert PackageMetadata(path).name == package_name
+    assert PackageMetadata(path).name == package_name
+    assert mock_inspect_wheel.call_count == 1
+    assert (cache_path / "wheels.json").exists()
+
+
+def test_package_metadata_without_cache(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+
+    PackageMetadata(path)
+    PackageMetadata(path)
+    assert mock_inspect_wheel.call_count == 2
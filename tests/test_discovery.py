@@ -0,0 +1,501 @@
+from .utils import dist_info
+from .utils import write_source_file_at
+from z3c.dependencychecker.discovery import FileFilter
+from z3c.dependencychecker.discovery import list_git_files
+from z3c.dependencychecker.discovery import parse_file_list
+from z3c.dependencychecker.discovery import select_files
+from z3c.dependencychecker.discovery import select_listed_files
+from z3c.dependencychecker.discovery import unique_files
+from z3c.dependencychecker.discovery import unique_top_levels
+from z3c.dependencychecker.discovery import walk_folder
+from z3c.dependencychecker.package import Package
+from z3c.dependencychecker.utils import change_dir
+
+import os
+import pytest
+import shutil
+import subprocess
+
+
+requires_git = pytest.mark.skipif(shutil.which("git") is None, reason="needs git")
+
+
+def _git(path, *arguments):
+    subprocess.run(["git", *arguments], cwd=path, check=True, capture_output=True)
+
+
+def _relative_files(folder, file_filter=None, root=None):
+    if file_filter is None:
+        file_filter = FileFilter()
+    return sorted(
+        os.path.relpath(x, folder).replace(os.sep, "/")
+        for x in walk_folder(folder, file_filter, root)
+    )
+
+
+def test_walk_all_files(tmp_path):
+    write_source_file_at(tmp_path, "a.py")
+    write_source_file_at(tmp_path / "b", "c.zcml")
+    write_source_file_at(tmp_path / "b" / "d", "e.txt")
+    assert _relative_files(tmp_path) == ["a.py", "b/c.zcml", "b/d/e.txt"]
+
+
+@pytest.mark.parametrize("folder", ["node_modules", "__pycache__", "venv", ".tox"])
+def test_walk_ignored_folders(tmp_path, folder):
+    write_source_file_at(tmp_path, "a.py")
+    write_source_file_at(tmp_path / folder, "b.py")
+    assert _relative_files(tmp_path) == ["a.py"]
+
+
+def test_walk_single_file(tmp_path):
+    file_path = write_source_file_at(tmp_path, "a.py")
+    assert list(walk_folder(file_path)) == [file_path]
+
+
+def test_walk_missing_path(tmp_path):
+    assert list(walk_folder(tmp_path / "nope")) == []
+
+
+def test_walk_does_not_follow_folder_symlinks(tmp_path):
+    write_source_file_at(tmp_path / "real", "a.py")
+    os.symlink(tmp_path / "real", tmp_path / "link")
+    assert _relative_files(tmp_path) == ["real/a.py"]
+
+
+def test_exclude_folder_by_name(tmp_path):
+    write_source_file_at(tmp_path / "src", "a.py")
+    write_source_file_at(tmp_path / "src" / "build", "b.py")
+    write_source_file_at(tmp_path / "build", "c.py")
+    file_filter = FileFilter(exclude=["build"])
+    assert _relative_files(tmp_path, file_filter) == ["src/a.py"]
+
+
+def test_exclude_folder_by_path(tmp_path):
+    write_source_file_at(tmp_path / "src", "a.py")
+    write_source_file_at(tmp_path / "src" / "build", "b.py")
+    write_source_file_at(tmp_path / "build", "c.py")
+    file_filter = FileFilter(exclude=["build/"])
+    assert _relative_files(tmp_path, file_filter) == ["src/a.py"]
+
+    file_filter = FileFilter(exclude=["src/build"])
+    assert _relative_files(tmp_path, file_filter) == ["build/c.py", "src/a.py"]
+
+
+def test_exclude_files(tmp_path):
+    write_source_file_at(tmp_path, "a.py")
+    write_source_file_at(tmp_path / "b", "bundle.min.js")
+    file_filter = FileFilter(exclude=["*.min.js"])
+    assert _relative_files(tmp_path, file_filter) == ["a.py"]
+
+
+def test_excluded_folders_are_pruned(tmp_path, mocker):
+    write_source_file_at(tmp_path / "parts" / "a" / "b", "c.py")
+    write_source_file_at(tmp_path / "src", "d.py")
+    scandir = mocker.spy(os, "scandir")
+    file_filter = FileFilter(exclude=["parts"])
+
+    assert _relative_files(tmp_path, file_filter) == ["src/d.py"]
+    scanned = sorted(os.path.relpath(x.args[0], tmp_path) for x in scandir.mock_calls)
+    assert scanned == [".", "src"]
+
+
+def test_include(tmp_path):
+    write_source_file_at(tmp_path, "a.py")
+    write_source_file_at(tmp_path / "b", "c.txt")
+    write_source_file_at(tmp_path / "b", "d.py")
+    file_filter = FileFilter(include=["*.py"])
+    assert _relative_files(tmp_path, file_filter) == ["a.py", "b/d.py"]
+
+
+def test_exclude_wins_over_include(tmp_path):
+    write_source_file_at(tmp_path, "a.py")
+    write_source_file_at(tmp_path, "b.py")
+    file_filter = FileFilter(exclude=["b.py"], include=["*.py"])
+    assert _relative_files(tmp_path, file_filter) == ["a.py"]
+
+
+def test_patterns_relative_to_root(tmp_path):
+    write_source_file_at(tmp_path / "src" / "pkg", "a.py")
+    write_source_file_at(tmp_path / "src" / "pkg" / "vendor", "b.py")
+    file_filter = FileFilter(exclude=["src/pkg/vendor"])
+    files = _relative_files(tmp_path / "src" / "pkg", file_filter, root=tmp_path)
+    assert files == ["a.py"]
+
+
+def test_package_uses_exclude(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "__init__.py", "import one")
+    write_source_file_at(path / package_name / "vendored", "x.py", "import two")
+    write_source_file_at(
+        path,
+        "pyproject.toml",
+        '[tool.dependencychecker]\nexclude = ["vendored"]\n',
+    )
+
+    package = Package(path)
+    package.set_user_mappings()
+    package.analyze_package()
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+    assert package.imports.user_mappings == {}
+
+
+def test_package_invalid_exclude(minimal_structure, mock_inspect_wheel, caplog):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "__init__.py", "import one")
+    write_source_file_at(
+        path,
+        "pyproject.toml",
+        '[tool.dependencychecker]\nexclude = "vendored"\n',
+    )
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+    assert "exclude key in pyproject.toml needs to be a list" in caplog.text
+
+
+@requires_git
+def test_git_files(tmp_path):
+    _git(tmp_path, "init")
+    write_source_file_at(tmp_path, ".gitignore", "build/\n*.log\n")
+    write_source_file_at(tmp_path / "src", "tracked.py")
+    write_source_file_at(tmp_path / "src", "deleted.py")
+    write_source_file_at(tmp_path / "src", "untracked.py")
+    write_source_file_at(tmp_path / "src", "ignored.log")
+    write_source_file_at(tmp_path / "build" / "lib", "tracked.py")
+    _git(tmp_path, "add", ".gitignore", "src/tracked.py", "src/deleted.py")
+    (tmp_path / "src" / "deleted.py").unlink()
+
+    assert sorted(list_git_files(tmp_path)) == [
+        ".gitignore",
+        "src/tracked.py",
+        "src/untracked.py",
+    ]
+
+
+@requires_git
+def test_git_files_within_a_sub_folder(tmp_path):
+    _git(tmp_path, "init")
+    write_source_file_at(tmp_path / "one" / "src", "a.py")
+    write_source_file_at(tmp_path / "two", "b.py")
+    assert list_git_files(tmp_path / "one") == ["src/a.py"]
+
+
+def test_git_files_not_a_checkout(tmp_path):
+    assert list_git_files(tmp_path) is None
+
+
+def test_git_files_no_git(tmp_path, mocker):
+    mocker.patch("subprocess.run", side_effect=FileNotFoundError)
+    assert list_git_files(tmp_path) is None
+
+
+def test_select_files(tmp_path):
+    relative_paths = [
+        "setup.py",
+        "src/pkg/__init__.py",
+        "src/pkg/vendor/x.py",
+        "src/pkg/.hidden/y.py",
+        "src/pkg2/z.py",
+        "src/pkg.py",
+    ]
+    file_filter = FileFilter(exclude=["vendor"])
+    files = select_files(
+        relative_paths, tmp_path / "src" / "pkg", file_filter, tmp_path
+    )
+    assert list(files) == [str(tmp_path / "src" / "pkg" / "__init__.py")]
+
+
+def test_select_files_single_module(tmp_path):
+    relative_paths = ["setup.py", "module.py", "module.pyi"]
+    files = select_files(relative_paths, tmp_path / "module.py", root=tmp_path)
+    assert list(files) == [tmp_path / "module.py"]
+
+
+def test_select_files_folder_listed_as_a_single_entry(tmp_path):
+    # as git lists symbolic links to folders and submodules
+    write_source_file_at(tmp_path / "real" / "pkg", "a.py")
+    write_source_file_at(tmp_path / "real" / "pkg" / "vendor", "b.py")
+    (tmp_path / "pkg").symlink_to(tmp_path / "real" / "pkg")
+    relative_paths = ["setup.py", "pkg"]
+    file_filter = FileFilter(exclude=["vendor"])
+    files = select_files(relative_paths, tmp_path / "pkg", file_filter, tmp_path)
+    assert list(files) == [str(tmp_path / "pkg" / "a.py")]
+
+
+def test_select_files_excluded_top_level(tmp_path):
+    relative_paths = ["pkg/a.py", "tests/test_a.py"]
+    file_filter = FileFilter(exclude=["tests"])
+    files = select_files(relative_paths, tmp_path / "tests", file_filter, tmp_path)
+    assert list(files) == []
+
+
+def test_select_files_only_checks_folders_below_top_level(tmp_path):
+    relative_paths = ["build/pkg/a.py"]
+    file_filter = FileFilter(exclude=["build"])
+    files = select_files(
+        relative_paths, tmp_path / "build" / "pkg", file_filter, tmp_path
+    )
+    assert list(files) == [str(tmp_path / "build" / "pkg" / "a.py")]
+
+
+@requires_git
+def test_package_uses_git(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _git(path, "init")
+    write_source_file_at(path, ".gitignore", "generated.py\n")
+    write_source_file_at(path / package_name, "__init__.py", "import one")
+    write_source_file_at(path / package_name, "generated.py", "import two")
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+
+
+@requires_git
+def test_package_uses_git_symlinked_top_level(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _git(path, "init")
+    real_folder = path.parent / f"{path.name}-real" / package_name
+    shutil.move(path / package_name, real_folder)
+    (path / package_name).symlink_to(real_folder)
+    write_source_file_at(real_folder, "__init__.py", "import symlinked_dep")
+
+    package = Package(path)
+    package.analyze_package()
+    shutil.rmtree(real_folder.parent)
+
+    assert [x.name for x in package.imports.imports_used] == ["symlinked_dep"]
+
+
+@requires_git
+def test_package_ignored_by_enclosing_checkout(
+    minimal_structure, mock_inspect_wheel, caplog
+):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    parent = path.parent / f"{path.name}-parent"
+    parent.mkdir()
+    _git(parent, "init")
+    write_source_file_at(parent, ".gitignore", "pkg/\n")
+    package_path = parent / "pkg"
+    shutil.move(path, package_path)
+    path.mkdir()  # for the fixture to remove it
+    write_source_file_at(package_path / package_name, "__init__.py", "import one")
+
+    package = Package(package_path)
+    package.analyze_package()
+    shutil.rmtree(parent)
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+    assert "git lists no files within" in caplog.text
+
+
+@requires_git
+def test_package_filesystem_discovery(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _git(path, "init")
+    write_source_file_at(path, ".gitignore", "generated.py\n")
+    write_source_file_at(path / package_name, "__init__.py", "import one")
+    write_source_file_at(path / package_name, "generated.py", "import two")
+    write_source_file_at(
+        path, "pyproject.toml", '[tool.dependencychecker]\ndiscovery = "filesystem"\n'
+    )
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert sorted(x.name for x in package.imports.imports_used) == ["one", "two"]
+
+
+def test_package_invalid_discovery(minimal_structure, mock_inspect_wheel, caplog):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "__init__.py", "import one")
+    write_source_file_at(
+        path, "pyproject.toml", '[tool.dependencychecker]\ndiscovery = "magic"\n'
+    )
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+    assert "discovery key in pyproject.toml needs to be one of" in caplog.text
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"a.py\nb/c.py\n",
+        b"a.py\r\nb/c.py\r\n",
+        b"a.py\0b/c.py\0",
+        b"\na.py\n\nb/c.py",
+    ],
+)
+def test_parse_file_list(data):
+    assert parse_file_list(data) == ["a.py", "b/c.py"]
+
+
+def test_parse_file_list_nul_keeps_newlines():
+    assert parse_file_list(b"a\nb.py\0c.py") == ["a\nb.py", "c.py"]
+
+
+def test_select_listed_files(tmp_path):
+    top_levels = [tmp_path / "src" / "pkg", tmp_path / "tests"]
+    file_paths = [
+        str(tmp_path / "src" / "pkg" / "a.py"),
+        str(tmp_path / "tests" / "test_a.py"),
+        str(tmp_path / "setup.py"),
+    ]
+    assert list(select_listed_files(file_paths, top_levels, root=tmp_path)) == [
+        (top_levels[0], file_paths[0]),
+        (top_levels[1], file_paths[1]),
+        (str(tmp_path), file_paths[2]),
+    ]
+
+
+def test_select_listed_files_relative(tmp_path):
+    with change_dir(tmp_path):
+        files = list(select_listed_files(["pkg/a.py"], [tmp_path / "pkg"], root="."))
+    assert files == [(tmp_path / "pkg", str(tmp_path / "pkg" / "a.py"))]
+
+
+def test_select_listed_files_filters(tmp_path, caplog):
+    file_paths = [
+        str(tmp_path / "pkg" / "a.py"),
+        str(tmp_path / "pkg" / "vendor" / "b.py"),
+        str(tmp_path / "pkg" / ".hidden" / "c.py"),
+        str(tmp_path.parent / "outside.py"),
+    ]
+    file_filter = FileFilter(exclude=["vendor"])
+    files = select_listed_files(file_paths, [], file_filter, tmp_path)
+    assert list(files) == [(str(tmp_path), file_paths[0])]
+    assert "outside.py is not within" in caplog.text
+
+
+def test_package_listed_files(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "__init__.py", "import one")
+    write_source_file_at(path / package_name, "other.py", "import two")
+    write_source_file_at(path / package_name / "tests", "test_it.py", "import three")
+    files = [
+        path / package_name / "__init__.py",
+        path / package_name / "tests" / "test_it.py",
+    ]
+
+    package = Package(path, files=files)
+    package.analyze_package()
+
+    imports = [(x.name, x.is_test) for x in package.imports.imports_used]
+    assert imports == [("one", False), ("three", True)]
+
+
+@requires_git
+@pytest.mark.parametrize("discovery", ["git", "filesystem", "files-from"])
+def test_package_excluded_top_level(minimal_structure, mock_inspect_wheel, discovery):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _git(path, "init")
+    write_source_file_at(path / package_name, "__init__.py", "import one")
+    write_source_file_at(path / "tests", "test_it.py", "import two")
+    configuration = '[tool.dependencychecker]\nexclude = ["tests"]\n'
+    if discovery != "files-from":
+        configuration += f'discovery = "{discovery}"\n'
+    write_source_file_at(path, "pyproject.toml", configuration)
+
+    files = None
+    if discovery == "files-from":
+        files = [path / package_name / "__init__.py", path / "tests" / "test_it.py"]
+    package = Package(path, files=files)
+    package.analyze_package()
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+
+
+def test_select_listed_files_only_checks_folders_below_top_level(tmp_path):
+    file_paths = [str(tmp_path / "build" / "pkg" / "a.py")]
+    file_filter = FileFilter(exclude=["build"])
+    files = select_listed_files(
+        file_paths, [tmp_path / "build" / "pkg"], file_filter, tmp_path
+    )
+    assert list(files) == [(tmp_path / "build" / "pkg", file_paths[0])]
+
+
+def test_unique_top_levels(tmp_path):
+    (tmp_path / "one" / "sub").mkdir(parents=True)
+    (tmp_path / "two").mkdir()
+    os.symlink(tmp_path / "two", tmp_path / "link")
+    top_levels = [
+        tmp_path / "one" / "sub",
+        tmp_path / "one",
+        tmp_path / "two",
+        tmp_path / "link",
+        tmp_path / "one",
+    ]
+    assert unique_top_levels(top_levels) == [tmp_path / "one", tmp_path / "two"]
+
+
+def test_unique_top_levels_symlink_loop(tmp_path, caplog):
+    (tmp_path / "one").mkdir()
+    os.symlink(tmp_path / "loop_b", tmp_path / "loop_a")
+    os.symlink(tmp_path / "loop_a", tmp_path / "loop_b")
+    top_levels = [tmp_path / "one", tmp_path / "loop_a"]
+    assert unique_top_levels(top_levels) == [tmp_path / "one"]
+    assert "Symbolic link loop" in caplog.text
+
+
+def test_unique_files(tmp_path, caplog):
+    file_path = write_source_file_at(tmp_path, "a.py")
+    os.symlink(file_path, tmp_path / "b.py")
+    os.link(file_path, tmp_path / "c.py")
+    write_source_file_at(tmp_path, "d.py")
+    os.symlink(tmp_path / "missing.py", tmp_path / "e.py")
+    files = [(tmp_path, tmp_path / x) for x in ("a.py", "b.py", "c.py", "d.py", "e.py")]
+
+    assert list(unique_files(files)) == [(*files[0], 25), (*files[3], 25)]
+    assert "Could not read" in caplog.text
+
+
+def test_package_scans_files_once(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(
+        name=package_name, top_levels=[package_name, "tests"]
+    )
+    write_source_file_at(path / package_name, "__init__.py", "import one")
+    write_source_file_at(path / "tests", "test_it.py", "import two")
+    os.symlink(path / package_name / "__init__.py", path / package_name / "alias.py")
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert sorted(x.name for x in package.imports.imports_used) == ["one", "two"]
+
+
+def test_package_only_looks_at_files_to_scan(
+    minimal_structure, mock_inspect_wheel, mocker
+):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "__init__.py", "import one")
+    for number in range(20):
+        write_source_file_at(path / package_name, f"{number}.png", "")
+    getsize = mocker.spy(os.path, "getsize")
+    stat = mocker.spy(os, "stat")
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+    stat_paths = [os.fspath(x.args[0]) for x in stat.call_args_list]
+    assert not [x for x in stat_paths if x.endswith(".png")]
+    assert stat_paths.count(str(path / package_name / "__init__.py")) == 1
+    assert getsize.call_count == 0
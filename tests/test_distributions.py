@@ -0,0 +1,277 @@
+from .utils import dist_info
+from .utils import write_source_file_at
+from pathlib import PurePosixPath
+from unittest import mock
+from z3c.dependencychecker import distributions
+from z3c.dependencychecker.cache import CACHE_DIR_VARIABLE
+from z3c.dependencychecker.db import ImportsDatabase
+from z3c.dependencychecker.distributions import _names_from_files
+from z3c.dependencychecker.distributions import canonical_name
+from z3c.dependencychecker.distributions import DistributionsIndex
+from z3c.dependencychecker.distributions import load_distributions_index
+from z3c.dependencychecker.dotted_name import DottedName
+from z3c.dependencychecker.main import main
+
+import os
+import pytest
+import sys
+
+
+def _install(site_packages, name, files=(), top_level=None):
+    dist_info_path = site_packages / f"{canonical_name(name)}-1.0.dist-info"
+    write_source_file_at(
+        dist_info_path,
+        "METADATA",
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n",
+    )
+    if files:
+        records = [f"{x},," for x in files] + [f"{dist_info_path.name}/RECORD,,"]
+        write_source_file_at(dist_info_path, "RECORD", "\n".join(records) + "\n")
+    if top_level is not None:
+        write_source_file_at(dist_info_path, "top_level.txt", top_level)
+    # a fresh mtime, even on file systems with coarse timestamps
+    os.utime(site_packages, ns=(0, os.stat(site_packages).st_mtime_ns + 1))
+    return dist_info_path
+
+
+@pytest.fixture
+def site_packages(tmp_path):
+    folder = tmp_path / "site-packages"
+    folder.mkdir()
+    return folder
+
+
+@pytest.fixture
+def cache_path(monkeypatch, tmp_path):
+    path = tmp_path / "cache"
+    monkeypatch.setenv(CACHE_DIR_VARIABLE, str(path))
+    return path
+
+
+@pytest.mark.parametrize(
+    "name,expected",
+    [
+        ("Pillow", "pillow"),
+        ("zope.interface", "zope_interface"),
+        ("Zope-Interface", "zope_interface"),
+        ("zope__interface", "zope_interface"),
+    ],
+)
+def test_canonical_name(name, expected):
+    assert canonical_name(name) == expected
+
+
+@pytest.mark.parametrize(
+    "files,expected",
+    [
+        (["PIL/__init__.py", "PIL/Image.py", "PIL/_imaging.so"], {"PIL"}),
+        (["six.py"], {"six"}),
+        (["_cffi_backend.cpython-312-x86_64-linux-gnu.so"], {"_cffi_backend"}),
+        # namespace packages
+        (
+            ["zope/interface/__init__.py", "zope/interface/common/idatetime.py"],
+            {"zope.interface"},
+        ),
+        (
+            ["google/protobuf/__init__.py", "google/_upb/_message.so"],
+            {
+                "google.protobuf",
+                "google._upb._message",
+            },
+        ),
+        # neither importable nor code
+        (
+            [
+                "../../bin/script",
+                "my_package-1.0.dist-info/METADATA",
+                "my_package-1.0.data/scripts/run.py",
+                "__editable__.my_package-1.0.pth",
+                "__editable___my_package_1_0_finder.py",
+                "README.rst",
+            ],
+            set(),
+        ),
+    ],
+)
+def test_names_from_files(files, expected):
+    assert _names_from_files([PurePosixPath(x) for x in files]) == expected
+
+
+def test_import_names_from_top_level(site_packages):
+    _install(site_packages, "PyYAML", top_level="_yaml\nyaml\n")
+
+    index = load_distributions_index([str(site_packages)])
+
+    assert index.provided_by(DottedName("yaml.loader")) == {"pyyaml"}
+    assert index.provided_by(DottedName("_yaml")) == {"pyyaml"}
+
+
+def test_provided_by():
+    index = DistributionsIndex.from_distributions(
+        [
+            ("zope_interface", ["zope.interface"]),
+            ("zope_component", ["zope.component"]),
+            ("zope", ["zope"]),
+            ("pillow", ["PIL"]),
+        ]
+    )
+
+    assert index.provided_by(DottedName("zope.interface.Interface")) == {
+        "zope_interface"
+    }
+    assert index.provided_by(DottedName("zope.schema")) == {"zope"}
+    assert index.provided_by(DottedName("pil.Image")) == {"pillow"}
+    assert index.provided_by(DottedName("unknown")) == set()
+
+
+def test_load_index(site_packages):
+    _install(site_packages, "Pillow", files=["PIL/__init__.py"])
+    _install(site_packages, "zope.interface", files=["zope/interface/__init__.py"])
+    dist_info_path = _install(site_packages, "not-a-distribution")
+    (dist_info_path / "METADATA").unlink()
+
+    index = load_distributions_index([str(site_packages), "/does/not/exist"])
+
+    assert index.provided_by(DottedName("PIL.Image")) == {"pillow"}
+    assert index.provided_by(DottedName("zope.interface")) == {"zope_interface"}
+
+
+def test_first_distribution_on_path_wins(tmp_path):
+    first = tmp_path / "first"
+    second = tmp_path / "second"
+    first.mkdir()
+    second.mkdir()
+    _install(first, "my-package", files=["new_name/__init__.py"])
+    _install(second, "my-package", files=["old_name/__init__.py"])
+
+    index = load_distributions_index([str(first), str(second)])
+
+    assert index.provided_by(DottedName("new_name")) == {"my_package"}
+    assert index.provided_by(DottedName("old_name")) == set()
+
+
+def test_index_is_persisted(site_packages, cache_path, mocker):
+    _install(site_packages, "Pillow", files=["PIL/__init__.py"])
+    load_distributions_index([str(site_packages)])
+    assert (cache_path / "distributions.json").exists()
+
+    read = mocker.spy(distributions.importlib_metadata, "PathDistribution")
+    index = load_distributions_index([str(site_packages)])
+
+    assert index.provided_by(DottedName("PIL")) == {"pillow"}
+    assert read.call_count == 0
+
+
+def test_index_is_refreshed(site_packages, cache_path, mocker):
+    _install(site_packages, "Pillow", files=["PIL/__init__.py"])
+    _install(site_packages, "six", files=["six.py"])
+    load_distributions_index([str(site_packages)])
+
+    read = mocker.spy(distributions.importlib_metadata, "PathDistribution")
+    _install(site_packages, "attrs", files=["attr/__init__.py"])
+    index = load_distributions_index([str(site_packages)])
+
+    assert index.provided_by(DottedName("attr")) == {"attrs"}
+    assert index.provided_by(DottedName("six")) == {"six"}
+    # only the new distribution is read
+    assert read.call_count == 1
+
+
+def test_index_without_cache(site_packages):
+    _install(site_packages, "Pillow", files=["PIL/__init__.py"])
+
+    index = load_distributions_index([str(site_packages)])
+    assert index.provided_by(DottedName("PIL")) == {"pillow"}
+
+
+def _database(requirements=(), test_requirements=(), imports=()):
+    database = ImportsDatabase()
+    database.own_dotted_name = DottedName("fake")
+    database.add_requirements([DottedName(x) for x in requirements])
+    database.add_extra_requirements("test", [DottedName(x) for x in test_requirements])
+    database.add_imports(imports)
+    database.distributions = DistributionsIndex.from_distributions(
+        [("pillow", ["PIL"]), ("pyyaml", ["yaml", "_yaml"])]
+    )
+    return database
+
+
+def test_database_missing_imports():
+    database = _database(
+        requirements=["Pillow"],
+        imports=[DottedName("PIL.Image"), DottedName("yaml")],
+    )
+
+    assert [x.name for x in database.get_missing_imports()] == ["yaml"]
+
+
+def test_database_missing_test_imports():
+    database = _database(
+        requirements=["Pillow"],
+        test_requirements=["PyYAML"],
+        imports=[
+            DottedName("PIL.Image", is_test=True),
+            DottedName("yaml", is_test=True),
+        ],
+    )
+
+    assert database.get_missing_test_imports() == []
+
+
+def test_database_unneeded_requirements():
+    database = _database(
+        requirements=["Pillow", "PyYAML"],
+        imports=[DottedName("PIL.Image")],
+    )
+
+    assert [x.name for x in database.get_unneeded_requirements()] == ["PyYAML"]
+
+
+def test_database_unneeded_test_requirements():
+    database = _database(
+        test_requirements=["Pillow", "PyYAML"],
+        imports=[DottedName("yaml", is_test=True)],
+    )
+
+    assert [x.name for x in database.get_unneeded_test_requirements()] == ["Pillow"]
+
+
+def test_database_requirements_that_should_be_test_requirements():
+    database = _database(
+        requirements=["Pillow", "PyYAML"],
+        imports=[DottedName("PIL.Image", is_test=True), DottedName("yaml")],
+    )
+
+    assert [
+        x.name for x in database.requirements_that_should_be_test_requirements()
+    ] == ["Pillow"]
+
+
+def test_database_without_index():
+    database = _database(requirements=["Pillow"], imports=[DottedName("PIL")])
+    database.distributions = None
+
+    assert [x.name for x in database.get_missing_imports()] == ["PIL"]
+    assert [x.name for x in database.get_unneeded_requirements()] == ["Pillow"]
+
+
+def test_match_installed_option(capsys, minimal_structure, mock_inspect_wheel, mocker):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(
+        name=package_name, requirements=["|one|"]
+    )
+    write_source_file_at(path / package_name, "__init__.py", "import PIL")
+    load = mocker.patch(
+        "z3c.dependencychecker.main.load_distributions_index",
+        return_value=DistributionsIndex.from_distributions([("one", ["PIL"])]),
+    )
+
+    arguments = ["dependencychecker", "--match-installed", str(path)]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    out, _ = capsys.readouterr()
+
+    assert load.call_count == 1
+    assert "PIL" not in out
+    assert "one" not in out
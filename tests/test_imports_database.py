@@ -4,6 +4,8 @@ from .utils import get_requirements_names_for_extra
 from z3c.dependencychecker.db import ImportsDatabase
 from z3c.dependencychecker.dotted_name import DottedName
 
+import pytest
+
 
 def test_no_dependencies():
     database = ImportsDatabase()
@@ -290,3 +292,125 @@ def test_get_test_extra_no_extra(minimal_database):
     minimal_database.add_extra_requirements("other", (dotted_name,))
     result = minimal_database._get_test_extra()
     assert result == []
+
+
+def _database_with(name, requirements=(), imports=()):
+    database = ImportsDatabase()
+    database.own_dotted_name = DottedName(name)
+    database.add_requirements([DottedName(x) for x in requirements])
+    database.add_imports([DottedName(x) for x in imports])
+    return database
+
+
+def test_merge():
+    database = _database_with("fake", requirements=["one"], imports=["one"])
+    other = _database_with("fake", requirements=["one"], imports=["two"])
+    other.add_extra_requirements("test", [DottedName("pytest")])
+
+    database.merge(other)
+
+    assert get_requirements_names(database) == ["one"]
+    assert get_requirements_names_for_extra(database, "test") == ["pytest"]
+    assert sorted(x.name for x in database.imports_used) == ["one", "two"]
+
+
+def test_merge_is_associative():
+    def build():
+        return (
+            _database_with("fake", requirements=["one"], imports=["one", "a"]),
+            _database_with("fake", requirements=["two"], imports=["two", "b"]),
+            _database_with("fake", imports=["three"]),
+        )
+
+    first, second, third = build()
+    second.merge(third)
+    first.merge(second)
+    left = first
+
+    first, second, third = build()
+    first.merge(second)
+    first.merge(third)
+    right = first
+
+    assert left._requirements == right._requirements
+    assert left.get_missing_imports() == right.get_missing_imports()
+
+
+def test_merge_into_empty_database():
+    database = ImportsDatabase()
+    database.merge(_database_with("fake", imports=["one"]))
+    assert database.own_dotted_name == DottedName("fake")
+    assert len(database.imports_used) == 1
+
+
+def test_merge_other_package():
+    database = _database_with("fake")
+    with pytest.raises(ValueError):
+        database.merge(_database_with("other"))
+
+
+def test_get_locations(minimal_database):
+    minimal_database.add_imports(
+        [
+            DottedName("one", file_path="a.py", lineno=1),
+            DottedName("one", file_path="b.py", lineno=7),
+            DottedName("two", file_path="a.py", lineno=2),
+        ]
+    )
+    locations, total = minimal_database.get_locations(DottedName("one"))
+    assert locations == [("a.py", 1), ("b.py", 7)]
+    assert total == 2
+
+
+def test_get_locations_capped(minimal_database):
+    minimal_database.max_locations = 3
+    minimal_database.add_imports(
+        [DottedName("one", file_path=f"{x}.py", lineno=x) for x in range(10)]
+    )
+    locations, total = minimal_database.get_locations(DottedName("one"))
+    assert locations == [("0.py", 0), ("1.py", 1), ("2.py", 2)]
+    assert total == 10
+
+
+def test_get_locations_of_requirement(minimal_database):
+    minimal_database.add_imports(
+        [
+            DottedName("zope.interface.verify", file_path="a.py", lineno=1),
+            DottedName("zope.interface", file_path="b.py", lineno=2),
+            DottedName("zope.interfaces", file_path="c.py", lineno=3),
+        ]
+    )
+    locations, total = minimal_database.get_locations(DottedName("zope.interface"))
+    assert locations == [("b.py", 2), ("a.py", 1)]
+    assert total == 2
+
+
+def test_get_locations_not_imported(minimal_database):
+    assert minimal_database.get_locations(DottedName("one")) == ([], 0)
+
+
+def test_merge_keeps_locations():
+    database = _database_with("fake")
+    other = _database_with("fake")
+    other.add_imports([DottedName("one", file_path="a.py", lineno=4)])
+    database.merge(other)
+    assert database.get_locations(DottedName("one")) == ([("a.py", 4)], 1)
+
+
+def test_get_locations_test_apart(minimal_database):
+    minimal_database.max_locations = 2
+    minimal_database.add_imports(
+        [
+            DottedName("one", file_path="test_a.py", lineno=1, is_test=True),
+            DottedName("one", file_path="test_b.py", lineno=2, is_test=True),
+            DottedName("one", file_path="test_c.py", lineno=3, is_test=True),
+            DottedName("one", file_path="a.py", lineno=4),
+        ]
+    )
+    one = DottedName("one")
+    assert minimal_database.get_locations(one, is_test=False) == ([("a.py", 4)], 1)
+    assert minimal_database.get_locations(one, is_test=True) == (
+        [("test_a.py", 1), ("test_b.py", 2)],
+        3,
+    )
+    assert minimal_database.get_locations(one) == ([("a.py", 4), ("test_a.py", 1)], 4)
@@ -1,9 +1,12 @@
+from .utils import dist_info
+from .utils import write_source_file_at
 from pathlib import Path
 from unittest import mock
 from z3c.dependencychecker.main import _version
 from z3c.dependencychecker.main import get_path
 from z3c.dependencychecker.main import main
 from z3c.dependencychecker.main import parse_command_line
+from z3c.dependencychecker.main import read_file_list
 from z3c.dependencychecker.main import set_log_level
 from z3c.dependencychecker.utils import change_dir
 
@@ -112,3 +115,98 @@ def test_exit_zero_set(minimal_structure):
     with pytest.raises(SystemExit):
         with mock.patch.object(sys, "argv", arguments):
             main()
+
+
+def test_shard_option():
+    arguments = ["dependencychecker", "--shard", "2/4", "--save-snapshot", "a"]
+    with mock.patch.object(sys, "argv", arguments):
+        options, args = parse_command_line()
+
+    assert options.shard == (2, 4)
+
+
+@pytest.mark.parametrize("shard", ["2", "a/b", "0/4", "5/4"])
+def test_shard_option_invalid(shard):
+    arguments = ["dependencychecker", "--shard", shard, "--save-snapshot", "a"]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            parse_command_line()
+
+
+def test_shard_needs_snapshot():
+    arguments = ["dependencychecker", "--shard", "1/2"]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            parse_command_line()
+
+
+def test_merge_needs_snapshots():
+    arguments = ["dependencychecker", "merge"]
+    with pytest.raises(SystemExit) as exit_info:
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    assert exit_info.value.code == 2
+
+
+def test_files_from_not_with_snapshot():
+    arguments = ["dependencychecker", "--files-from", "-", "--from-snapshot", "a"]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            parse_command_line()
+
+
+def test_read_file_list(tmp_path):
+    list_path = tmp_path / "files.txt"
+    list_path.write_bytes(b"a.py\nb/c.py\n")
+    assert read_file_list(str(list_path)) == ["a.py", "b/c.py"]
+
+
+def test_read_file_list_stdin():
+    stdin = mock.Mock()
+    stdin.buffer.read.return_value = b"a.py\0b c.py\0"
+    with mock.patch.object(sys, "stdin", stdin):
+        assert read_file_list("-") == ["a.py", "b c.py"]
+
+
+def test_read_file_list_missing(tmp_path):
+    with pytest.raises(SystemExit) as exit_info:
+        read_file_list(str(tmp_path / "files.txt"))
+    assert exit_info.value.code == 1
+
+
+def test_files_from(capsys, tmp_path, minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "__init__.py", "import listed")
+    write_source_file_at(path / package_name, "other.py", "import not_listed")
+    list_path = tmp_path / "files.txt"
+    list_path.write_text(f"{path / package_name / '__init__.py'}\n")
+
+    arguments = ["dependencychecker", "--files-from", str(list_path), str(path)]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    out, _ = capsys.readouterr()
+
+    assert "listed" in out
+    assert "not_listed" not in out
+
+
+def test_strict(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(
+        path / package_name, "__init__.py", "import os\nprint 'python 2'"
+    )
+
+    arguments = ["dependencychecker", "--strict", "--exit-zero", str(path)]
+    with pytest.raises(SystemExit) as exit_info:
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    assert exit_info.value.code == 1
+
+    arguments = ["dependencychecker", "--exit-zero", str(path)]
+    with pytest.raises(SystemExit) as exit_info:
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    assert exit_info.value.code == 0
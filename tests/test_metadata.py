@@ -0,0 +1,591 @@
+from .utils import write_source_file_at
+from importlib import metadata as importlib_metadata
+from pathlib import Path
+from unittest import mock
+from z3c.dependencychecker.main import main
+from z3c.dependencychecker.metadata import build_requires_dist
+from z3c.dependencychecker.metadata import find_installed_distribution
+from z3c.dependencychecker.metadata import installed_top_levels
+from z3c.dependencychecker.metadata import is_sdist_metadata_file
+from z3c.dependencychecker.metadata import read_sdist_metadata
+from z3c.dependencychecker.metadata import read_source_metadata
+from z3c.dependencychecker.package import InstalledPackageMetadata
+from z3c.dependencychecker.package import Package
+from z3c.dependencychecker.package import PackageMetadata
+from z3c.dependencychecker.report import Report
+from z3c.dependencychecker.snapshot import save_snapshot
+
+import json
+import pytest
+import sys
+
+
+PYPROJECT = """
+[build-system]
+requires = ["setuptools"]
+build-backend = "setuptools.build_meta"
+
+[project]
+name = "my.package"
+version = "1.0"
+dependencies = ["one>=1.0", "two[extra]; python_version < '3.12'"]
+
+[project.optional-dependencies]
+test = ["three", "four; sys_platform == 'linux'"]
+"""
+
+SETUP_CFG = """
+[metadata]
+name = my.package
+
+[options]
+package_dir =
+    = src
+packages = find_namespace:
+install_requires =
+    one>=1.0
+    # a comment
+    two
+
+[options.packages.find]
+where = src
+exclude = tests
+
+[options.extras_require]
+test = three
+"""
+
+
+@pytest.fixture
+def project(tmp_path):
+    write_source_file_at(tmp_path / "src" / "my" / "package", "__init__.py", "")
+    return tmp_path
+
+
+def _requirements(dist_info):
+    return [(x["name"], x["marker"]) for x in dist_info["metadata"]["requires_dist"]]
+
+
+def test_pyproject(project):
+    write_source_file_at(project, "pyproject.toml", PYPROJECT)
+
+    file_path, dist_info = read_source_metadata(project)
+
+    assert file_path == project / "pyproject.toml"
+    assert dist_info["metadata"]["name"] == "my.package"
+    assert dist_info["top_level"] == ["my"]
+    assert _requirements(dist_info) == [
+        ("one", None),
+        ("two", 'python_version < "3.12"'),
+        ("three", 'extra == "test"'),
+        ("four", '(sys_platform == "linux") and extra == "test"'),
+    ]
+
+
+@pytest.mark.parametrize(
+    "source",
+    [
+        '[project]\nname = "my.package"\ndynamic = ["dependencies"]\n',
+        '[project]\nversion = "1.0"\n',
+        "[tool.dependencychecker]\nmax-errors = 3\n",
+        "not = toml = at all",
+        '[project]\nname = "my.package"\ndependencies = ["not a requirement!"]\n',
+    ],
+)
+def test_pyproject_not_static(project, source):
+    write_source_file_at(project, "pyproject.toml", source)
+    assert read_source_metadata(project) is None
+
+
+@pytest.mark.parametrize(
+    "setup_py,static",
+    [
+        ("from setuptools import setup\n\nsetup()\n", True),
+        (
+            '"""Shim"""\nimport setuptools\n'
+            'if __name__ == "__main__":\n    setuptools.setup()\n',
+            True,
+        ),
+        ("from setuptools import setup\n\nsetup(name='other')\n", False),
+        ("from setuptools import setup\n\nrequires = []\nsetup()\n", False),
+        ("print 'python 2'", False),
+    ],
+)
+def test_setup_py(project, setup_py, static):
+    write_source_file_at(project, "pyproject.toml", PYPROJECT)
+    write_source_file_at(project, "setup.py", setup_py)
+    assert (read_source_metadata(project) is not None) is static
+
+
+def test_other_build_backend(project):
+    pyproject = PYPROJECT.replace("setuptools.build_meta", "hatchling.build")
+    write_source_file_at(project, "pyproject.toml", pyproject)
+    write_source_file_at(project, "setup.py", "anything goes")
+
+    _, dist_info = read_source_metadata(project)
+    assert dist_info["top_level"] == ["my"]
+
+
+def test_other_build_backend_unknown_top_level(project):
+    pyproject = PYPROJECT.replace("setuptools.build_meta", "hatchling.build")
+    pyproject = pyproject.replace("my.package", "other-name")
+    write_source_file_at(project, "pyproject.toml", pyproject)
+    assert read_source_metadata(project) is None
+
+
+@pytest.mark.parametrize(
+    "tool,expected",
+    [
+        ('packages = ["a", "a.b", "c"]\npy-modules = ["d"]', ["a", "c", "d"]),
+        ('packages.find.where = ["src"]', ["my"]),
+        (
+            'packages.find.where = ["src"]\npackages.find.include = ["my.package*"]',
+            ["my"],
+        ),
+        ('packages.find.where = ["src"]\npackages.find.exclude = ["my*"]', None),
+        ('package-dir = {"" = "src"}', ["my"]),
+        ('package-dir = {"my" = "lib"}', None),
+    ],
+)
+def test_tool_setuptools(project, tool, expected):
+    write_source_file_at(
+        project, "pyproject.toml", f"{PYPROJECT}\n[tool.setuptools]\n{tool}\n"
+    )
+    metadata = read_source_metadata(project)
+    if expected is None:
+        assert metadata is None
+    else:
+        assert metadata[1]["top_level"] == expected
+
+
+def test_flat_layout(tmp_path):
+    write_source_file_at(tmp_path, "pyproject.toml", PYPROJECT)
+    write_source_file_at(tmp_path / "my_package", "__init__.py", "")
+    write_source_file_at(tmp_path / "tests", "__init__.py", "")
+    write_source_file_at(tmp_path / "docs", "__init__.py", "")
+    write_source_file_at(tmp_path, "conftest.py", "")
+
+    _, dist_info = read_source_metadata(tmp_path)
+    assert dist_info["top_level"] == ["my_package"]
+
+
+def test_flat_layout_single_module(tmp_path):
+    write_source_file_at(tmp_path, "pyproject.toml", PYPROJECT)
+    write_source_file_at(tmp_path, "my_module.py", "")
+    write_source_file_at(tmp_path, "setup.py", "import setuptools\nsetuptools.setup()")
+
+    _, dist_info = read_source_metadata(tmp_path)
+    assert dist_info["top_level"] == ["my_module"]
+
+
+def test_flat_layout_ambiguous(tmp_path):
+    write_source_file_at(tmp_path, "pyproject.toml", PYPROJECT)
+    write_source_file_at(tmp_path / "one", "__init__.py", "")
+    write_source_file_at(tmp_path / "two", "__init__.py", "")
+    assert read_source_metadata(tmp_path) is None
+
+
+def test_setup_cfg(project):
+    write_source_file_at(project, "setup.cfg", SETUP_CFG)
+    write_source_file_at(project / "src" / "tests", "__init__.py", "")
+
+    file_path, dist_info = read_source_metadata(project)
+
+    assert file_path == project / "setup.cfg"
+    assert dist_info["metadata"]["name"] == "my.package"
+    assert dist_info["top_level"] == ["my"]
+    assert _requirements(dist_info) == [
+        ("one", None),
+        ("two", None),
+        ("three", 'extra == "test"'),
+    ]
+
+
+@pytest.mark.parametrize(
+    "change",
+    [
+        ("name = my.package", ""),
+        ("    one>=1.0\n", "    file: requirements.txt\n"),
+        ("test = three", "test = file: test-requirements.txt"),
+    ],
+)
+def test_setup_cfg_not_static(project, change):
+    write_source_file_at(project, "setup.cfg", SETUP_CFG.replace(*change))
+    assert read_source_metadata(project) is None
+
+
+def test_setup_cfg_with_setup_py(project):
+    write_source_file_at(project, "setup.cfg", SETUP_CFG)
+    write_source_file_at(project, "setup.py", "from setuptools import setup\nsetup()")
+    assert read_source_metadata(project) is not None
+
+    write_source_file_at(
+        project, "setup.py", "import setup_helpers\nsetup(**setup_helpers.kwargs())"
+    )
+    assert read_source_metadata(project) is None
+
+
+def test_build_requires_dist():
+    requires_dist = build_requires_dist(
+        ["one[a,b]>=1.0,<2"], {"x": ["two @ https://x/two.whl"]}
+    )
+    assert requires_dist == [
+        {
+            "name": "one",
+            "url": None,
+            "extras": ["a", "b"],
+            "specifier": "<2,>=1.0",
+            "marker": None,
+        },
+        {
+            "name": "two",
+            "url": "https://x/two.whl",
+            "extras": [],
+            "specifier": "",
+            "marker": 'extra == "x"',
+        },
+    ]
+
+
+def test_package_metadata_without_wheel(project, mock_inspect_wheel):
+    write_source_file_at(project, "pyproject.toml", PYPROJECT)
+
+    metadata = PackageMetadata(project)
+
+    assert mock_inspect_wheel.call_count == 0
+    assert metadata.source == project / "pyproject.toml"
+    assert metadata.name == "my.package"
+    assert metadata.top_level == [project / "src" / "my"]
+    assert [x.name for x in metadata.get_required_dependencies()] == ["one", "two"]
+    extras = {
+        extra: [x.name for x in dotted_names]
+        for extra, dotted_names in metadata.get_extras_dependencies()
+    }
+    assert extras == {"test": ["three", "four"]}
+
+
+def test_package_metadata_falls_back_to_wheel(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = {
+        "dist_info": {"metadata": {"name": package_name}, "top_level": []}
+    }
+    write_source_file_at(
+        path, "pyproject.toml", '[project]\nname = "x"\ndynamic = ["dependencies"]\n'
+    )
+
+    metadata = PackageMetadata(path)
+
+    assert mock_inspect_wheel.call_count == 1
+    assert metadata.source.suffix == ".whl"
+    assert metadata.name == package_name
+
+
+def test_report_notice(project, capsys):
+    write_source_file_at(project, "pyproject.toml", PYPROJECT)
+    write_source_file_at(project / "src" / "my" / "package", "code.py", "import one")
+
+    package = Package(Path(project))
+    package.inspect()
+    Report(package).print_notice()
+
+    assert "requirements are read from pyproject.toml" in capsys.readouterr().out
+
+
+def test_report_notice_from_snapshot(project, tmp_path, capsys):
+    write_source_file_at(project, "pyproject.toml", PYPROJECT)
+    write_source_file_at(project / "src" / "my" / "package", "code.py", "import one")
+    package = Package(Path(project))
+    package.inspect()
+    snapshot_path = tmp_path / "snapshot.bin"
+    save_snapshot(package.imports, snapshot_path)
+
+    Report(Package.from_snapshot(Path(project), snapshot_path)).print_notice()
+
+    out = capsys.readouterr().out
+    assert "requirements are read from pyproject.toml" in out
+    assert "wheel" not in out
+
+
+def test_setup_cfg_find_only_packages(project):
+    write_source_file_at(
+        project, "setup.cfg", SETUP_CFG.replace("find_namespace:", "find:")
+    )
+    # src/my is not a package, setuptools does not look into it
+    assert read_source_metadata(project) is None
+
+    write_source_file_at(project / "src" / "my", "__init__.py", "")
+    assert read_source_metadata(project)[1]["top_level"] == ["my"]
+
+
+def _install(site_packages, name, project_path=None, top_level=None, files=()):
+    dist_info_path = site_packages / f"{name.replace('-', '_')}-1.0.dist-info"
+    requires = "Requires-Dist: one>=1.0\nRequires-Dist: three; extra == 'test'\n"
+    write_source_file_at(
+        dist_info_path,
+        "METADATA",
+        f"Metadata-Version: 2.1\nName: {name}\nVersion: 1.0\n{requires}",
+    )
+    records = [f"{dist_info_path.name}/METADATA,,", *files]
+    write_source_file_at(dist_info_path, "RECORD", "\n".join(records) + "\n")
+    if top_level is not None:
+        write_source_file_at(dist_info_path, "top_level.txt", top_level)
+    if project_path is not None:
+        direct_url = {"url": project_path.as_uri(), "dir_info": {"editable": True}}
+        write_source_file_at(dist_info_path, "direct_url.json", json.dumps(direct_url))
+    return dist_info_path
+
+
+@pytest.fixture
+def site_packages(tmp_path, monkeypatch):
+    folder = tmp_path / "site-packages"
+    folder.mkdir()
+    monkeypatch.syspath_prepend(str(folder))
+    return folder
+
+
+def test_find_installed_distribution_by_name(project, site_packages):
+    write_source_file_at(
+        project, "pyproject.toml", '[project]\nname = "my-installed-package"\n'
+    )
+    _install(site_packages, "my-installed-package", project_path=project)
+
+    distribution = find_installed_distribution(project)
+    assert distribution.metadata["Name"] == "my-installed-package"
+
+
+def test_find_installed_distribution_installed_elsewhere(
+    project, site_packages, caplog
+):
+    write_source_file_at(
+        project, "pyproject.toml", '[project]\nname = "my-installed-package"\n'
+    )
+    # i.e. installed from PyPI
+    _install(site_packages, "my-installed-package")
+
+    distribution = find_installed_distribution(project)
+    assert distribution.metadata["Name"] == "my-installed-package"
+    assert "my-installed-package is installed, but not from" in caplog.text
+
+
+def test_find_installed_distribution_prefers_the_one_from_the_folder(
+    project, site_packages, caplog
+):
+    write_source_file_at(
+        project, "pyproject.toml", '[project]\nname = "my-installed-package"\n'
+    )
+    _install(site_packages, "my-installed-package")
+    _install(site_packages, "my-renamed-package", project_path=project)
+
+    distribution = find_installed_distribution(project)
+    assert distribution.metadata["Name"] == "my-renamed-package"
+    assert "not from" not in caplog.text
+
+
+def test_find_installed_distribution_metadata_within_folder(project, monkeypatch):
+    # as setup.py develop leaves it
+    write_source_file_at(
+        project, "pyproject.toml", '[project]\nname = "my-installed-package"\n'
+    )
+    _install(project / "src", "my-installed-package")
+    monkeypatch.syspath_prepend(str(project / "src"))
+
+    distribution = find_installed_distribution(project)
+    assert distribution.metadata["Name"] == "my-installed-package"
+
+
+def test_find_installed_distribution_by_folder(project, site_packages):
+    _install(site_packages, "other-installed-package")
+    _install(site_packages, "my-installed-package", project_path=project)
+
+    distribution = find_installed_distribution(project)
+    assert distribution.metadata["Name"] == "my-installed-package"
+
+
+def test_find_installed_distribution_not_installed(project, site_packages):
+    write_source_file_at(project, "setup.cfg", "[metadata]\nname = not-installed\n")
+    assert find_installed_distribution(project) is None
+
+
+@pytest.mark.parametrize(
+    "top_level,files,expected",
+    [
+        ("my\nother\n", (), ["my", "other"]),
+        (
+            None,
+            ("my/__init__.py,,", "single.py,,", "__editable__.x.pth,,", "../bin/x,,"),
+            ["my", "single"],
+        ),
+        (None, ("__editable___my_finder.py,,",), []),
+    ],
+)
+def test_installed_top_levels(site_packages, top_level, files, expected):
+    _install(site_packages, "my-installed-package", top_level=top_level, files=files)
+    distribution = importlib_metadata.distribution("my-installed-package")
+    assert installed_top_levels(distribution) == expected
+
+
+def test_installed_package_metadata(project, site_packages, mock_inspect_wheel):
+    dist_info_path = _install(
+        site_packages, "my-installed-package", project_path=project, top_level="my\n"
+    )
+
+    metadata = InstalledPackageMetadata(project)
+    assert metadata.name == "my-installed-package"
+    assert metadata.source == dist_info_path
+    assert metadata.top_level == [project / "src" / "my"]
+    assert [x.name for x in metadata.get_required_dependencies()] == ["one"]
+    extras = {
+        extra: [x.name for x in dotted_names]
+        for extra, dotted_names in metadata.get_extras_dependencies()
+    }
+    assert extras == {"test": ["three"]}
+    assert mock_inspect_wheel.call_count == 0
+
+
+def test_installed_package_metadata_guessed_top_level(project, site_packages):
+    write_source_file_at(project, "pyproject.toml", '[project]\nname = "my.pkg"\n')
+    _install(site_packages, "my.pkg", files=("__editable___my_finder.py,,",))
+
+    metadata = InstalledPackageMetadata(project)
+    assert metadata.top_level == [project / "src" / "my"]
+
+
+def test_installed_package_metadata_not_installed(project, site_packages):
+    with pytest.raises(SystemExit):
+        InstalledPackageMetadata(project)
+
+
+def test_installed_package_metadata_not_on_disk(project, site_packages, mocker, caplog):
+    _install(
+        site_packages,
+        "my-installed-package",
+        project_path=project,
+        top_level="my\nmissing\n",
+    )
+    mocker.patch(
+        "z3c.dependencychecker.package.installed_metadata_path", return_value=None
+    )
+
+    metadata = InstalledPackageMetadata(project)
+    assert metadata.source is None
+    assert metadata.top_level == [project / "src" / "my"]
+    assert "referenced by top_level metadata in my-installed-package" in caplog.text
+
+
+def test_installed_option(capsys, project, site_packages):
+    _install(
+        site_packages, "my-installed-package", project_path=project, top_level="my"
+    )
+    write_source_file_at(project / "src" / "my" / "package", "code.py", "import two")
+
+    arguments = ["dependencychecker", "--installed", str(project)]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    out, _ = capsys.readouterr()
+
+    assert "two" in out
+    assert "Note: requirements are read from the installed" in out
+
+
+@pytest.mark.parametrize(
+    "relative_path,expected",
+    [
+        ("PKG-INFO", True),
+        ("pyproject.toml", True),
+        ("my.egg-info/requires.txt", True),
+        ("src/my.egg-info/requires.txt", True),
+        ("my.egg-info/PKG-INFO", False),
+        ("src/pyproject.toml", False),
+        ("setup.cfg", False),
+    ],
+)
+def test_is_sdist_metadata_file(relative_path, expected):
+    assert is_sdist_metadata_file(relative_path) is expected
+
+
+def _sdist_requirements(files):
+    file_name, dist_info = read_sdist_metadata(files)
+    requirements = [
+        (x["name"], x["marker"]) for x in dist_info["metadata"]["requires_dist"]
+    ]
+    return file_name, dist_info["metadata"]["name"], requirements
+
+
+def test_read_sdist_metadata_pkg_info():
+    pkg_info = (
+        b"Name: my.package\nRequires-Dist: one\nRequires-Dist: two; extra == 'x'\n"
+    )
+    files = {
+        "PKG-INFO": pkg_info,
+        "pyproject.toml": PYPROJECT.encode(),
+        "my.egg-info/requires.txt": b"three\n",
+    }
+
+    assert _sdist_requirements(files) == (
+        "PKG-INFO",
+        "my.package",
+        [("one", None), ("two", 'extra == "x"')],
+    )
+
+
+def test_read_sdist_metadata_requires_txt():
+    requires = b"""one
+
+[:python_version < "3.8"]
+two
+
+[test]
+three
+
+[docs:sys_platform == "linux"]
+four
+"""
+    files = {
+        "PKG-INFO": b"Metadata-Version: 1.2\nName: my.package\n",
+        "pyproject.toml": PYPROJECT.encode(),
+        "src/my.egg-info/requires.txt": requires,
+    }
+
+    assert _sdist_requirements(files) == (
+        "src/my.egg-info/requires.txt",
+        "my.package",
+        [
+            ("one", None),
+            ("two", 'python_version < "3.8"'),
+            ("three", 'extra == "test"'),
+            ("four", '(sys_platform == "linux") and extra == "docs"'),
+        ],
+    )
+
+
+def test_read_sdist_metadata_pyproject():
+    file_name, name, requirements = _sdist_requirements(
+        {
+            "PKG-INFO": b"Metadata-Version: 1.2\nName: my.package\n",
+            "pyproject.toml": PYPROJECT.encode(),
+        }
+    )
+    assert file_name == "pyproject.toml"
+    assert [x for x, _ in requirements] == ["one", "two", "three", "four"]
+
+    assert _sdist_requirements({"pyproject.toml": PYPROJECT.encode()})[0] == (
+        "pyproject.toml"
+    )
+
+
+def test_read_sdist_metadata_pkg_info_only():
+    files = {"PKG-INFO": b"Metadata-Version: 1.2\nName: my.package\n"}
+    assert _sdist_requirements(files) == ("PKG-INFO", "my.package", [])
+
+
+@pytest.mark.parametrize(
+    "files",
+    [
+        {},
+        {"pyproject.toml": b"[project]\nname = 'a'\ndynamic = ['dependencies']\n"},
+        {"pyproject.toml": b"not toml ["},
+    ],
+)
+def test_read_sdist_metadata_none(files):
+    assert read_sdist_metadata(files) is None
@@ -140,3 +140,75 @@ def test_middleware_assignment_to_list(tmpdir):
         MIDDLEWARE_ASSIGNMENT_TO_LIST,
     )
     assert dotted_names == ["something"]
+
+
+def test_apps_augmented_assignment(tmpdir):
+    dotted_names = _get_imports_of_python_module(
+        tmpdir,
+        'INSTALLED_APPS = ["one"]\nINSTALLED_APPS += ["two"]',
+    )
+    assert dotted_names == ["one", "two"]
+
+
+def test_apps_annotated_assignment(tmpdir):
+    dotted_names = _get_imports_of_python_module(
+        tmpdir,
+        'MIDDLEWARE: list[str] = ["one"]\nTEST_RUNNER: str = "two"\n'
+        "INSTALLED_APPS: list",
+    )
+    assert dotted_names == ["one", "two"]
+
+
+def test_apps_within_if_and_try(tmpdir):
+    source = "\n".join(
+        [
+            "if DEBUG:",
+            '    INSTALLED_APPS += ["one"]',
+            "elif TESTING:",
+            '    TEST_RUNNER = "two"',
+            "try:",
+            "    import local",
+            "except ImportError:",
+            '    MIDDLEWARE = ["three"]',
+            "else:",
+            '    MIDDLEWARE = ["four"]',
+            "finally:",
+            '    AUTHENTICATION_BACKENDS = ["five"]',
+        ]
+    )
+    dotted_names = _get_imports_of_python_module(tmpdir, source)
+    assert dotted_names == ["one", "two", "three", "four", "five"]
+
+
+def test_apps_not_at_module_level(tmpdir):
+    source = "\n".join(
+        [
+            "def get_apps():",
+            '    INSTALLED_APPS = ["one"]',
+            "class Settings:",
+            '    INSTALLED_APPS = ["two"]',
+            "settings.INSTALLED_APPS = ['three']",
+        ]
+    )
+    dotted_names = _get_imports_of_python_module(tmpdir, source)
+    assert dotted_names == []
+
+
+def test_no_settings_not_parsed(tmpdir):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(folder, source_code=RANDOM_ASSIGNMENT)
+
+    django_settings = DjangoSettings(folder, temporal_file)
+    assert list(django_settings.scan()) == []
+    assert django_settings.prefiltered
+
+
+def test_non_ascii_identifiers_are_parsed(tmpdir):
+    # NFKC normalizes the fullwidth letters to INSTALLED_APPS
+    source = "\uff29NSTALLED_APPS = ['one']"
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(folder, source_code=source)
+
+    django_settings = DjangoSettings(folder, temporal_file)
+    assert [x.name for x in django_settings.scan()] == ["one"]
+    assert not django_settings.prefiltered
@@ -195,3 +195,22 @@ def test_multiple_imports_with_invalid_lines_details(tmpdir):
 
     assert "zope.component.adapter" in dotted_names
     assert "zope.component.utility" in dotted_names
+
+
+def test_line_numbers(tmpdir):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(folder, source_code=SINGLE_IMPORT)
+    doc_file = DocFiles(folder, temporal_file)
+    lines = [(x.name, x.lineno) for x in doc_file.scan()]
+    assert lines == [("zope.annotation", 6)]
+
+
+def test_no_doctest_markers(tmpdir):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(
+        folder, "README.rst", "Nothing to see here\n\n    import os\n"
+    )
+    docfiles = DocFiles(folder, temporal_file)
+
+    assert list(docfiles.scan()) == []
+    assert docfiles.prefiltered
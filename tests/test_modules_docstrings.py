@@ -1,6 +1,10 @@
 from .utils import write_source_file_at
 from pathlib import Path
+from z3c.dependencychecker.modules import ModulePass
 from z3c.dependencychecker.modules import PythonDocstrings
+from z3c.dependencychecker.modules import PythonModule
+
+import pytest
 
 
 NO_DOC = "class MyClass(object): ..."
@@ -65,6 +69,13 @@ class MyClass(object):
         >>> from zope.component import utility
         """
 '''
+DOC_IN_ASYNC_FUNCTION = '''
+async def test():
+    """Random docstring with code to be evaluated.
+
+    >>> import zope.component.adapter
+    """
+'''
 
 
 def _get_dependencies_on_file(folder, source):
@@ -178,3 +189,74 @@ def test_docstring_multiple_imports_with_invalid_lines_details(tmpdir):
     )
     assert "zope.component.adapter" in dotted_names
     assert "zope.component.utility" in dotted_names
+
+
+def test_docstring_line_numbers(tmpdir):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(
+        folder,
+        source_code=MULTIPLE_IMPORTS_DIFFERENT_LINES,
+    )
+    docstring = PythonDocstrings(folder, temporal_file)
+    lines = [(x.name, x.lineno) for x in docstring.scan()]
+    assert lines == [("zope.component.adapter", 6), ("zope.component.utility", 7)]
+
+
+def test_docstring_in_async_function(tmpdir):
+    dotted_names = _get_dependencies_on_file(tmpdir, DOC_IN_ASYNC_FUNCTION)
+    assert dotted_names == ["zope.component.adapter"]
+
+
+def test_module_parsed_once(tmpdir, mocker):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(
+        folder,
+        source_code=f"import zope.interface\n{DOC_IN_METHOD}",
+    )
+    module_pass = mocker.spy(ModulePass, "__init__")
+
+    code = [x.name for x in PythonModule(folder, temporal_file).scan()]
+    docstrings = [x.name for x in PythonDocstrings(folder, temporal_file).scan()]
+
+    assert code == ["zope.interface"]
+    assert docstrings == ["zope.interface"]
+    assert module_pass.call_count == 1
+
+
+def test_module_changed(tmpdir):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(folder, source_code=DOC_IN_MODULE)
+    dotted_names = [x.name for x in PythonDocstrings(folder, temporal_file).scan()]
+    assert dotted_names == ["zope.component"]
+
+    temporal_file.write_text(DOC_IN_METHOD)
+    dotted_names = [x.name for x in PythonDocstrings(folder, temporal_file).scan()]
+    assert dotted_names == ["zope.interface"]
+
+
+def test_no_doctest_markers_not_parsed(tmpdir, mocker):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(
+        folder, source_code='"""Docstring without tests"""\nimport os\n'
+    )
+    module_pass = mocker.spy(ModulePass, "__init__")
+
+    assert list(PythonDocstrings(folder, temporal_file).scan()) == []
+    assert module_pass.call_count == 0
+
+
+@pytest.mark.parametrize(
+    "docstring",
+    [
+        '"""\n>>> import one\n"""',
+        '"""\n\\x3e>> import one\n"""',
+        '"""\n\\076>> import one\n"""',
+        '"""\n\\76\\76\\76 import one\n"""',
+        '"""\n\\N{GREATER-THAN SIGN}>> import one\n"""',
+        '(\n">"\n">> import one"\n)',
+        '"""\n>\\\n>> import one\n"""',
+    ],
+)
+def test_doctest_markers(tmpdir, docstring):
+    dotted_names = _get_dependencies_on_file(tmpdir, docstring)
+    assert dotted_names == ["one"]
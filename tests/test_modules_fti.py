@@ -108,3 +108,34 @@ def test_something_to_ignore(tmpdir):
 def test_schema_emtpy(tmpdir):
     dotted_names = _get_fti_imports_on_file(tmpdir, SCHEMA_EMPTY)
     assert len(dotted_names) == 0
+
+
+def test_stops_once_everything_found(tmpdir):
+    source = f"{KLASS}{SCHEMA}<property name='klass'>not.reached</property>"
+    dotted_names = _get_fti_imports_on_file(tmpdir, source)
+    assert dotted_names == ["my.class.package", "my.path.to.schema"]
+
+
+def test_large_file(tmpdir):
+    filler = '<property name="title">A title</property>\n' * 10000
+    dotted_names = _get_fti_imports_on_file(tmpdir, f"{filler}{SCHEMA}{filler}")
+    assert dotted_names == ["my.path.to.schema"]
+
+
+def test_no_properties_not_parsed(tmpdir):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(
+        folder,
+        source_code=XML_TEMPLATE.format(NO_BEHAVIORS),
+        filename="configure.zcml",
+    )
+
+    fti_file = FTIFile(folder, temporal_file)
+    assert list(fti_file.scan()) == []
+    assert fti_file.prefiltered
+
+
+def test_character_references_are_parsed(tmpdir):
+    source = '<property name="&#107;lass">my.class.package</property>'
+    dotted_names = _get_fti_imports_on_file(tmpdir, source)
+    assert dotted_names == ["my.class.package"]
@@ -106,3 +106,42 @@ def test_more_dependencies_details(tmpdir):
     dotted_names = _get_dependencies_on_file(tmpdir, MORE_DEPENDENCIES)
     assert "plone.app.caching" in dotted_names
     assert "plone.app.dexterity" in dotted_names
+
+
+def test_stops_after_dependencies(tmpdir):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(
+        folder,
+        source_code=XML_TEMPLATE.format(ONE_DEPENDENCY) + "<not closed>",
+        filename="metadata.xml",
+    )
+
+    gs_metadata = GSMetadata(folder, temporal_file)
+    dotted_names = [x.name for x in gs_metadata.scan()]
+    assert dotted_names == ["plone.app.caching"]
+
+
+def test_no_profiles_not_parsed(tmpdir):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(
+        folder,
+        source_code=XML_TEMPLATE.format(MISSING_PREFIX),
+        filename="metadata.xml",
+    )
+
+    gs_metadata = GSMetadata(folder, temporal_file)
+    assert list(gs_metadata.scan()) == []
+    assert gs_metadata.prefiltered
+
+
+def test_other_encodings_are_parsed(tmpdir):
+    folder = Path(tmpdir)
+    source = '<?xml version="1.0" encoding="utf-16"?>' + XML_TEMPLATE.format(
+        ONE_DEPENDENCY
+    )
+    temporal_file = folder / "metadata.xml"
+    temporal_file.write_bytes(source.encode("utf-16"))
+
+    gs_metadata = GSMetadata(folder, temporal_file)
+    assert [x.name for x in gs_metadata.scan()] == ["plone.app.caching"]
+    assert not gs_metadata.prefiltered
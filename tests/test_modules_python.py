@@ -1,9 +1,16 @@
 from .utils import write_source_file_at
 from pathlib import Path
+from z3c.dependencychecker.modules import is_ascii_compatible
+from z3c.dependencychecker.modules import ModulePass
 from z3c.dependencychecker.modules import PythonModule
+from z3c.dependencychecker.modules import walk_statements
 
+import ast
+import asyncio
+import email
 import pytest
 import tempfile
+import z3c.dependencychecker
 
 
 IMPORT = "import foo"
@@ -216,3 +223,132 @@ def test_imports_multiple_lines(tmpdir):
         "import foo\nimport bar",
     )
     assert sorted(dotted_names) == ["bar", "foo"]
+
+
+def test_line_numbers(tmpdir):
+    folder = Path(tmpdir)
+    source = "\n".join(["import foo", "", "def bar():", "    from foo import baz"])
+    temporal_file = write_source_file_at(folder, source_code=source)
+    python_module = PythonModule(folder, temporal_file)
+    lines = sorted((x.name, x.lineno) for x in python_module.scan())
+    assert lines == [("foo", 1), ("foo.baz", 4)]
+
+
+def test_coding_declaration(tmpdir):
+    folder = Path(tmpdir)
+    source = "# -*- coding: latin-1 -*-\nimport foo\nname = 'Pérez'\n"
+    temporal_file = folder / "module.py"
+    temporal_file.write_bytes(source.encode("latin-1"))
+    python_module = PythonModule(folder, temporal_file)
+    assert [x.name for x in python_module.scan()] == ["foo"]
+
+
+def test_utf8_bom(tmpdir):
+    folder = Path(tmpdir)
+    temporal_file = folder / "module.py"
+    temporal_file.write_bytes("﻿import foo\nname = 'Pérez'\n".encode("utf-8"))
+    python_module = PythonModule(folder, temporal_file)
+    assert [x.name for x in python_module.scan()] == ["foo"]
+
+
+NESTED_STATEMENTS = """
+import a
+try:
+    import b
+except* ImportError:
+    import c
+else:
+    import d
+finally:
+    import e
+match x:
+    case 1:
+        import f
+    case _ if y:
+        import g
+async def h():
+    async with i:
+        import j
+    async for k in l:
+        import m
+    else:
+        import n
+class O:
+    def p(self):
+        while True:
+            import q
+        else:
+            import r
+x = lambda: [s for s in t if u]
+with v:
+    if w:
+        import x
+    elif y:
+        import z
+"""
+
+
+def _imports(nodes):
+    return [
+        (node.lineno, node.col_offset)
+        for node in nodes
+        if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+
+
+@pytest.mark.parametrize(
+    "folder",
+    [
+        Path(z3c.dependencychecker.__file__).parent,
+        Path(asyncio.__file__).parent,
+        Path(email.__file__).parent,
+    ],
+)
+def test_walk_statements_same_as_ast_walk(folder):
+    for file_path in sorted(folder.rglob("*.py")):
+        tree = ast.parse(file_path.read_bytes())
+        assert _imports(walk_statements(tree)) == _imports(ast.walk(tree))
+
+
+def test_walk_statements_nested_statements():
+    tree = ast.parse(NESTED_STATEMENTS)
+    imports = _imports(walk_statements(tree))
+    assert len(imports) == 14
+    assert imports == _imports(ast.walk(tree))
+
+
+@pytest.mark.parametrize(
+    "source,expected",
+    [
+        (b"x = 1\n", True),
+        (b"# -*- coding: utf-8 -*-\nx = 1\n", True),
+        (b"#!/usr/bin/env python\n# vim: set fileencoding=latin-1 :\n", True),
+        (b"# coding: cp500\nx = 1\n", False),
+        (b"# coding: not-an-encoding\nx = 1\n", False),
+        (b"x = 1\n\n# coding: cp500\n", True),
+        ("x = 1".encode("utf-16"), False),
+        (b"", True),
+    ],
+)
+def test_is_ascii_compatible(source, expected):
+    assert is_ascii_compatible(source) is expected
+
+
+def test_no_imports_not_parsed(tmpdir, mocker):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(folder, source_code="VALUES = [1, 2, 3]\n")
+    module_pass = mocker.spy(ModulePass, "__init__")
+
+    python_module = PythonModule(folder, temporal_file)
+    assert list(python_module.scan()) == []
+    assert python_module.prefiltered
+    assert module_pass.call_count == 0
+
+
+def test_import_word_is_parsed(tmpdir):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(folder, source_code="important = 'import'\n")
+
+    python_module = PythonModule(folder, temporal_file)
+    assert list(python_module.scan()) == []
+    assert not python_module.prefiltered
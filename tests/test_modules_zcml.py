@@ -1,5 +1,6 @@
 from .utils import write_source_file_at
 from pathlib import Path
+from z3c.dependencychecker.modules import is_xml_ascii_compatible
 from z3c.dependencychecker.modules import ZCMLFile
 
 import pytest
@@ -139,3 +140,50 @@ def test_zcml_implements(tmpdir, result, imports):
     zcml_stanza = f'<implements interface="{imports}" />'
     dotted_names = _get_zcml_imports_on_file(tmpdir, zcml_stanza)
     _verify_dotted_names(dotted_names, imports, result)
+
+
+@pytest.mark.parametrize(
+    "source,expected",
+    [
+        (b"<configure />", True),
+        (b'<?xml version="1.0" encoding="utf-8"?><configure />', True),
+        (b'<?xml version="1.0" encoding="utf-16"?><configure />', False),
+        (b'<utility component="&#112;lone" />', False),
+        (b'<!DOCTYPE c [<!ENTITY u "utility">]><configure />', False),
+    ],
+)
+def test_is_xml_ascii_compatible(source, expected):
+    assert is_xml_ascii_compatible(source) is expected
+
+
+def test_no_directives_not_parsed(tmpdir, mocker):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(
+        folder,
+        source_code=ZCML_TEMPLATE.format("<!-- nothing here -->"),
+        filename="configure.zcml",
+    )
+    iter_elements = mocker.spy(ZCMLFile, "iter_elements")
+
+    zcml_file = ZCMLFile(folder, temporal_file)
+    assert list(zcml_file.scan()) == []
+    assert zcml_file.prefiltered
+    assert iter_elements.call_count == 0
+
+
+def test_character_references_are_parsed(tmpdir):
+    zcml_stanza = '<utility component="&#112;lone.interfaces.IContent" />'
+    dotted_names = _get_zcml_imports_on_file(tmpdir, zcml_stanza)
+    assert dotted_names == ["plone.interfaces.IContent"]
+
+
+def test_line_numbers(tmpdir):
+    folder = Path(tmpdir)
+    temporal_file = write_source_file_at(
+        folder,
+        source_code=ZCML_TEMPLATE.format(f'<include package="{ABSOLUTE_IMPORT_1}" />'),
+        filename="configure.zcml",
+    )
+
+    zcml_file = ZCMLFile(folder, temporal_file)
+    assert [x.lineno for x in zcml_file.scan()] == [7]
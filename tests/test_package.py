@@ -6,8 +6,11 @@ from .utils import get_sorted_imports_paths
 from .utils import write_source_file_at
 from z3c.dependencychecker.package import Package
 from z3c.dependencychecker.package import PackageMetadata
+from z3c.dependencychecker.stats import TooManyErrors
 
+import builtins
 import os
+import pytest
 
 
 def test_package_has_metadata(minimal_structure):
@@ -113,3 +116,212 @@ def test_top_level_is_a_file(minimal_structure, mock_inspect_wheel):
     paths = get_sorted_imports_paths(package.imports)
     assert len(paths) == 1
     assert paths[0].parts[-1] == f"{package_name}.py"
+
+
+def test_shards_split_files(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    for number in range(20):
+        write_source_file_at(path / package_name, f"module{number}.py")
+
+    all_paths = []
+    for index in (1, 2, 3):
+        package = Package(path, shard=(index, 3))
+        package.analyze_package()
+        all_paths.extend(get_sorted_imports_paths(package.imports))
+
+    package = Package(path)
+    package.analyze_package()
+    assert sorted(all_paths) == get_sorted_imports_paths(package.imports)
+
+
+def test_shards_are_stable(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    for number in range(10):
+        write_source_file_at(path / package_name, f"module{number}.py")
+
+    first = Package(path, shard=(1, 2))
+    first.analyze_package()
+    second = Package(path, shard=(1, 2))
+    second.analyze_package()
+
+    assert get_sorted_imports_paths(first.imports) == get_sorted_imports_paths(
+        second.imports
+    )
+
+
+def _write_config(path, content):
+    write_source_file_at(path, "pyproject.toml", f"[tool.dependencychecker]\n{content}")
+
+
+def test_file_too_large(minimal_structure, mock_inspect_wheel, caplog):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "small.py", "import one")
+    write_source_file_at(path / package_name, "big.py", "import two\n" + "#" * 100)
+    _write_config(path, "max-file-size = 50\n")
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+    assert package.statistics.files_scanned == 1
+    assert package.statistics.skipped == {"too large": 1}
+    assert "more than max-file-size (50)" in caplog.text
+
+
+def test_file_too_large_disabled(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "big.py", "import two\n" + "#" * 100)
+    _write_config(path, "max-file-size = 0\n")
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert [x.name for x in package.imports.imports_used] == ["two"]
+
+
+def test_file_too_slow(minimal_structure, mock_inspect_wheel, mocker):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "slow.txt", ">>> import one\n")
+    _write_config(path, "max-file-time = 5\n")
+    # every call to the clock is a minute later
+    mocker.patch("time.monotonic", side_effect=range(0, 6000, 60))
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert package.imports.imports_used == []
+    assert package.statistics.skipped == {"too slow": 1}
+
+
+def test_file_too_deeply_nested(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "ok.py", "import one")
+    write_source_file_at(
+        path / package_name, "nested.py", "import two\nx = " + "+".join("a" * 300000)
+    )
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+    assert package.statistics.skipped == {"too deeply nested": 1}
+
+
+def test_invalid_budget(minimal_structure, mock_inspect_wheel, caplog):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _write_config(path, 'max-file-size = "big"\nmax-file-time = -1\n')
+
+    package = Package(path)
+
+    assert package.max_file_size == 5 * 1024 * 1024
+    assert package.max_file_time == 10
+    assert "max-file-size key in pyproject.toml needs to be" in caplog.text
+    assert "max-file-time key in pyproject.toml needs to be" in caplog.text
+
+
+def _write_broken_files(path, package_name):
+    write_source_file_at(path / package_name, "ok.py", "import one")
+    write_source_file_at(
+        path / package_name, "broken.py", "import os\nprint 'python 2'"
+    )
+    write_source_file_at(path / package_name, "configure.zcml", "<configure><include")
+    write_source_file_at(path / package_name, "nul.py", "import two\0")
+
+
+def test_errors_do_not_stop_the_scan(minimal_structure, mock_inspect_wheel, caplog):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _write_broken_files(path, package_name)
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+    errors = sorted(os.path.basename(x) for x, _ in package.statistics.errors)
+    assert errors == ["broken.py", "configure.zcml", "nul.py"]
+    assert package.statistics.files_scanned == 1
+    assert "3 files could not be scanned" in caplog.text
+
+
+def test_errors_budget(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _write_broken_files(path, package_name)
+    _write_config(path, "max-errors = 2\n")
+
+    package = Package(path)
+    with pytest.raises(TooManyErrors):
+        package.analyze_package()
+
+
+def test_errors_within_budget(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _write_broken_files(path, package_name)
+    _write_config(path, "max-errors = 3\n")
+
+    package = Package(path)
+    package.analyze_package()
+    assert len(package.statistics.errors) == 3
+
+
+def test_errors_strict(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _write_broken_files(path, package_name)
+    _write_config(path, "max-errors = 10\n")
+
+    package = Package(path, strict=True)
+    with pytest.raises(TooManyErrors):
+        package.analyze_package()
+    assert len(package.statistics.errors) == 1
+
+
+def test_prefiltered_statistics(minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "__init__.py", "")
+    write_source_file_at(path / package_name, "data.py", "VALUES = [1, 2]")
+    write_source_file_at(path / package_name, "code.py", "import one")
+    write_source_file_at(path / package_name, "README.txt", "no tests")
+    write_source_file_at(path / package_name, "configure.zcml", "<configure />")
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+    assert package.statistics.files_scanned == 5
+    assert package.statistics.prefiltered == {
+        "PythonModule": 2,
+        "PythonDocstrings": 3,
+        "DocFiles": 1,
+        "ZCMLFile": 1,
+    }
+
+
+def test_files_are_read_once(minimal_structure, mock_inspect_wheel, mocker):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    settings_path = write_source_file_at(
+        path / package_name,
+        "settings.py",
+        '"""\n>>> import two\n"""\nimport one\nINSTALLED_APPS = ["three"]\n',
+    )
+    opened = mocker.spy(builtins, "open")
+
+    package = Package(path)
+    package.analyze_package()
+
+    names = sorted(x.name for x in package.imports.imports_used)
+    assert names == ["one", "three", "two"]
+    settings_opened = [
+        x for x in opened.call_args_list if os.fspath(x.args[0]) == str(settings_path)
+    ]
+    assert len(settings_opened) == 1
@@ -1,6 +1,7 @@
 from .utils import dist_info
 from .utils import write_source_file_at
 from unittest import mock
+from z3c.dependencychecker.db import ImportsDatabase
 from z3c.dependencychecker.package import Package
 from z3c.dependencychecker.report import Report
 
@@ -641,6 +642,15 @@ def test_print_notice(capsys, minimal_structure):
     assert "" == err
 
 
+def test_print_notice_unknown_source(capsys, minimal_structure):
+    path, package_name = minimal_structure
+    package = Package(path, imports=ImportsDatabase())
+    Report(package).print_notice()
+    out, err = capsys.readouterr()
+    assert "it is not known where the requirements are read from" in out
+    assert "wheel" not in out
+
+
 def test_exit_status_set(minimal_structure, mock_inspect_wheel):
     path, package_name = minimal_structure
     mock_inspect_wheel.return_value = dist_info(
@@ -811,3 +821,77 @@ def test_missing_requirements_report_zpublisher(
         assert "ZPublisher.BaseRequest.RequestContainer" in out
     else:
         assert "Missing requirements\n====================" not in out
+
+
+def test_explain(capsys, minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(
+        path / package_name, "__init__.py", "import os\nimport another.package"
+    )
+
+    package = Package(path)
+    package.analyze_package()
+    report = Report(package, explain=True)
+    report.missing_requirements()
+    out, err = capsys.readouterr()
+
+    assert f"     another.package\n         {package_name}/__init__.py:2\n" in out
+
+
+def test_explain_more_locations(capsys, minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(
+        path / package_name, "__init__.py", "import another.package\n" * 8
+    )
+
+    package = Package(path)
+    package.analyze_package()
+    report = Report(package, explain=True)
+    report.missing_requirements()
+    out, err = capsys.readouterr()
+
+    assert f"{package_name}/__init__.py:5\n" in out
+    assert f"{package_name}/__init__.py:6\n" not in out
+    assert "         ... and 3 more\n" in out
+
+
+def test_explain_without_line(capsys, minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(
+        path / package_name,
+        "configure.zcml",
+        '<configure xmlns="http://namespaces.zope.org/zope">'
+        '<include package="another.package" /></configure>',
+    )
+    # the etree backend does not know about lines
+    write_source_file_at(
+        path, "pyproject.toml", '[tool.dependencychecker]\nxml-backend = "etree"\n'
+    )
+
+    package = Package(path)
+    package.analyze_package()
+    report = Report(package, explain=True)
+    report.missing_requirements()
+    out, err = capsys.readouterr()
+
+    assert f"     another.package\n         {package_name}/configure.zcml\n" in out
+
+
+def test_explain_test_imports_apart(capsys, minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(
+        path / package_name / "tests", "test_it.py", "import another.package\n" * 8
+    )
+    write_source_file_at(path / package_name, "code.py", "\nimport another.package")
+
+    package = Package(path)
+    package.analyze_package()
+    report = Report(package, explain=True)
+    report.missing_requirements()
+    out, err = capsys.readouterr()
+
+    assert out.endswith(f"     another.package\n         {package_name}/code.py:2\n")
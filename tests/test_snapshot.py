@@ -0,0 +1,244 @@
+from .utils import dist_info
+from .utils import write_source_file_at
+from pathlib import Path
+from unittest import mock
+from z3c.dependencychecker.db import ImportsDatabase
+from z3c.dependencychecker.dotted_name import DottedName
+from z3c.dependencychecker.main import main
+from z3c.dependencychecker.package import Package
+from z3c.dependencychecker.snapshot import HEADER
+from z3c.dependencychecker.snapshot import load_snapshot
+from z3c.dependencychecker.snapshot import MAGIC
+from z3c.dependencychecker.snapshot import save_snapshot
+from z3c.dependencychecker.snapshot import SnapshotError
+
+import pytest
+import sys
+
+
+def _fill_database(database):
+    database.add_requirements([DottedName("one"), DottedName("two")])
+    database.add_extra_requirements("test", [DottedName("pytest")])
+    database.add_imports(
+        [
+            DottedName("one.module", file_path="/a/b.py", lineno=12),
+            DottedName("pytest", file_path=Path("/a/tests.py"), is_test=True),
+            DottedName("three"),
+        ]
+    )
+
+
+def test_roundtrip(tmp_path, minimal_database):
+    _fill_database(minimal_database)
+    snapshot_path = tmp_path / "snapshot.bin"
+
+    save_snapshot(minimal_database, snapshot_path)
+    database = load_snapshot(snapshot_path)
+
+    assert database.own_dotted_name == DottedName("fake")
+    assert database._requirements == {DottedName("one"), DottedName("two")}
+    assert database._extras_requirements == {"test": {DottedName("pytest")}}
+    imports = [
+        (x.name, x.file_path, x.is_test, x.lineno) for x in database.imports_used
+    ]
+    assert imports == [
+        ("one.module", "/a/b.py", False, 12),
+        ("pytest", "/a/tests.py", True, None),
+        ("three", None, False, None),
+    ]
+    assert database.get_locations(DottedName("one")) == ([("/a/b.py", 12)], 1)
+
+
+def test_roundtrip_same_report(tmp_path, minimal_database):
+    _fill_database(minimal_database)
+    snapshot_path = tmp_path / "snapshot.bin"
+
+    save_snapshot(minimal_database, snapshot_path)
+    database = load_snapshot(snapshot_path)
+
+    assert database.get_missing_imports() == minimal_database.get_missing_imports()
+    assert (
+        database.get_unneeded_requirements()
+        == minimal_database.get_unneeded_requirements()
+    )
+
+
+def test_metadata_source(tmp_path, minimal_database):
+    minimal_database.metadata_source = Path("/a/pyproject.toml")
+    snapshot_path = tmp_path / "snapshot.bin"
+
+    save_snapshot(minimal_database, snapshot_path)
+    database = load_snapshot(snapshot_path)
+
+    assert database.metadata_source == Path("/a/pyproject.toml")
+
+
+def test_metadata_source_merged(tmp_path, minimal_database):
+    source_path = tmp_path / "source.bin"
+    minimal_database.metadata_source = Path("/a/pyproject.toml")
+    save_snapshot(minimal_database, source_path)
+    unknown_path = tmp_path / "unknown.bin"
+    minimal_database.metadata_source = None
+    save_snapshot(minimal_database, unknown_path)
+
+    package = Package.from_snapshot(tmp_path, unknown_path, source_path)
+
+    assert package.metadata_source == Path("/a/pyproject.toml")
+
+
+def test_empty_database(tmp_path, minimal_database):
+    snapshot_path = tmp_path / "snapshot.bin"
+    save_snapshot(minimal_database, snapshot_path)
+    database = load_snapshot(snapshot_path)
+    assert database.imports_used == []
+    assert database._requirements == set()
+
+
+def test_not_a_snapshot(tmp_path):
+    snapshot_path = tmp_path / "snapshot.bin"
+    snapshot_path.write_bytes(b"nothing to see here")
+    with pytest.raises(SnapshotError):
+        load_snapshot(snapshot_path)
+
+
+def test_too_short(tmp_path):
+    snapshot_path = tmp_path / "snapshot.bin"
+    snapshot_path.write_bytes(b"Z3C")
+    with pytest.raises(SnapshotError):
+        load_snapshot(snapshot_path)
+
+
+def test_missing_file(tmp_path):
+    with pytest.raises(SnapshotError):
+        load_snapshot(tmp_path / "snapshot.bin")
+
+
+def test_other_version(tmp_path):
+    snapshot_path = tmp_path / "snapshot.bin"
+    snapshot_path.write_bytes(HEADER.pack(MAGIC, 9999, 0))
+    with pytest.raises(SnapshotError):
+        load_snapshot(snapshot_path)
+
+
+def test_truncated(tmp_path, minimal_database):
+    _fill_database(minimal_database)
+    snapshot_path = tmp_path / "snapshot.bin"
+    save_snapshot(minimal_database, snapshot_path)
+    snapshot_path.write_bytes(snapshot_path.read_bytes()[:-6])
+
+    with pytest.raises(SnapshotError):
+        load_snapshot(snapshot_path)
+
+
+def test_user_mappings_applied_on_load(tmp_path, minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    database = Package(path).imports
+    database.add_requirements([DottedName("python-dateutil")])
+    database.add_imports([DottedName("dateutil.parser")])
+    snapshot_path = tmp_path / "snapshot.bin"
+    save_snapshot(database, snapshot_path)
+
+    assert database.get_missing_imports() == [DottedName("dateutil.parser")]
+
+    (path / "pyproject.toml").write_text(
+        '[tool.dependencychecker]\npython-dateutil = ["dateutil"]\n'
+    )
+    package = Package.from_snapshot(path, snapshot_path)
+    assert package.imports.get_missing_imports() == []
+
+
+def test_main_save_and_load(capsys, tmp_path, minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "__init__.py", "import another.package")
+    snapshot_path = tmp_path / "snapshot.bin"
+
+    arguments = ["dependencychecker", "--save-snapshot", str(snapshot_path), str(path)]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    scanned_output, _ = capsys.readouterr()
+
+    # the source is gone, only the snapshot remains
+    (path / package_name / "__init__.py").unlink()
+    arguments = ["dependencychecker", "--from-snapshot", str(snapshot_path), str(path)]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    snapshot_output, _ = capsys.readouterr()
+
+    assert "another.package" in snapshot_output
+    assert scanned_output == snapshot_output
+
+
+def test_main_invalid_snapshot(tmp_path, minimal_structure):
+    path, _ = minimal_structure
+    snapshot_path = tmp_path / "snapshot.bin"
+    snapshot_path.write_text("hi")
+
+    arguments = ["dependencychecker", "--from-snapshot", str(snapshot_path), str(path)]
+    with pytest.raises(SystemExit) as exit_info:
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    assert exit_info.value.code == 1
+
+
+def test_main_shards_and_merge(capsys, tmp_path, minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    for number in range(10):
+        write_source_file_at(
+            path / package_name, f"module{number}.py", f"import missing{number}"
+        )
+
+    arguments = ["dependencychecker", str(path)]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    full_output, _ = capsys.readouterr()
+
+    snapshots = []
+    for index in (1, 2, 3):
+        snapshot_path = tmp_path / f"shard{index}.bin"
+        snapshots.append(str(snapshot_path))
+        arguments = [
+            "dependencychecker",
+            "--shard",
+            f"{index}/3",
+            "--save-snapshot",
+            str(snapshot_path),
+            str(path),
+        ]
+        with pytest.raises(SystemExit) as exit_info:
+            with mock.patch.object(sys, "argv", arguments):
+                main()
+        assert exit_info.value.code == 0
+    capsys.readouterr()
+
+    arguments = ["dependencychecker", "merge", "--path", str(path), *snapshots]
+    with pytest.raises(SystemExit) as exit_info:
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    merged_output, _ = capsys.readouterr()
+
+    assert exit_info.value.code == 1
+    assert "missing9" in merged_output
+    assert merged_output == full_output
+
+
+def test_main_merge_different_packages(tmp_path, minimal_structure):
+    path, _ = minimal_structure
+    snapshots = []
+    for name in ("one", "other"):
+        database = ImportsDatabase()
+        database.own_dotted_name = DottedName(name)
+        snapshot_path = tmp_path / f"{name}.bin"
+        save_snapshot(database, snapshot_path)
+        snapshots.append(str(snapshot_path))
+
+    arguments = ["dependencychecker", "merge", "--path", str(path), *snapshots]
+    with pytest.raises(SystemExit) as exit_info:
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    assert exit_info.value.code == 1
@@ -0,0 +1,33 @@
+from z3c.dependencychecker.stats import ScanStatistics
+
+import logging
+
+
+def test_summary_nothing_skipped(caplog):
+    caplog.set_level(logging.INFO)
+    statistics = ScanStatistics()
+    statistics.files_scanned = 3
+    statistics.log_summary()
+    assert caplog.text == ""
+
+
+def test_summary(caplog):
+    statistics = ScanStatistics()
+    statistics.files_scanned = 3
+    statistics.skip("a.py", "too large")
+    statistics.skip("b.py", "too large", "1000 bytes")
+    statistics.skip("c.py", "too slow")
+
+    caplog.set_level(logging.INFO)
+    statistics.log_summary()
+
+    assert statistics.files_skipped == 3
+    assert "Scanned 3 files, skipped 3:" in caplog.text
+    assert "too large: 2" in caplog.text
+    assert "too slow: 1" in caplog.text
+
+
+def test_skip_logs_details(caplog):
+    statistics = ScanStatistics()
+    statistics.skip("a.py", "too large", "1000 bytes")
+    assert "Skipping a.py: 1000 bytes" in caplog.text
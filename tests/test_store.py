@@ -0,0 +1,189 @@
+from .utils import dist_info
+from .utils import write_source_file_at
+from unittest import mock
+from z3c.dependencychecker.dotted_name import DottedName
+from z3c.dependencychecker.main import main
+from z3c.dependencychecker.package import Package
+from z3c.dependencychecker.store import ImportsStore
+from z3c.dependencychecker.store import StoreError
+
+import pytest
+import sqlite3
+import sys
+
+
+def _results(path, *names, is_test=False, scanner="PythonModule"):
+    return [
+        (
+            scanner,
+            DottedName(name, file_path=path / "module.py", is_test=is_test, lineno=3),
+        )
+        for name in names
+    ]
+
+
+@pytest.fixture
+def store(tmp_path):
+    store = ImportsStore(tmp_path / "store.sqlite")
+    yield store
+    store.close()
+
+
+def test_packages_importing(store, tmp_path):
+    store.update_package("one", tmp_path, _results(tmp_path, "plone.api"))
+    store.update_package("two", tmp_path, _results(tmp_path, "plone.api.content"))
+    store.update_package("three", tmp_path, _results(tmp_path, "plone.apis"))
+
+    results = store.packages_importing(DottedName("plone.api"))
+    assert results == [
+        ("one", "module.py", 3, "plone.api"),
+        ("two", "module.py", 3, "plone.api.content"),
+    ]
+
+
+def test_packages_importing_case_insensitive(store, tmp_path):
+    store.update_package("one", tmp_path, _results(tmp_path, "Products.CMFCore"))
+    results = store.packages_importing(DottedName("products.cmfcore"))
+    assert [x[0] for x in results] == ["one"]
+
+
+def test_packages_importing_no_tests(store, tmp_path):
+    store.update_package("one", tmp_path, _results(tmp_path, "pytest", is_test=True))
+    store.update_package("two", tmp_path, _results(tmp_path, "pytest"))
+
+    assert len(store.packages_importing(DottedName("pytest"))) == 2
+    results = store.packages_importing(DottedName("pytest"), include_tests=False)
+    assert [x[0] for x in results] == ["two"]
+
+
+def test_update_replaces_package(store, tmp_path):
+    store.update_package("one", tmp_path, _results(tmp_path, "a", "b"))
+    store.update_package("two", tmp_path, _results(tmp_path, "a"))
+    store.update_package("one", tmp_path, _results(tmp_path, "c"))
+
+    assert store.packages() == ["one", "two"]
+    assert store.imports_of("one") == ["c"]
+    assert store.imports_of("two") == ["a"]
+    (count,) = store._connection.execute("SELECT count(*) FROM imports").fetchone()
+    assert count == 2
+
+
+def test_imports_of_no_tests(store, tmp_path):
+    results = _results(tmp_path, "a") + _results(tmp_path, "b", is_test=True)
+    store.update_package("one", tmp_path, results)
+    assert store.imports_of("one") == ["a", "b"]
+    assert store.imports_of("one", include_tests=False) == ["a"]
+
+
+def test_store_is_persistent(tmp_path):
+    store = ImportsStore(tmp_path / "store.sqlite")
+    store.update_package("one", tmp_path, _results(tmp_path, "a"))
+    store.close()
+
+    store = ImportsStore(tmp_path / "store.sqlite")
+    assert store.imports_of("one") == ["a"]
+    store.close()
+
+
+def test_not_a_store(tmp_path):
+    store_path = tmp_path / "store.sqlite"
+    store_path.write_text("this is not a database" * 100)
+    with pytest.raises(StoreError):
+        ImportsStore(store_path)
+
+
+def test_other_version(tmp_path):
+    store_path = tmp_path / "store.sqlite"
+    connection = sqlite3.connect(store_path)
+    connection.execute("PRAGMA user_version = 99")
+    connection.close()
+    with pytest.raises(StoreError):
+        ImportsStore(store_path)
+
+
+def test_package_writes_store(store, minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "__init__.py", "import one")
+    write_source_file_at(path / package_name / "tests", "test_it.py", "import two")
+
+    package = Package(path, store=store)
+    package.analyze_package()
+
+    results = store.packages_importing(DottedName("one"))
+    assert results == [(package_name, f"{package_name}/__init__.py", 1, "one")]
+    assert store.packages_importing(DottedName("two"), include_tests=False) == []
+    (scanner,) = store._connection.execute(
+        "SELECT scanner FROM imports WHERE dotted_name = 'one'"
+    ).fetchone()
+    assert scanner == "PythonModule"
+
+
+def test_main_store_and_query(capsys, tmp_path, minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "__init__.py", "import plone.api.content")
+    store_path = str(tmp_path / "store.sqlite")
+
+    arguments = ["dependencychecker", "--store", store_path, str(path)]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    capsys.readouterr()
+
+    arguments = ["dependencychecker", "query", "--store", store_path, "plone.api"]
+    with pytest.raises(SystemExit) as exit_info:
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    out, _ = capsys.readouterr()
+    assert exit_info.value.code == 0
+    assert out == f"{package_name}\n"
+
+    arguments = ["dependencychecker", "query", "--store", store_path, "--package"]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments + [package_name]):
+            main()
+    out, _ = capsys.readouterr()
+    assert out == "plone.api.content\n"
+
+
+def test_query_files(capsys, tmp_path, minimal_structure, mock_inspect_wheel):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    write_source_file_at(path / package_name, "__init__.py", "import plone.api")
+    write_source_file_at(
+        path / package_name,
+        "configure.zcml",
+        '<configure xmlns="http://namespaces.zope.org/zope">'
+        '<include package="plone.api" /></configure>',
+    )
+    # the etree backend does not know about lines
+    write_source_file_at(
+        path, "pyproject.toml", '[tool.dependencychecker]\nxml-backend = "etree"\n'
+    )
+    store_path = str(tmp_path / "store.sqlite")
+
+    arguments = ["dependencychecker", "--store", store_path, str(path)]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    capsys.readouterr()
+
+    arguments = ["dependencychecker", "query", "--store", store_path, "--files"]
+    with pytest.raises(SystemExit):
+        with mock.patch.object(sys, "argv", arguments + ["plone.api"]):
+            main()
+    out, _ = capsys.readouterr()
+    assert sorted(out.splitlines()) == [
+        f"{package_name}: {package_name}/__init__.py:1: plone.api",
+        f"{package_name}: {package_name}/configure.zcml: plone.api",
+    ]
+
+
+def test_query_missing_store(tmp_path):
+    store_path = str(tmp_path / "store.sqlite")
+    arguments = ["dependencychecker", "query", "--store", store_path, "plone.api"]
+    with pytest.raises(SystemExit) as exit_info:
+        with mock.patch.object(sys, "argv", arguments):
+            main()
+    assert exit_info.value.code == 2
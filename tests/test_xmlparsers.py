@@ -0,0 +1,221 @@
+from .utils import dist_info
+from .utils import write_source_file_at
+from xml.etree import ElementTree
+from z3c.dependencychecker.package import Package
+from z3c.dependencychecker.xmlparsers import DEFAULT_XML_BACKEND
+from z3c.dependencychecker.xmlparsers import XML_CHUNK_SIZE
+from z3c.dependencychecker.xmlparsers import XML_PARSERS
+
+import pytest
+
+
+BACKENDS = [
+    pytest.param(
+        "lxml",
+        marks=pytest.mark.skipif(
+            "lxml" not in XML_PARSERS, reason="lxml is not installed"
+        ),
+    ),
+    "expat",
+    "etree",
+]
+
+
+def _elements(backend, source, tags, attributes_only=False):
+    return [
+        (tag, dict(attributes), text)
+        for tag, attributes, text, _ in XML_PARSERS[backend](
+            source, tags, attributes_only
+        )
+    ]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_only_tags(backend):
+    source = b'<a><b x="1">one</b><c><d/><b>two</b></c></a>'
+    assert _elements(backend, source, ("b", "d")) == [
+        ("b", {"x": "1"}, "one"),
+        ("d", {}, None),
+        ("b", {}, "two"),
+    ]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_attributes_only(backend):
+    source = b'<a><b x="1">one</b><c><d y="2"/><b>two</b></c></a>'
+    assert _elements(backend, source, ("b", "d"), attributes_only=True) == [
+        ("b", {"x": "1"}, None),
+        ("d", {"y": "2"}, None),
+        ("b", {}, None),
+    ]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_text_before_children(backend):
+    source = b"<a>one <![CDATA[two]]><b>three</b>four</a>"
+    assert _elements(backend, source, ("a", "b")) == [
+        ("b", {}, "three"),
+        ("a", {}, "one two"),
+    ]
+
+
+@pytest.mark.parametrize("attributes_only", [False, True])
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_namespaces(backend, attributes_only):
+    source = b"""
+    <configure xmlns="http://namespaces.zope.org/zope"
+               xmlns:browser="http://namespaces.zope.org/browser">
+      <include package="one" />
+      <browser:page class="two" />
+      <page class="not.this.one" />
+    </configure>
+    """
+    tags = (
+        "{http://namespaces.zope.org/zope}include",
+        "{http://namespaces.zope.org/browser}page",
+    )
+    assert _elements(backend, source, tags, attributes_only) == [
+        ("{http://namespaces.zope.org/zope}include", {"package": "one"}, None),
+        ("{http://namespaces.zope.org/browser}page", {"class": "two"}, None),
+    ]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_references_and_encodings(backend):
+    source = '<?xml version="1.0" encoding="utf-16"?><a b="&#111;ne">&lt;é&gt;</a>'
+    assert _elements(backend, source.encode("utf-16"), ("a",)) == [
+        ("a", {"b": "one"}, "<é>"),
+    ]
+
+
+@pytest.mark.parametrize("attributes_only", [False, True])
+@pytest.mark.parametrize("backend", BACKENDS)
+@pytest.mark.parametrize("source", [b"<a><b></a>", b"", b"<a>&unknown;</a>"])
+def test_invalid(backend, source, attributes_only):
+    with pytest.raises(SyntaxError):
+        _elements(backend, source, ("a", "b"), attributes_only)
+
+
+def test_expat_errors_are_parse_errors():
+    with pytest.raises(ElementTree.ParseError):
+        _elements("expat", b"<a>", ("a",))
+
+
+@pytest.mark.parametrize("attributes_only", [False, True])
+@pytest.mark.parametrize("backend", ["lxml", "expat"])
+def test_lines(backend, attributes_only):
+    if backend not in XML_PARSERS:
+        pytest.skip("lxml is not installed")
+    source = b'<a>\n  <b x="1">one\n  </b>\n\n  <c><b y="2"/></c>\n</a>'
+    lines = [
+        line for _, _, _, line in XML_PARSERS[backend](source, ("b",), attributes_only)
+    ]
+    assert lines == [2, 5]
+
+
+def test_etree_has_no_lines():
+    source = b"<a>\n<b/></a>"
+    ((_, _, _, line),) = XML_PARSERS["etree"](source, ("b",))
+    assert line is None
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_large_document(backend):
+    filler = b"<filler>text</filler>" * (XML_CHUNK_SIZE // 10)
+    source = b"<a>" + filler + b"<b>one</b>" + filler + b"<b>two</b></a>"
+    assert _elements(backend, source, ("b",)) == [
+        ("b", {}, "one"),
+        ("b", {}, "two"),
+    ]
+
+
+@pytest.mark.parametrize("attributes_only", [False, True])
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_stops_early(backend, attributes_only):
+    filler = b"<filler/>" * (XML_CHUNK_SIZE // 9 + 1)
+    # not even well formed past the first chunk
+    source = b"<a><b/>" + filler * 4 + b"</c>"
+
+    for tag, _, _, _ in XML_PARSERS[backend](source, ("b",), attributes_only):
+        assert tag == "b"
+        break
+
+
+@pytest.mark.parametrize("attributes_only", [False, True])
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_elements_before_an_error(backend, attributes_only):
+    source = b"<a><b/></a><not closed>"
+    found = []
+    with pytest.raises(SyntaxError):
+        for tag, _, _, _ in XML_PARSERS[backend](source, ("b",), attributes_only):
+            found.append(tag)
+    assert found == ["b"]
+
+
+def _write_package(path, package_name, backend):
+    write_source_file_at(
+        path / package_name,
+        "configure.zcml",
+        '<configure xmlns="http://namespaces.zope.org/zope">'
+        '<include package="one"/></configure>',
+    )
+    write_source_file_at(
+        path, "pyproject.toml", f'[tool.dependencychecker]\nxml-backend = "{backend}"\n'
+    )
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_package_xml_backend(minimal_structure, mock_inspect_wheel, mocker, backend):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _write_package(path, package_name, backend)
+    parser = mocker.Mock(wraps=XML_PARSERS[backend])
+    mocker.patch.dict(XML_PARSERS, {backend: parser})
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert package.xml_backend == backend
+    assert parser.call_count == 1
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+
+
+@pytest.mark.parametrize(
+    "backend,message",
+    [
+        ("auto", None),
+        ("magic", "xml-backend key in pyproject.toml needs to be auto or one of"),
+    ],
+)
+def test_package_xml_backend_default(
+    minimal_structure, mock_inspect_wheel, caplog, backend, message
+):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _write_package(path, package_name, backend)
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert package.xml_backend == DEFAULT_XML_BACKEND
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+    if message:
+        assert message in caplog.text
+
+
+def test_package_xml_backend_not_installed(
+    minimal_structure, mock_inspect_wheel, mocker, caplog
+):
+    path, package_name = minimal_structure
+    mock_inspect_wheel.return_value = dist_info(name=package_name)
+    _write_package(path, package_name, "lxml")
+    mocker.patch.dict(XML_PARSERS)
+    XML_PARSERS.pop("lxml", None)
+    mocker.patch("z3c.dependencychecker.package.DEFAULT_XML_BACKEND", "expat")
+
+    package = Package(path)
+    package.analyze_package()
+
+    assert package.xml_backend == "expat"
+    assert [x.name for x in package.imports.imports_used] == ["one"]
+    assert "xml-backend 'lxml' is not available" in caplog.text